@@ -0,0 +1,139 @@
+"""
+JWT authentication with a cached deny-list and an opt-in stateless mode.
+
+``JWTAuthentication`` is simplejwt's class plus a revocation check.
+``StatelessJWTAuthentication`` additionally skips the per-request ``User``
+query: it returns a ``ClaimsUser`` built from the token's ``user_id`` and
+``username`` claims, which loads the full row only when a view reads an
+attribute the token does not carry. Its role is resolved like any other
+user's (``accounts.roles.get_user_role``), never taken from the token.
+
+Revoked token ids live in ``RevokedToken`` until they expire. Revoking all of
+a user's tokens (on a role change, deactivation or deletion) records a cutoff
+in ``RevokedUserTokens``: tokens issued before it are rejected, which the
+stateless mode relies on since it never reads the user row. Both live sets
+are small and cached together, so checking them costs no query; other
+processes see a revocation within ``REVOKED_TOKENS_CACHE_TIMEOUT`` seconds.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from django.utils.functional import cached_property
+from rest_framework_simplejwt import authentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import datetime_from_epoch
+from .models import RevokedToken, RevokedUserTokens
+
+User = get_user_model()
+
+REVOKED_TOKENS_CACHE_KEY = 'accounts:revoked-tokens'
+
+
+def revocations():
+    """
+    Return ``(token_ids, user_cutoffs)``: the revoked token ids and, per user id
+    (as a string), the epoch second before which their tokens are revoked.
+    """
+    revoked = cache.get(REVOKED_TOKENS_CACHE_KEY)
+    if revoked is None:
+        now = timezone.now()
+        revoked = (
+            frozenset(RevokedToken.objects.filter(expires_at__gt=now).values_list('jti', flat=True)),
+            {
+                str(user_id): int(revoked_before.timestamp())
+                for user_id, revoked_before in RevokedUserTokens.objects.filter(
+                    expires_at__gt=now
+                ).values_list('user_id', 'revoked_before')
+            },
+        )
+        cache.set(REVOKED_TOKENS_CACHE_KEY, revoked, settings.REVOKED_TOKENS_CACHE_TIMEOUT)
+    return revoked
+
+
+def is_revoked(token):
+    token_ids, user_cutoffs = revocations()
+    if token.get(api_settings.JTI_CLAIM) in token_ids:
+        return True
+    cutoff = user_cutoffs.get(str(token.get(api_settings.USER_ID_CLAIM)))
+    # Claims are whole seconds: a token issued in the second of the cutoff
+    # (possibly just before it) is kept, so a fresh login is never rejected.
+    return cutoff is not None and token.get('iat', 0) < cutoff
+
+
+def revoke_token(token):
+    """Deny ``token`` until it expires and drop entries that already have."""
+    RevokedToken.objects.get_or_create(
+        jti=token[api_settings.JTI_CLAIM],
+        defaults={'expires_at': datetime_from_epoch(token['exp'])}
+    )
+    RevokedToken.objects.filter(expires_at__lte=timezone.now()).delete()
+    transaction.on_commit(lambda: cache.delete(REVOKED_TOKENS_CACHE_KEY))
+
+
+def revoke_user_tokens(user_ids):
+    """Deny every token issued so far to the given users."""
+    user_ids = sorted(set(user_ids))
+    if not user_ids:
+        return
+    now = timezone.now()
+    expires_at = now + max(api_settings.ACCESS_TOKEN_LIFETIME, api_settings.REFRESH_TOKEN_LIFETIME)
+    RevokedUserTokens.objects.bulk_create(
+        [RevokedUserTokens(user_id=user_id, revoked_before=now, expires_at=expires_at) for user_id in user_ids],
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=['user_id'],
+        update_fields=['revoked_before', 'expires_at']
+    )
+    RevokedUserTokens.objects.filter(expires_at__lte=now).delete()
+    transaction.on_commit(lambda: cache.delete(REVOKED_TOKENS_CACHE_KEY))
+
+
+class ClaimsUser(TokenUser):
+    """
+    A user backed by token claims. Attributes missing from the token are read
+    from the ``User`` row, loaded on first use.
+    """
+
+    @cached_property
+    def full_user(self):
+        return User.objects.get(pk=self.id)
+
+    def __getattr__(self, attr):
+        if attr.startswith('_'):
+            raise AttributeError(attr)
+        if attr in self.token:
+            return self.token[attr]
+        return getattr(self.full_user, attr)
+
+
+class JWTAuthentication(authentication.JWTAuthentication):
+    def get_validated_token(self, raw_token):
+        token = super().get_validated_token(raw_token)
+        if is_revoked(token):
+            raise InvalidToken('Token has been revoked')
+        return token
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken('Token contained no recognizable user identification')
+        return ClaimsUser(validated_token)
+
+
+class StatelessActionsMixin:
+    """
+    Authenticate the viewset actions named in ``stateless_actions`` with
+    ``StatelessJWTAuthentication``; other actions keep the configured classes.
+    """
+    stateless_actions = ()
+
+    def get_authenticators(self):
+        action = getattr(self, 'action_map', {}).get(self.request.method.lower())
+        if action in self.stateless_actions:
+            return [StatelessJWTAuthentication()]
+        return super().get_authenticators()
@@ -25,5 +25,29 @@ class UserProfile(models.Model):
     phone = models.CharField(max_length=15, blank=True)
     bio = models.TextField(max_length=500, blank=True)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
     def __str__(self):
         return f"{self.user.username}'s profile"
+
+class RevokedToken(models.Model):
+    jti = models.CharField(max_length=255, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+    revoked_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.jti
+
+class RevokedUserTokens(models.Model):
+    """Every token of the user issued before ``revoked_before`` is revoked."""
+    # Not a foreign key: the entry must outlive a deleted user's tokens.
+    user_id = models.IntegerField(unique=True)
+    revoked_before = models.DateTimeField()
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"Tokens of user {self.user_id} before {self.revoked_before}"
@@ -1,9 +1,11 @@
 from rest_framework import permissions
+from .models import Role
+from .roles import get_user_role
 
 class IsAdmin(permissions.BasePermission):
     def has_permission(self, request, view):
-        return request.user.profile.role.name == 'admin'
+        return get_user_role(request.user) == Role.ADMIN
 
 class IsProjectManager(permissions.BasePermission):
     def has_permission(self, request, view):
-        return request.user.profile.role.name == 'project_manager'
+        return get_user_role(request.user) == Role.PROJECT_MANAGER
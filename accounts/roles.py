@@ -0,0 +1,49 @@
+"""
+Cached role lookups.
+
+Permission checks used to follow ``user.profile.role`` (two queries) on every
+request. The role name is now cached per user, invalidated from signals when a
+``UserProfile`` or ``Role`` changes, and memoized on the user object so a
+request resolves it at most once. Issued tokens also carry the role as a
+claim for clients.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework_simplejwt.tokens import RefreshToken
+from .models import UserProfile
+
+ROLE_CACHE_KEY = 'accounts:role:{}'
+# Cached marker for users without a profile, so they are not looked up again.
+NO_ROLE = ''
+
+
+def get_user_role(user):
+    """Return the role name of ``user``, or ``None`` when they have no profile."""
+    if user is None or not user.is_authenticated:
+        return None
+    role = getattr(user, '_role_name', None)
+    if role is None:
+        key = ROLE_CACHE_KEY.format(user.id)
+        role = cache.get(key)
+        if role is None:
+            role = UserProfile.objects.filter(user_id=user.id).values_list(
+                'role__name', flat=True
+            ).first() or NO_ROLE
+            cache.set(key, role, settings.ROLE_CACHE_TIMEOUT)
+        user._role_name = role
+    return role or None
+
+
+def invalidate_user_roles(user_ids):
+    cache.delete_many([ROLE_CACHE_KEY.format(user_id) for user_id in user_ids])
+
+
+def issue_tokens(user):
+    """
+    Return a refresh token for ``user``; it and its access token carry
+    ``username`` and ``role`` claims.
+    """
+    refresh = RefreshToken.for_user(user)
+    refresh['username'] = user.get_username()
+    refresh['role'] = get_user_role(user)
+    return refresh
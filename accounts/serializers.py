@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from task_management.sparse import FieldQuery, SparseFieldsMixin
 from .models import UserProfile, Role
 
 User = get_user_model()  # Recommended way to get the User model
@@ -15,10 +16,15 @@ class UserSerializer(serializers.ModelSerializer):
         user = User.objects.create_user(**validated_data)
         return user
 
-class UserProfileSerializer(serializers.ModelSerializer):
+class UserProfileSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     role_name = serializers.CharField(source='role.name', read_only=True)
 
+    field_queries = {
+        'user': FieldQuery(only=('user',), select_related=('user',)),
+        'role_name': FieldQuery(only=('role__name',), select_related=('role',)),
+    }
+
     class Meta:
         model = UserProfile
         fields = ('id', 'user', 'role', 'role_name', 'phone', 'bio')
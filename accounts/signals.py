@@ -0,0 +1,42 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .authentication import revoke_user_tokens
+from .models import Role, UserProfile
+from .roles import invalidate_user_roles
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=UserProfile)
+def profile_saved(sender, instance, created, **kwargs):
+    invalidate_user_roles([instance.user_id])
+    loaded = getattr(instance, '_loaded_values', {})
+    if not created and loaded.get('role_id') != instance.role_id:
+        revoke_user_tokens([instance.user_id])
+    instance._loaded_values = {**loaded, 'role_id': instance.role_id}
+
+
+@receiver(post_delete, sender=UserProfile)
+def profile_deleted(sender, instance, **kwargs):
+    invalidate_user_roles([instance.user_id])
+    revoke_user_tokens([instance.user_id])
+
+
+@receiver(post_save, sender=Role)
+def role_saved(sender, instance, created, **kwargs):
+    if not created:
+        user_ids = list(UserProfile.objects.filter(role=instance).values_list('user_id', flat=True))
+        invalidate_user_roles(user_ids)
+        revoke_user_tokens(user_ids)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, **kwargs):
+    if not instance.is_active:
+        revoke_user_tokens([instance.id])
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    revoke_user_tokens([instance.id])
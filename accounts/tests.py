@@ -1,9 +1,19 @@
+from datetime import timedelta
+from types import SimpleNamespace
+from django.core.cache import cache
 from django.test import TestCase, Client
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 from rest_framework import status
 from rest_framework.test import APITestCase
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from .authentication import ClaimsUser, is_revoked
 from .models import Role, UserProfile
+from .permissions import IsAdmin, IsProjectManager
+from .roles import issue_tokens
 
 User = get_user_model()
 
@@ -88,6 +98,16 @@ class AuthenticationTest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertTrue('access' in response.data)
 
+    def test_tokens_carry_role_claim(self):
+        """Test issued tokens embed the user's role"""
+        response = self.client.post(self.register_url, self.user_data)
+        self.assertEqual(AccessToken(response.data['access'])['role'], Role.TEAM_MEMBER)
+        response = self.client.post(self.login_url, {
+            'username': self.user_data['username'],
+            'password': self.user_data['password']
+        })
+        self.assertEqual(AccessToken(response.data['access'])['role'], Role.TEAM_MEMBER)
+
     def test_user_login_invalid_credentials(self):
         """Test user login with invalid credentials"""
         response = self.client.post(self.login_url, {
@@ -119,6 +139,15 @@ class ProfileViewTest(APITestCase):
         self.assertEqual(response.data['user']['username'], 'testuser')
         self.assertEqual(response.data['role_name'], Role.TEAM_MEMBER)
 
+    def test_get_profile_sparse_fields(self):
+        """Test ?fields= trims the profile and skips the user join"""
+        with self.assertNumQueries(1):
+            response = self.client.get(self.profile_url, {'fields': 'id,role_name'})
+        self.assertEqual(response.data, {'id': self.profile.id, 'role_name': Role.TEAM_MEMBER})
+
+        response = self.client.get(self.profile_url, {'fields': 'id,password'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_get_profile_unauthenticated(self):
         """Test getting profile without authentication"""
         self.client.force_authenticate(user=None)
@@ -161,3 +190,136 @@ class PermissionTest(APITestCase):
         self.client.force_authenticate(user=self.pm_user)
         # Add your project manager-specific endpoint test here
         self.assertTrue(self.pm_user.profile.role.name == Role.PROJECT_MANAGER)
+
+    def check(self, permission, user):
+        request = SimpleNamespace(user=User.objects.get(pk=user.pk))
+        return permission().has_permission(request, None)
+
+    def test_role_lookup_is_cached(self):
+        """Test role checks query the database at most once per user"""
+        cache.clear()
+        user = User.objects.get(pk=self.admin_user.pk)
+        request = SimpleNamespace(user=user)
+        with self.assertNumQueries(1):
+            self.assertTrue(IsAdmin().has_permission(request, None))
+            self.assertFalse(IsProjectManager().has_permission(request, None))
+        request = SimpleNamespace(user=User.objects.get(pk=self.admin_user.pk))
+        with self.assertNumQueries(0):
+            self.assertTrue(IsAdmin().has_permission(request, None))
+
+    def test_role_cache_invalidated_on_profile_change(self):
+        """Test changing a profile's role takes effect immediately"""
+        self.assertFalse(self.check(IsProjectManager, self.team_user))
+        profile = self.team_user.profile
+        profile.role = self.pm_role
+        profile.save()
+        self.assertTrue(self.check(IsProjectManager, self.team_user))
+        profile.delete()
+        self.assertFalse(self.check(IsProjectManager, self.team_user))
+
+class StatelessAuthenticationTest(APITestCase):
+    """Test cases for the claims-based authentication mode"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            email='test@example.com'
+        )
+        UserProfile.objects.create(user=self.user, role=Role.objects.create(name=Role.PROJECT_MANAGER))
+        self.token = issue_tokens(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+
+    def user_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [query for query in context.captured_queries if 'FROM "auth_user" WHERE' in query['sql']]
+
+    def test_read_endpoints_skip_user_query(self):
+        """Test stateless endpoints never load the user row"""
+        self.assertEqual(self.user_queries('/api/tasks/'), [])
+        self.assertEqual(self.user_queries('/api/dashboard/'), [])
+        # Only the visibility version; the snapshot carries its validators.
+        with self.assertNumQueries(1):
+            self.client.get('/api/dashboard/')
+        self.assertEqual(len(self.user_queries('/api/projects/')), 1)
+
+    def test_claims_user(self):
+        """Test the claims user carries claims and loads other fields lazily"""
+        user = ClaimsUser(AccessToken(str(self.token)))
+        with self.assertNumQueries(0):
+            self.assertEqual(user.id, self.user.id)
+            self.assertEqual(user.username, 'testuser')
+            self.assertTrue(IsProjectManager().has_permission(SimpleNamespace(user=user), None))
+        with self.assertNumQueries(1):
+            self.assertEqual(user.email, 'test@example.com')
+            self.assertEqual(user.first_name, '')
+
+    def test_logout_revokes_token(self):
+        """Test a logged out token is rejected by both authentication modes"""
+        self.client.get('/api/tasks/')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('logout'))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self.client.get('/api/tasks/').status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self.client.get('/api/projects/').status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_logout_revokes_refresh_token(self):
+        """Test logging out with a refresh token revokes it as well"""
+        refresh = issue_tokens(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('logout'), {'refresh': str(refresh)})
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertTrue(is_revoked(RefreshToken(str(refresh))))
+
+        other = User.objects.create_user(username='other', password='testpass123')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {issue_tokens(self.user).access_token}')
+        response = self.client.post(reverse('logout'), {'refresh': str(issue_tokens(other))})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def use_earlier_token(self, user=None):
+        # Claims have whole-second precision; revocations keep tokens issued
+        # in their own second.
+        token = issue_tokens(user or self.user).access_token
+        token.set_iat(at_time=timezone.now() - timedelta(minutes=1))
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(self.client.get('/api/tasks/').status_code, status.HTTP_200_OK)
+
+    def test_role_is_not_taken_from_the_token(self):
+        """Test a forged or outdated role claim grants nothing"""
+        token = AccessToken(str(self.token))
+        token['role'] = Role.ADMIN
+        self.assertFalse(IsAdmin().has_permission(SimpleNamespace(user=ClaimsUser(token)), None))
+
+    def test_role_change_revokes_tokens(self):
+        """Test changing a user's role rejects the tokens issued before"""
+        self.use_earlier_token()
+        profile = UserProfile.objects.get(user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.phone = '555'
+            profile.save()
+        self.assertEqual(self.client.get('/api/tasks/').status_code, status.HTTP_200_OK)
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.role = Role.objects.create(name=Role.TEAM_MEMBER)
+            profile.save()
+        self.assertEqual(self.client.get('/api/tasks/').status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {issue_tokens(self.user).access_token}')
+        self.assertEqual(self.client.get('/api/tasks/').status_code, status.HTTP_200_OK)
+
+    def test_deactivation_and_deletion_revoke_tokens(self):
+        """Test tokens of deactivated or deleted users are rejected in both modes"""
+        self.use_earlier_token()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        self.assertEqual(self.client.get('/api/tasks/').status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self.client.get('/api/projects/').status_code, status.HTTP_401_UNAUTHORIZED)
+
+        other = User.objects.create_user(username='other', password='testpass123')
+        self.use_earlier_token(other)
+        with self.captureOnCommitCallbacks(execute=True):
+            other.delete()
+        self.assertEqual(self.client.get('/api/tasks/').status_code, status.HTTP_401_UNAUTHORIZED)
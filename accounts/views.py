@@ -1,9 +1,15 @@
 from rest_framework import status, permissions
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import authenticate
+from django.shortcuts import get_object_or_404
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from task_management.sparse import sparse_queryset
+from .authentication import revoke_token
 from .models import Role, UserProfile
+from .roles import issue_tokens
 from .serializers import UserSerializer, UserProfileSerializer
 
 class RegisterView(APIView):
@@ -18,7 +24,7 @@ class RegisterView(APIView):
             role = Role.objects.get(name=Role.TEAM_MEMBER)
             UserProfile.objects.create(user=user, role=role)
 
-            refresh = RefreshToken.for_user(user)
+            refresh = issue_tokens(user)
             return Response({
                 'user': user_serializer.data,
                 'refresh': str(refresh),
@@ -35,7 +41,7 @@ class LoginView(APIView):
         user = authenticate(username=username, password=password)
 
         if user:
-            refresh = RefreshToken.for_user(user)
+            refresh = issue_tokens(user)
             return Response({
                 'refresh': str(refresh),
                 'access': str(refresh.access_token),
@@ -44,6 +50,23 @@ class LoginView(APIView):
 
 class ProfileView(APIView):
     def get(self, request):
-        profile = request.user.profile
-        serializer = UserProfileSerializer(profile)
+        profile = get_object_or_404(
+            sparse_queryset(UserProfile.objects.all(), UserProfileSerializer, request), user=request.user
+        )
+        serializer = UserProfileSerializer(profile, context={'request': request})
         return Response(serializer.data)
+
+class LogoutView(APIView):
+    def post(self, request):
+        refresh = request.data.get('refresh')
+        if refresh:
+            try:
+                refresh = RefreshToken(refresh)
+            except TokenError:
+                return Response({'refresh': 'Invalid or expired token.'}, status=status.HTTP_400_BAD_REQUEST)
+            if str(refresh.get(jwt_settings.USER_ID_CLAIM)) != str(request.user.id):
+                return Response({'refresh': 'Token belongs to another user.'}, status=status.HTTP_400_BAD_REQUEST)
+            revoke_token(refresh)
+        if request.auth is not None:
+            revoke_token(request.auth)
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,150 @@
+"""
+Compare request latency of the sync (WSGI) read endpoints with their native
+async (ASGI) variants under concurrent load.
+
+    python -m benchmarks.async_latency --tasks 20000 --concurrency 32
+
+No ASGI server is installed here, so both stacks are driven in-process: the
+WSGI endpoints by ``django.test.Client`` on ``--concurrency`` threads, the
+ASGI variants by ``django.test.AsyncClient`` with as many requests in flight
+on one event loop. Both go through the full handler, middleware and
+authentication; only the socket layer is missing. The cache is cleared
+before each run, so the dashboard is measured on cache misses.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .common import migrate, percentile, seed_dataset, setup_django
+
+ENDPOINTS = {
+    'dashboard': ('/api/dashboard/', '/api/async/dashboard/'),
+    'task_list': ('/api/tasks/', '/api/async/tasks/'),
+    'task_detail': ('/api/tasks/{task_id}/', '/api/async/tasks/{task_id}/'),
+}
+
+
+def build_requests(fixtures, count):
+    """``count`` (user token, path index, endpoint) triples spread over the users."""
+    from django.contrib.auth import get_user_model
+    from accounts.roles import issue_tokens
+    from tasks.models import TaskAccess
+
+    users = get_user_model().objects.filter(id__in=fixtures['user_ids'][:count])
+    tokens = {user.id: str(issue_tokens(user).access_token) for user in users}
+    visible = dict(
+        TaskAccess.objects.filter(user_id__in=tokens).order_by('user_id', 'task_id').values_list('user_id', 'task_id')
+    )
+    user_ids = [user_id for user_id in tokens if user_id in visible]
+    return [
+        (tokens[user_ids[index % len(user_ids)]], visible[user_ids[index % len(user_ids)]])
+        for index in range(count)
+    ]
+
+
+def summarize(samples, elapsed):
+    samples.sort()
+    return {
+        'requests': len(samples),
+        'p50_ms': round(statistics.median(samples), 3),
+        'p99_ms': round(percentile(samples, 0.99), 3),
+        'throughput_rps': round(len(samples) / elapsed, 1),
+    }
+
+
+def run_wsgi(path, requests, concurrency):
+    from django.core.cache import cache
+    from django.test import Client
+
+    cache.clear()
+    local = threading.local()
+
+    def call(item):
+        token, task_id = item
+        if not hasattr(local, 'client'):
+            local.client = Client()
+        start = time.perf_counter()
+        response = local.client.get(path.format(task_id=task_id), headers={'Authorization': f'Bearer {token}'})
+        elapsed = (time.perf_counter() - start) * 1000
+        assert response.status_code == 200, response.status_code
+        return elapsed
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = list(pool.map(call, requests))
+    return summarize(samples, time.perf_counter() - start)
+
+
+async def run_asgi(path, requests, concurrency):
+    from django.core.cache import cache
+    from django.test import AsyncClient
+
+    await cache.aclear()
+    client = AsyncClient()
+    slots = asyncio.Semaphore(concurrency)
+
+    async def call(item):
+        token, task_id = item
+        async with slots:
+            start = time.perf_counter()
+            response = await client.get(path.format(task_id=task_id), headers={'Authorization': f'Bearer {token}'})
+            elapsed = (time.perf_counter() - start) * 1000
+        assert response.status_code == 200, response.status_code
+        return elapsed
+
+    start = time.perf_counter()
+    samples = await asyncio.gather(*(call(item) for item in requests))
+    return summarize(list(samples), time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--projects', type=int, default=50)
+    parser.add_argument('--members', type=int, default=20)
+    parser.add_argument('--tasks', type=int, default=20000)
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--json', action='store_true', help='Emit machine-readable output.')
+    args = parser.parse_args()
+
+    db_path = setup_django()
+    try:
+        migrate()
+        fixtures = seed_dataset(
+            users=args.users,
+            projects=args.projects,
+            members_per_project=args.members,
+            tasks=args.tasks
+        )
+        requests = build_requests(fixtures, args.requests)
+        results = {}
+        for name, (sync_path, async_path) in ENDPOINTS.items():
+            results[name] = {
+                'wsgi': run_wsgi(sync_path, requests, args.concurrency),
+                'asgi': asyncio.run(run_asgi(async_path, requests, args.concurrency)),
+            }
+    finally:
+        os.unlink(db_path)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    for name, result in results.items():
+        print(f'== {name}')
+        for label in ('wsgi', 'asgi'):
+            stats = result[label]
+            print(
+                f'  {label}  p50 {stats["p50_ms"]:>9.3f} ms   p99 {stats["p99_ms"]:>9.3f} ms   '
+                f'{stats["throughput_rps"]:>8.1f} req/s'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,192 @@
+"""
+Shared helpers for the standalone benchmark scripts.
+
+Benchmarks never touch the configured database: ``setup_django`` points the
+default connection at a scratch SQLite file before Django is initialised.
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def setup_django(db_path=None):
+    """Initialise Django against a scratch database and return its path."""
+    if str(BASE_DIR) not in sys.path:
+        sys.path.insert(0, str(BASE_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'task_management.settings')
+
+    import django
+    from django.conf import settings
+
+    if db_path is None:
+        handle, db_path = tempfile.mkstemp(prefix='task-bench-', suffix='.sqlite3')
+        os.close(handle)
+        os.unlink(db_path)
+    settings.DATABASES['default']['NAME'] = db_path
+    settings.DEBUG = False
+    # Requests are driven in-process through Django's test clients.
+    settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, 'testserver']
+    django.setup()
+    return db_path
+
+
+def migrate(app_label=None, migration=None):
+    from django.core.management import call_command
+
+    args = [app_label, migration] if app_label else []
+    call_command('migrate', *args, verbosity=0)
+
+
+# Password of every seeded user, so login can be exercised too.
+SEED_PASSWORD = 'bench-password'
+
+
+def seed_dataset(users=200, projects=50, members_per_project=20, tasks=50000,
+                 history_per_task=1, comments_per_task=0, search_index=False, seed=0):
+    """
+    Bulk-insert a synthetic dataset and rebuild the derived tables that model
+    signals would normally maintain. Every user gets a ``UserProfile``: about
+    1% admins, 10% project managers and team members otherwise. Rows that were
+    already in the database are left alone; the returned ids are the new ones.
+    """
+    from django.contrib.auth import get_user_model
+    from django.contrib.auth.hashers import make_password
+    from django.utils import timezone
+    from accounts.models import Role, UserProfile
+    from projects.access import rebuild_project_access
+    from projects.counters import rebuild_project_counters
+    from projects.models import Project, ProjectMember
+    from tasks.access import rebuild_task_access
+    from tasks.models import Task, TaskComment, TaskHistory
+    from tasks.search import rebuild_search_index
+
+    User = get_user_model()
+    rng = random.Random(seed)
+    now = timezone.now()
+
+    # bulk_create sets primary keys on SQLite, so the new rows are known by id.
+    password = make_password(SEED_PASSWORD)
+    user_ids = [user.id for user in User.objects.bulk_create(
+        [User(username=f'bench-user-{index}', password=password) for index in range(users)],
+        batch_size=1000
+    )]
+
+    roles = {name: Role.objects.get_or_create(name=name)[0] for name, _ in Role.ROLE_CHOICES}
+    UserProfile.objects.bulk_create(
+        [
+            UserProfile(user_id=user_id, role=roles[
+                Role.ADMIN if draw < 0.01 else Role.PROJECT_MANAGER if draw < 0.11 else Role.TEAM_MEMBER
+            ])
+            for user_id, draw in ((user_id, rng.random()) for user_id in user_ids)
+        ],
+        batch_size=1000,
+        ignore_conflicts=True
+    )
+
+    project_ids = [project.id for project in Project.objects.bulk_create(
+        [
+            Project(
+                name=f'Bench Project {index}',
+                start_date=now.date(),
+                end_date=(now + timedelta(days=90)).date(),
+                created_by_id=rng.choice(user_ids)
+            )
+            for index in range(projects)
+        ],
+        batch_size=1000
+    )]
+
+    for project_id in project_ids:
+        ProjectMember.objects.bulk_create(
+            [
+                ProjectMember(project_id=project_id, user_id=user_id)
+                for user_id in rng.sample(user_ids, min(members_per_project, len(user_ids)))
+            ],
+            batch_size=5000
+        )
+
+    statuses = [choice for choice, _ in Task.STATUS_CHOICES]
+    priorities = [choice for choice, _ in Task.PRIORITY_CHOICES]
+    task_ids = []
+    batch = []
+    for index in range(tasks):
+        batch.append(Task(
+            title=f'Bench task {index}',
+            description='Synthetic benchmark task',
+            project_id=rng.choice(project_ids),
+            created_by_id=rng.choice(user_ids),
+            assigned_to_id=rng.choice(user_ids) if rng.random() < 0.8 else None,
+            priority=rng.choice(priorities),
+            status=rng.choice(statuses),
+            due_date=now + timedelta(days=rng.randint(-60, 60))
+        ))
+        if len(batch) == 5000:
+            task_ids += [task.id for task in Task.objects.bulk_create(batch)]
+            batch = []
+    task_ids += [task.id for task in Task.objects.bulk_create(batch)]
+
+    # bulk_create stamps every row with the same auto_now value; spread them out.
+    for start in range(0, len(task_ids), 5000):
+        chunk = [
+            Task(id=task_id, updated_at=now - timedelta(minutes=rng.randint(0, 60 * 24 * 90)))
+            for task_id in task_ids[start:start + 5000]
+        ]
+        Task.objects.bulk_update(chunk, ['updated_at'])
+
+    for start in range(0, len(task_ids), 5000):
+        chunk = task_ids[start:start + 5000]
+        TaskHistory.objects.bulk_create(
+            [
+                TaskHistory(
+                    task_id=task_id,
+                    changed_by_id=rng.choice(user_ids),
+                    old_status=rng.choice(statuses),
+                    new_status=rng.choice(statuses)
+                )
+                for task_id in chunk
+                for _ in range(history_per_task)
+            ],
+            batch_size=5000
+        )
+        TaskComment.objects.bulk_create(
+            [
+                TaskComment(
+                    task_id=task_id,
+                    author_id=rng.choice(user_ids),
+                    content=f'Synthetic comment {index} on task {task_id}'
+                )
+                for task_id in chunk
+                for index in range(comments_per_task)
+            ],
+            batch_size=5000
+        )
+
+    rebuild_project_access()
+    rebuild_task_access()
+    rebuild_project_counters()
+    if search_index:
+        rebuild_search_index()
+    return {'user_ids': user_ids, 'project_ids': project_ids, 'task_ids': task_ids}
+
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def time_call(func, repeat=20):
+    """Run ``func`` ``repeat`` times and return ``(median_ms, p95_ms)``."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), percentile(samples, 0.95)
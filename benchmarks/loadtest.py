@@ -0,0 +1,550 @@
+"""
+Latency suite for every API endpoint on a realistically sized dataset.
+
+    python -m benchmarks.loadtest --tasks 100000 --members 10000 --output before.json
+
+seeds a scratch database first; ``manage.py seed_dataset`` and ``manage.py
+loadtest`` do the same against the configured one. Each endpoint gets
+``--requests`` requests from ``--concurrency`` in-process clients (threads
+driving ``django.test.Client`` through the full middleware stack), each
+authenticated as a different seeded user. Per endpoint the report has
+p50/p95/p99 latency, throughput, queries per request (counted on every
+connection, including the async views' worker threads), the peak Python
+allocation of a single request (``tracemalloc``, measured in a separate
+serial pass so it does not skew latency) and any non-2xx/3xx status codes.
+The output is JSON with sorted keys so runs can be diffed between releases.
+
+Write endpoints really write: run it against a scratch or seeded copy.
+"""
+import argparse
+import contextvars
+import fnmatch
+import itertools
+import json
+import random
+import resource
+import statistics
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+from .common import SEED_PASSWORD, percentile
+
+ENDPOINTS = {}
+
+
+class Call(NamedTuple):
+    method: str
+    path: str
+    data: object = None
+    content_type: str = None
+    headers: dict = None
+
+
+def endpoint(name):
+    """Register ``func(target, rng) -> Call`` as the request to time for ``name``."""
+    def register(func):
+        ENDPOINTS[name] = func
+        return func
+    return register
+
+
+def json_call(method, path, data):
+    return Call(method, path, json.dumps(data), 'application/json')
+
+
+def upload_file():
+    from django.core.files.uploadedfile import SimpleUploadedFile
+    return SimpleUploadedFile('loadtest.txt', b'load test attachment\n', content_type='text/plain')
+
+
+def new_user():
+    from django.contrib.auth import get_user_model
+    return get_user_model().objects.create_user(username=f'load-{uuid.uuid4().hex[:12]}', password='!')
+
+
+def task_payload(target, rng, index=0):
+    from django.utils import timezone
+    return {
+        'title': f'Load test task {index}',
+        'description': 'Created by the load test',
+        'project': rng.choice(target['project_ids']),
+        'due_date': timezone.now().isoformat(),
+    }
+
+
+@endpoint('auth.register')
+def auth_register(target, rng):
+    return json_call('post', '/api/auth/register/', {
+        'username': f'load-{uuid.uuid4().hex[:12]}', 'password': SEED_PASSWORD, 'email': 'load@example.com'
+    })
+
+
+@endpoint('auth.login')
+def auth_login(target, rng):
+    return json_call('post', '/api/auth/login/', {'username': target['username'], 'password': SEED_PASSWORD})
+
+
+@endpoint('auth.profile')
+def auth_profile(target, rng):
+    return Call('get', '/api/auth/profile/')
+
+
+@endpoint('auth.logout')
+def auth_logout(target, rng):
+    from django.contrib.auth import get_user_model
+    from accounts.roles import issue_tokens
+
+    # Logging out revokes the token, so use a fresh one.
+    token = issue_tokens(get_user_model().objects.get(pk=target['user_id'])).access_token
+    return Call('post', '/api/auth/logout/', headers={'Authorization': f'Bearer {token}'})
+
+
+@endpoint('dashboard')
+def dashboard(target, rng):
+    return Call('get', '/api/dashboard/')
+
+
+@endpoint('dashboard.async')
+def dashboard_async(target, rng):
+    return Call('get', '/api/async/dashboard/')
+
+
+@endpoint('projects.list')
+def project_list(target, rng):
+    return Call('get', '/api/projects/')
+
+
+@endpoint('projects.list.async')
+def project_list_async(target, rng):
+    return Call('get', '/api/async/projects/')
+
+
+@endpoint('projects.retrieve')
+def project_retrieve(target, rng):
+    return Call('get', f'/api/projects/{rng.choice(target["project_ids"])}/')
+
+
+@endpoint('projects.retrieve.async')
+def project_retrieve_async(target, rng):
+    return Call('get', f'/api/async/projects/{rng.choice(target["project_ids"])}/')
+
+
+@endpoint('projects.create')
+def project_create(target, rng):
+    return json_call('post', '/api/projects/', {
+        'name': 'Load test project', 'start_date': '2026-01-01', 'end_date': '2026-12-31'
+    })
+
+
+@endpoint('projects.update')
+def project_update(target, rng):
+    return json_call('patch', f'/api/projects/{rng.choice(target["project_ids"])}/', {
+        'description': f'Updated by the load test at {time.time()}'
+    })
+
+
+@endpoint('projects.add_member')
+def project_add_member(target, rng):
+    return json_call('post', f'/api/projects/{rng.choice(target["project_ids"])}/add_member/', {
+        'user_id': new_user().id
+    })
+
+
+@endpoint('projects.statistics')
+def project_statistics(target, rng):
+    return Call('get', f'/api/projects/{rng.choice(target["project_ids"])}/statistics/')
+
+
+@endpoint('tasks.list')
+def task_list(target, rng):
+    return Call('get', '/api/tasks/')
+
+
+@endpoint('tasks.list.sparse')
+def task_list_sparse(target, rng):
+    return Call('get', '/api/tasks/', {'fields': 'id,title,status,priority,updated_at'})
+
+
+@endpoint('tasks.list.async')
+def task_list_async(target, rng):
+    return Call('get', '/api/async/tasks/')
+
+
+@endpoint('tasks.retrieve')
+def task_retrieve(target, rng):
+    return Call('get', f'/api/tasks/{rng.choice(target["task_ids"])}/')
+
+
+@endpoint('tasks.retrieve.async')
+def task_retrieve_async(target, rng):
+    return Call('get', f'/api/async/tasks/{rng.choice(target["task_ids"])}/')
+
+
+@endpoint('tasks.create')
+def task_create(target, rng):
+    return json_call('post', '/api/tasks/', task_payload(target, rng))
+
+
+@endpoint('tasks.update')
+def task_update(target, rng):
+    from tasks.models import Task
+    return json_call('patch', f'/api/tasks/{rng.choice(target["task_ids"])}/', {
+        'status': rng.choice([choice for choice, _ in Task.STATUS_CHOICES])
+    })
+
+
+@endpoint('tasks.destroy')
+def task_destroy(target, rng):
+    from tasks.models import Task
+    task = Task.objects.create(created_by_id=target['user_id'], **{
+        key if key != 'project' else 'project_id': value for key, value in task_payload(target, rng).items()
+    })
+    return Call('delete', f'/api/tasks/{task.id}/')
+
+
+@endpoint('tasks.change_status')
+def task_change_status(target, rng):
+    from tasks.models import Task
+    return json_call('post', f'/api/tasks/{rng.choice(target["task_ids"])}/change_status/', {
+        'status': rng.choice([choice for choice, _ in Task.STATUS_CHOICES])
+    })
+
+
+@endpoint('tasks.bulk')
+def task_bulk(target, rng):
+    return json_call('post', '/api/tasks/bulk/', [task_payload(target, rng, index) for index in range(20)])
+
+
+@endpoint('tasks.bulk_status')
+def task_bulk_status(target, rng):
+    from tasks.models import Task
+    return json_call('post', '/api/tasks/bulk_status/', {
+        'status': rng.choice([choice for choice, _ in Task.STATUS_CHOICES]),
+        'ids': rng.sample(target['task_ids'], min(20, len(target['task_ids']))),
+    })
+
+
+@endpoint('tasks.search')
+def task_search(target, rng):
+    return Call('get', '/api/tasks/search/', {'q': f'task {rng.randint(0, 999)}'})
+
+
+@endpoint('tasks.history')
+def task_history(target, rng):
+    return Call('get', f'/api/tasks/{rng.choice(target["task_ids"])}/history/')
+
+
+@endpoint('tasks.comments')
+def task_comments(target, rng):
+    return Call('get', f'/api/tasks/{rng.choice(target["task_ids"])}/comments/')
+
+
+@endpoint('tasks.add_comment')
+def task_add_comment(target, rng):
+    return json_call('post', f'/api/tasks/{rng.choice(target["task_ids"])}/comments/', {
+        'content': 'Comment from the load test'
+    })
+
+
+@endpoint('tasks.attachments')
+def task_attachments(target, rng):
+    return Call('get', f'/api/tasks/{target["attachment_task_id"]}/attachments/')
+
+
+@endpoint('tasks.upload_attachment')
+def task_upload_attachment(target, rng):
+    return Call('post', f'/api/tasks/{rng.choice(target["task_ids"])}/attachments/', {'file': upload_file()})
+
+
+@endpoint('tasks.download_attachment')
+def task_download_attachment(target, rng):
+    return Call(
+        'get', f'/api/tasks/{target["attachment_task_id"]}/attachments/{target["attachment_id"]}/download/'
+    )
+
+
+@endpoint('tasks.export')
+def task_export(target, rng):
+    return Call('get', '/api/tasks/export/', {'format': 'ndjson'})
+
+
+@endpoint('tasks.export_history')
+def task_export_history(target, rng):
+    return Call('get', '/api/tasks/export/history/', {'format': 'csv'})
+
+
+class QueryCounter:
+    """Counts queries on every connection while its context is active."""
+    current = contextvars.ContextVar('loadtest_query_counter', default=None)
+
+    def __init__(self):
+        self.queries = 0
+
+    @classmethod
+    def wrapper(cls, execute, sql, params, many, context):
+        counter = cls.current.get()
+        if counter is not None:
+            counter.queries += 1
+        return execute(sql, params, many, context)
+
+    @classmethod
+    def install(cls, sender=None, connection=None, **kwargs):
+        if cls.wrapper not in connection.execute_wrappers:
+            connection.execute_wrappers.append(cls.wrapper)
+
+
+def build_targets(count, tasks_per_target=200):
+    """
+    One fixture per client: a seeded user with projects and visible tasks, an
+    access token and an attachment to list and download.
+    """
+    from django.contrib.auth import get_user_model
+    from django.test import Client
+    from accounts.roles import issue_tokens
+    from projects.models import ProjectMember
+    from tasks.models import TaskAccess
+
+    users = get_user_model().objects.filter(
+        username__startswith='bench-user-', profile__isnull=False, project_memberships__isnull=False
+    ).distinct().order_by('id')
+    targets = []
+    for user in users.iterator():
+        task_ids = list(TaskAccess.objects.filter(user_id=user.id).values_list('task_id', flat=True)[:tasks_per_target])
+        if not task_ids:
+            continue
+        token = issue_tokens(user).access_token
+        target = {
+            'user_id': user.id,
+            'username': user.username,
+            'headers': {'Authorization': f'Bearer {token}'},
+            'task_ids': task_ids,
+            'project_ids': list(
+                ProjectMember.objects.filter(user_id=user.id).values_list('project_id', flat=True)[:50]
+            ),
+            'attachment_task_id': task_ids[0],
+        }
+        response = Client(headers=target['headers']).post(
+            f'/api/tasks/{task_ids[0]}/attachments/', {'file': upload_file()}
+        )
+        if response.status_code != 201:
+            raise RuntimeError(f'Could not create the fixture attachment: {response.status_code}')
+        target['attachment_id'] = response.json()['id']
+        targets.append(target)
+        if len(targets) == count:
+            break
+    if not targets:
+        raise RuntimeError('No seeded users with visible tasks; run seed_dataset first.')
+    return targets
+
+
+def perform(client, target, call):
+    """Issue ``call`` as ``target`` and return ``(status_code, queries)``."""
+    counter = QueryCounter()
+    token = QueryCounter.current.set(counter)
+    try:
+        kwargs = {'headers': {**target['headers'], **(call.headers or {})}}
+        if call.content_type:
+            kwargs['content_type'] = call.content_type
+        response = getattr(client, call.method)(call.path, call.data, **kwargs)
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+        response.close()
+    finally:
+        QueryCounter.current.reset(token)
+    return response.status_code, counter.queries
+
+
+def run_endpoint(name, targets, requests, concurrency, memory_samples, seed):
+    from django.db import close_old_connections
+    from django.test import Client
+
+    build = ENDPOINTS[name]
+    local = threading.local()
+    sequence = itertools.count()
+
+    def one(_):
+        index = next(sequence)
+        if not hasattr(local, 'client'):
+            local.client = Client(raise_request_exception=False)
+        target = targets[index % len(targets)]
+        call = build(target, random.Random(f'{seed}:{name}:{index}'))
+        start = time.perf_counter()
+        status, queries = perform(local.client, target, call)
+        elapsed = (time.perf_counter() - start) * 1000
+        close_old_connections()
+        return elapsed, status, queries
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(requests)))
+    wall = time.perf_counter() - start
+
+    peak = 0
+    client = Client(raise_request_exception=False)
+    tracemalloc.start()
+    try:
+        for index in range(memory_samples):
+            target = targets[index % len(targets)]
+            call = build(target, random.Random(f'{seed}:{name}:memory:{index}'))
+            tracemalloc.reset_peak()
+            perform(client, target, call)
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+    finally:
+        tracemalloc.stop()
+
+    latencies = sorted(elapsed for elapsed, _, _ in results)
+    queries = [count for _, _, count in results]
+    failures = Counter(str(status) for _, status, _ in results if status >= 400)
+    return {
+        'requests': len(results),
+        'errors': sum(failures.values()),
+        'error_statuses': dict(failures),
+        'throughput_rps': round(len(results) / wall, 1),
+        'p50_ms': round(statistics.median(latencies), 3),
+        'p95_ms': round(percentile(latencies, 0.95), 3),
+        'p99_ms': round(percentile(latencies, 0.99), 3),
+        'queries_mean': round(statistics.mean(queries), 2),
+        'queries_max': max(queries),
+        'peak_alloc_kib': round(peak / 1024, 1),
+    }
+
+
+def dataset_summary():
+    from django.contrib.auth import get_user_model
+    from projects.models import Project, ProjectMember
+    from tasks.models import Task, TaskComment, TaskHistory
+
+    return {
+        'users': get_user_model().objects.count(),
+        'projects': Project.objects.count(),
+        'memberships': ProjectMember.objects.count(),
+        'tasks': Task.objects.count(),
+        'comments': TaskComment.objects.count(),
+        'history': TaskHistory.objects.count(),
+    }
+
+
+def run_loadtest(requests=200, concurrency=8, endpoints=None, memory_samples=5, seed=0, progress=None):
+    """
+    Run the suite against the configured database and return the report.
+    ``endpoints`` is a list of name patterns (``fnmatch``); all by default.
+    """
+    import logging
+    import tempfile
+    from django.db import connections
+    from django.db.backends.signals import connection_created
+    from django.test.utils import override_settings
+
+    names = [
+        name for name in ENDPOINTS
+        if not endpoints or any(fnmatch.fnmatch(name, pattern) for pattern in endpoints)
+    ]
+    if not names:
+        raise ValueError('No endpoint matches the given patterns.')
+
+    # Errors are reported per endpoint rather than logged per request.
+    logging.disable(logging.ERROR)
+    connection_created.connect(QueryCounter.install)
+    connections.close_all()
+    media = tempfile.TemporaryDirectory(prefix='loadtest-media-')
+    try:
+        with override_settings(MEDIA_ROOT=media.name):
+            targets = build_targets(concurrency)
+            report = {
+                'dataset': dataset_summary(),
+                'config': {
+                    'requests': requests,
+                    'concurrency': concurrency,
+                    'clients': len(targets),
+                    'memory_samples': memory_samples,
+                    'seed': seed,
+                },
+                'endpoints': {},
+            }
+            for name in names:
+                if progress:
+                    progress(name)
+                report['endpoints'][name] = run_endpoint(
+                    name, targets, requests, concurrency, memory_samples, seed
+                )
+    finally:
+        connection_created.disconnect(QueryCounter.install)
+        logging.disable(logging.NOTSET)
+        media.cleanup()
+    report['max_rss_kib'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return report
+
+
+def add_seed_arguments(parser):
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--projects', type=int, default=50)
+    parser.add_argument('--members', type=int, default=100, help='Members per project.')
+    parser.add_argument('--tasks', type=int, default=20000)
+    parser.add_argument('--comments', type=int, default=2, help='Comments per task.')
+    parser.add_argument('--history', type=int, default=2, help='History entries per task.')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed of the dataset and requests.')
+
+
+def add_run_arguments(parser):
+    parser.add_argument('--requests', type=int, default=200, help='Requests per endpoint.')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--endpoints', nargs='*', help='Endpoint name patterns, e.g. "tasks.*".')
+    parser.add_argument('--memory-samples', type=int, default=5, help='Serial requests traced for peak memory.')
+    parser.add_argument('--output', help='Write the JSON report here instead of stdout.')
+
+
+def write_report(report, output=None, stdout=None):
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if output:
+        with open(output, 'w') as handle:
+            handle.write(text + '\n')
+    else:
+        (stdout.write if stdout else print)(text)
+
+
+def main():
+    import os
+    import sys
+    from .common import migrate, seed_dataset, setup_django
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    add_seed_arguments(parser)
+    add_run_arguments(parser)
+    args = parser.parse_args()
+
+    db_path = setup_django()
+    try:
+        migrate()
+        seed_dataset(
+            users=args.users,
+            projects=args.projects,
+            members_per_project=args.members,
+            tasks=args.tasks,
+            history_per_task=args.history,
+            comments_per_task=args.comments,
+            search_index=True,
+            seed=args.seed
+        )
+        report = run_loadtest(
+            requests=args.requests,
+            concurrency=args.concurrency,
+            endpoints=args.endpoints,
+            memory_samples=args.memory_samples,
+            seed=args.seed,
+            progress=lambda name: print(f'.. {name}', file=sys.stderr)
+        )
+    finally:
+        for suffix in ('', '-wal', '-shm', '-journal'):
+            if os.path.exists(db_path + suffix):
+                os.unlink(db_path + suffix)
+    write_report(report, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""
+Compare query plans and timings of the hot task queries with and without the
+composite indexes added in ``tasks.0004_task_indexes``.
+
+    python -m benchmarks.query_plans --tasks 100000
+
+The dataset is seeded once into a scratch SQLite file; the index migration is
+then unapplied and re-applied so both runs see identical data.
+"""
+import argparse
+import json
+import os
+
+from .common import migrate, seed_dataset, setup_django, time_call
+
+INDEX_MIGRATION = ('tasks', '0004_task_indexes')
+BEFORE_INDEX_MIGRATION = ('tasks', '0003_taskaccess')
+
+
+def hot_queries(fixtures):
+    """The querysets issued by the task, dashboard and project views."""
+    from datetime import timedelta
+    from django.db.models import Count, Q
+    from django.contrib.auth import get_user_model
+    from django.utils import timezone
+    from tasks.access import visible_tasks
+    from tasks.models import Task, TaskHistory
+
+    user = get_user_model().objects.get(id=fixtures['user_ids'][0])
+    project_id = fixtures['project_ids'][0]
+    task_id = fixtures['task_ids'][len(fixtures['task_ids']) // 2]
+    now = timezone.now()
+    tasks = visible_tasks(user)
+
+    return {
+        'task_list_page': lambda: list(tasks.order_by('-updated_at', '-id')[:50]),
+        'dashboard_stats': lambda: tasks.aggregate(
+            total=Count('id'),
+            todo=Count('id', filter=Q(status=Task.STATUS_TODO)),
+            in_progress=Count('id', filter=Q(status=Task.STATUS_IN_PROGRESS)),
+            completed=Count('id', filter=Q(status=Task.STATUS_COMPLETED))
+        ),
+        'dashboard_recent': lambda: list(tasks.order_by('-updated_at')[:5]),
+        'dashboard_urgent': lambda: list(tasks.order_by('-updated_at').filter(
+            priority=Task.PRIORITY_HIGH, status__in=Task.OPEN_STATUSES
+        )[:5]),
+        'urgent_all_projects': lambda: list(Task.objects.order_by('-updated_at').filter(
+            priority=Task.PRIORITY_HIGH, status__in=Task.OPEN_STATUSES
+        )[:50]),
+        'assignee_by_status': lambda: list(Task.objects.filter(
+            assigned_to=user, status=Task.STATUS_IN_PROGRESS
+        )),
+        'open_due_this_week': lambda: Task.objects.filter(
+            status__in=Task.OPEN_STATUSES,
+            due_date__range=(now, now + timedelta(days=7))
+        ).count(),
+        'project_status_count': lambda: Task.objects.filter(
+            project_id=project_id, status=Task.STATUS_TODO
+        ).count(),
+        'recent_all_tasks': lambda: list(Task.objects.order_by('-updated_at', '-id')[:50]),
+        'history_page': lambda: list(TaskHistory.objects.filter(task_id=task_id).order_by(
+            '-changed_at', '-id'
+        )[:50]),
+    }
+
+
+def explain(func):
+    """Capture the SQLite plan of the single query a callable issues."""
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    with CaptureQueriesContext(connection) as context:
+        func()
+    sql = context.captured_queries[-1]['sql']
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def measure(fixtures, repeat):
+    from django.db import connection
+
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    results = {}
+    for name, func in hot_queries(fixtures).items():
+        func()
+        median, p95 = time_call(func, repeat)
+        results[name] = {'plan': explain(func), 'median_ms': round(median, 3), 'p95_ms': round(p95, 3)}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--projects', type=int, default=100)
+    parser.add_argument('--members', type=int, default=20)
+    parser.add_argument('--tasks', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--json', action='store_true', help='Emit machine-readable output.')
+    args = parser.parse_args()
+
+    db_path = setup_django()
+    try:
+        migrate()
+        fixtures = seed_dataset(
+            users=args.users,
+            projects=args.projects,
+            members_per_project=args.members,
+            tasks=args.tasks
+        )
+        migrate(*BEFORE_INDEX_MIGRATION)
+        before = measure(fixtures, args.repeat)
+        migrate(*INDEX_MIGRATION)
+        after = measure(fixtures, args.repeat)
+    finally:
+        os.unlink(db_path)
+
+    if args.json:
+        print(json.dumps({'before': before, 'after': after}, indent=2))
+        return
+
+    for name in before:
+        print(f'== {name}')
+        for label, result in (('before', before[name]), ('after', after[name])):
+            print(f'  {label:<6} median {result["median_ms"]:>9.3f} ms   p95 {result["p95_ms"]:>9.3f} ms')
+            for step in result['plan']:
+                print(f'           {step}')
+
+
+if __name__ == '__main__':
+    main()
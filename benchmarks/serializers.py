@@ -0,0 +1,114 @@
+"""
+Compare rows/sec of the DRF serializer path and the values-based fast path
+for the task list, project list and dashboard task overview.
+
+    python -m benchmarks.serializers --tasks 20000 --rows 1000
+
+Both paths serialize the same rows of the same dataset; each is timed for
+serialization alone and for serialization plus JSON rendering (stdlib
+``JSONRenderer`` for the DRF path, ``FastJSONRenderer`` for the fast path).
+"""
+import argparse
+import json
+import os
+
+from .common import migrate, seed_dataset, setup_django, time_call
+
+
+def paths(fixtures, rows):
+    """``{name: (drf_serialize, fast_serialize)}`` over ``rows`` rows each."""
+    from django.contrib.auth import get_user_model
+    from dashboard.serializers import TaskOverviewSerializer, TaskOverviewValuesSerializer
+    from projects.serializers import ProjectSerializer, ProjectValuesSerializer
+    from projects.views import project_read_queryset
+    from projects.models import Project
+    from tasks.access import visible_tasks
+    from tasks.models import Task, TaskComment
+    from tasks.serializers import TaskSerializer, TaskValuesSerializer
+    from tasks.views import task_read_queryset
+
+    user = get_user_model().objects.get(id=fixtures['user_ids'][0])
+    ordering = ('-updated_at', '-id')
+    # Give some tasks comments so latest_comment is exercised.
+    task_ids = list(visible_tasks(user).order_by(*ordering).values_list('id', flat=True)[:rows:3])
+    TaskComment.objects.bulk_create([
+        TaskComment(task_id=task_id, author=user, content='Benchmark comment') for task_id in task_ids
+    ])
+    projects = Project.objects.order_by(*ordering)
+    return {
+        'task_list': (
+            lambda: TaskSerializer(task_read_queryset(user).order_by(*ordering)[:rows], many=True).data,
+            lambda: TaskValuesSerializer().serialize(visible_tasks(user).order_by(*ordering)[:rows]),
+        ),
+        'project_list': (
+            lambda: ProjectSerializer(project_read_queryset(user).order_by(*ordering)[:rows], many=True).data,
+            lambda: ProjectValuesSerializer().serialize(projects.filter(access__user_id=user.id)[:rows]),
+        ),
+        'task_overview': (
+            lambda: TaskOverviewSerializer(
+                Task.objects.select_related('project').order_by(*ordering)[:rows], many=True
+            ).data,
+            lambda: TaskOverviewValuesSerializer().serialize(Task.objects.order_by(*ordering)[:rows]),
+        ),
+    }
+
+
+def measure(func, renderer, repeat):
+    count = len(func())
+    median, _ = time_call(func, repeat)
+    end_to_end, _ = time_call(lambda: renderer.render(func()), repeat)
+    return {
+        'rows': count,
+        'serialize_rows_per_sec': round(count / (median / 1000)),
+        'render_rows_per_sec': round(count / (end_to_end / 1000)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--projects', type=int, default=500)
+    parser.add_argument('--members', type=int, default=20)
+    parser.add_argument('--tasks', type=int, default=20000)
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--json', action='store_true', help='Emit machine-readable output.')
+    args = parser.parse_args()
+
+    db_path = setup_django()
+    try:
+        from rest_framework.renderers import JSONRenderer
+        from task_management.renderers import FastJSONRenderer
+
+        migrate()
+        fixtures = seed_dataset(
+            users=args.users,
+            projects=args.projects,
+            members_per_project=args.members,
+            tasks=args.tasks
+        )
+        results = {}
+        for name, (drf, fast) in paths(fixtures, args.rows).items():
+            results[name] = {
+                'drf': measure(drf, JSONRenderer(), args.repeat),
+                'values': measure(fast, FastJSONRenderer(), args.repeat),
+            }
+    finally:
+        os.unlink(db_path)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    for name, result in results.items():
+        print(f'== {name} ({result["drf"]["rows"]} rows)')
+        for label in ('drf', 'values'):
+            stats = result[label]
+            print(
+                f'  {label:<6} serialize {stats["serialize_rows_per_sec"]:>9} rows/s   '
+                f'serialize+render {stats["render_rows_per_sec"]:>9} rows/s'
+            )
+
+
+if __name__ == '__main__':
+    main()
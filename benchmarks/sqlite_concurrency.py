@@ -0,0 +1,189 @@
+"""
+Measure throughput of the task API under mixed read/write load for the
+default SQLite setup and the tuned profile in settings.
+
+    python -m benchmarks.sqlite_concurrency --tasks 20000 --readers 8 --writers 4
+
+Every client is a separate process (SQLite locks are per connection, and
+threads would mostly measure the GIL) driving ``django.test.Client`` for
+``--duration`` seconds. Readers list and fetch tasks; writers alternate
+status updates and new comments. Connections are closed or kept after each
+request exactly as the WSGI handler would, so ``CONN_MAX_AGE`` is measured
+too. Failed requests (typically "database is locked") are counted, not
+retried.
+
+The ``baseline`` profile is Django's default: rollback journal, deferred
+transactions, a 5 second busy timeout and a connection per request.
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import random
+import statistics
+import time
+
+from .common import migrate, percentile, seed_dataset, setup_django
+
+PROFILES = ('baseline', 'tuned')
+
+
+def apply_profile(name, tuned):
+    """Point the default connection at ``name``'s settings (in place) and reconnect."""
+    from django.db import connection
+
+    connection.close()
+    settings_dict = connection.settings_dict
+    if name == 'baseline':
+        settings_dict.update(CONN_MAX_AGE=0, CONN_HEALTH_CHECKS=False, OPTIONS={})
+    else:
+        settings_dict.update(tuned)
+    # The journal mode is stored in the database file, so switch it explicitly.
+    with connection.cursor() as cursor:
+        cursor.execute(f'PRAGMA journal_mode={"DELETE" if name == "baseline" else "WAL"}')
+    connection.close()
+
+
+def build_clients(fixtures, count):
+    """One (access token, visible task ids) pair per client."""
+    from django.contrib.auth import get_user_model
+    from accounts.roles import issue_tokens
+    from tasks.models import TaskAccess
+
+    visible = {}
+    for user_id, task_id in TaskAccess.objects.filter(
+            user_id__in=fixtures['user_ids']).values_list('user_id', 'task_id').iterator():
+        visible.setdefault(user_id, []).append(task_id)
+    users = get_user_model().objects.filter(id__in=list(visible)[:count])
+    clients = [(str(issue_tokens(user).access_token), visible[user.id][:200]) for user in users]
+    return [clients[index % len(clients)] for index in range(count)]
+
+
+def run_client(role, token, task_ids, deadline, seed):
+    """Issue requests until ``deadline``; return ``(latencies_ms, errors)``."""
+    from django.db import close_old_connections
+    from django.test import Client
+    from tasks.models import Task
+
+    logging.disable(logging.CRITICAL)
+    rng = random.Random(seed)
+    client = Client(raise_request_exception=False, headers={'Authorization': f'Bearer {token}'})
+    statuses = [choice for choice, _ in Task.STATUS_CHOICES]
+    samples, errors, step = [], 0, 0
+    while time.time() < deadline:
+        task_id = rng.choice(task_ids)
+        start = time.perf_counter()
+        if role == 'reader' and step % 2:
+            response = client.get(f'/api/tasks/{task_id}/')
+        elif role == 'reader':
+            response = client.get('/api/tasks/', {'page_size': 20})
+        elif step % 2:
+            response = client.post(f'/api/tasks/{task_id}/comments/', {'content': 'Benchmark comment'})
+        else:
+            response = client.patch(
+                f'/api/tasks/{task_id}/', {'status': rng.choice(statuses)}, content_type='application/json'
+            )
+        elapsed = (time.perf_counter() - start) * 1000
+        # The test client keeps connections open; do what the WSGI handler does.
+        close_old_connections()
+        if response.status_code < 400:
+            samples.append(elapsed)
+        else:
+            errors += 1
+        step += 1
+    return samples, errors
+
+
+def summarize(samples, errors, elapsed):
+    samples.sort()
+    return {
+        'requests': len(samples),
+        'errors': errors,
+        'throughput_rps': round(len(samples) / elapsed, 1),
+        'p50_ms': round(statistics.median(samples), 3) if samples else None,
+        'p99_ms': round(percentile(samples, 0.99), 3) if samples else None,
+    }
+
+
+def run_profile(clients, readers, duration):
+    from django.db import connections
+
+    connections.close_all()
+    deadline = time.time() + duration
+    roles = ['reader'] * readers + ['writer'] * (len(clients) - readers)
+    context = multiprocessing.get_context('fork')
+    with context.Pool(len(clients)) as pool:
+        results = pool.starmap(
+            run_client,
+            [
+                (role, token, task_ids, deadline, index)
+                for index, (role, (token, task_ids)) in enumerate(zip(roles, clients))
+            ]
+        )
+    stats = {}
+    for role in ('reader', 'writer'):
+        samples = [sample for (latencies, _), kind in zip(results, roles) if kind == role for sample in latencies]
+        errors = sum(count for (_, count), kind in zip(results, roles) if kind == role)
+        stats[f'{role}s'] = summarize(samples, errors, duration)
+    stats['total_rps'] = round(stats['readers']['throughput_rps'] + stats['writers']['throughput_rps'], 1)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--projects', type=int, default=50)
+    parser.add_argument('--members', type=int, default=20)
+    parser.add_argument('--tasks', type=int, default=20000)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds per profile.')
+    parser.add_argument('--profile', choices=[*PROFILES, 'both'], default='both')
+    parser.add_argument('--json', action='store_true', help='Emit machine-readable output.')
+    args = parser.parse_args()
+
+    db_path = setup_django()
+    from django.conf import settings
+
+    tuned = {
+        key: settings.DATABASES['default'][key] for key in ('CONN_MAX_AGE', 'CONN_HEALTH_CHECKS', 'OPTIONS')
+    }
+    try:
+        migrate()
+        fixtures = seed_dataset(
+            users=args.users,
+            projects=args.projects,
+            members_per_project=args.members,
+            tasks=args.tasks
+        )
+        clients = build_clients(fixtures, args.readers + args.writers)
+        results = {}
+        for name in PROFILES if args.profile == 'both' else (args.profile,):
+            apply_profile(name, tuned)
+            results[name] = run_profile(clients, args.readers, args.duration)
+    finally:
+        for suffix in ('', '-wal', '-shm', '-journal'):
+            if os.path.exists(db_path + suffix):
+                os.unlink(db_path + suffix)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f'{args.readers} readers, {args.writers} writers, {args.duration:g}s per profile')
+    for name, result in results.items():
+        print(f'== {name}: {result["total_rps"]:.1f} req/s')
+        for role in ('readers', 'writers'):
+            stats = result[role]
+            if not stats['requests']:
+                print(f'  {role:<8} no successful requests, {stats["errors"]} errors')
+                continue
+            print(
+                f'  {role:<8} {stats["throughput_rps"]:>8.1f} req/s   p50 {stats["p50_ms"]:>9.3f} ms   '
+                f'p99 {stats["p99_ms"]:>9.3f} ms   {stats["errors"]} errors'
+            )
+
+
+if __name__ == '__main__':
+    main()
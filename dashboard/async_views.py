@@ -0,0 +1,37 @@
+import asyncio
+from django.conf import settings
+from django.core.cache import cache
+from task_management.async_support import AsyncAPIView, json_response, run_sync
+from task_management.conditional import request_user_version
+from task_management.replicas import read_replica
+from .views import DASHBOARD_CACHE_KEY, dashboard_queries, dashboard_validators
+
+
+class DashboardAsyncView(AsyncAPIView):
+    """
+    Async variant of ``GET /api/dashboard/``; on a cache miss its queries run
+    concurrently on the sync pool.
+    """
+
+    async def get(self, request):
+        snapshot = await self.cached_snapshot(request)
+
+        async def build():
+            return json_response(snapshot['data'])
+
+        return await self.conditional(request, snapshot['parts'], snapshot['last_modified'], build)
+
+    async def cached_snapshot(self, request):
+        user = request.user
+        version = await run_sync(request_user_version, request)
+        cache_key = DASHBOARD_CACHE_KEY.format(user_id=user.id, version=version)
+        snapshot = await cache.aget(cache_key)
+        if snapshot is None:
+            queries = dashboard_queries(user)
+            (parts, last_modified), *results = await asyncio.gather(
+                run_sync(dashboard_validators, user), *(run_sync(query) for query in queries.values())
+            )
+            snapshot = {'parts': parts, 'last_modified': last_modified, 'data': dict(zip(queries, results))}
+            if not read_replica():
+                await cache.aset(cache_key, snapshot, settings.DASHBOARD_CACHE_TIMEOUT)
+        return snapshot
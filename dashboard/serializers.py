@@ -1,6 +1,6 @@
 from rest_framework import serializers
+from task_management.values import ValuesSerializer
 from tasks.models import Task
-from projects.models import Project
 
 class TaskOverviewSerializer(serializers.ModelSerializer):
     project_name = serializers.CharField(source='project.name')
@@ -12,8 +12,13 @@ class TaskOverviewSerializer(serializers.ModelSerializer):
             'due_date', 'project_name'
         ]
 
-class DashboardSerializer(serializers.Serializer):
-    projects_count = serializers.IntegerField()
-    task_stats = serializers.DictField()
-    recent_tasks = TaskOverviewSerializer(many=True)
-    urgent_tasks = TaskOverviewSerializer(many=True)
+class TaskOverviewValuesSerializer(ValuesSerializer):
+    serializer_class = TaskOverviewSerializer
+    fields = {
+        'id': 'id',
+        'title': 'title',
+        'status': 'status',
+        'priority': 'priority',
+        'due_date': 'due_date',
+        'project_name': 'project__name',
+    }
@@ -1,12 +1,17 @@
+from datetime import timedelta
+from django.core.cache import cache
+from django.test import override_settings
 from django.utils import timezone
 from rest_framework.test import APITestCase
 from rest_framework import status as http_status
 from tests.test_utils import TestCaseWithSetup
+from accounts.roles import issue_tokens
 from tasks.models import Task
-from projects.models import Project
+from projects.models import Project, ProjectMember
 
 class DashboardAPITests(APITestCase, TestCaseWithSetup):
     def setUp(self):
+        cache.clear()
         self.user = self.create_test_user('testuser1')
         self.other_user = self.create_test_user('testuser2')
         self.client.force_authenticate(user=self.user)
@@ -105,3 +110,103 @@ class DashboardAPITests(APITestCase, TestCaseWithSetup):
             task['title'] for task in response.data['recent_tasks']
         ]
         self.assertNotIn('Other User Task', task_titles)
+
+    def test_dashboard_stats_use_single_aggregate(self):
+        # The validators (visibility version and task aggregate) plus the four
+        # dashboard queries.
+        with self.assertNumQueries(6):
+            self.client.get('/api/dashboard/')
+
+    def test_dashboard_is_served_from_cache(self):
+        first = self.client.get('/api/dashboard/')
+        # Only the visibility version; the validators are cached with the payload.
+        with self.assertNumQueries(1):
+            second = self.client.get('/api/dashboard/')
+        self.assertEqual(first.data, second.data)
+
+    def test_dashboard_cache_invalidated_by_task_change(self):
+        self.client.get('/api/dashboard/')
+        task = Task.objects.filter(status=Task.STATUS_TODO).first()
+        with self.captureOnCommitCallbacks(execute=True):
+            task.status = Task.STATUS_COMPLETED
+            task.save()
+        response = self.client.get('/api/dashboard/')
+        self.assertEqual(response.data['task_stats']['todo'], 2)
+        self.assertEqual(response.data['task_stats']['completed'], 4)
+
+    def test_dashboard_cache_invalidated_by_membership(self):
+        other_project = self.create_test_project(self.other_user)
+        Task.objects.create(
+            title='Shared Task',
+            description='Test Description',
+            project=other_project,
+            created_by=self.other_user,
+            due_date=timezone.now()
+        )
+        self.client.get('/api/dashboard/')
+        with self.captureOnCommitCallbacks(execute=True):
+            ProjectMember.objects.create(project=other_project, user=self.user)
+        response = self.client.get('/api/dashboard/')
+        self.assertEqual(response.data['projects_count'], 2)
+        self.assertEqual(response.data['task_stats']['total'], 10)
+
+    def test_dashboard_cache_kept_for_unrelated_changes(self):
+        self.client.get('/api/dashboard/')
+        other_project = self.create_test_project(self.other_user)
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.create(
+                title='Other User Task',
+                description='Test Description',
+                project=other_project,
+                created_by=self.other_user,
+                due_date=timezone.now()
+            )
+        with self.assertNumQueries(1):
+            self.client.get('/api/dashboard/')
+
+    def test_dashboard_not_modified(self):
+        etag = self.client.get('/api/dashboard/')['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/dashboard/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, http_status.HTTP_304_NOT_MODIFIED)
+
+        task = Task.objects.first()
+        with self.captureOnCommitCallbacks(execute=True):
+            task.delete()
+        response = self.client.get('/api/dashboard/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, http_status.HTTP_200_OK)
+        self.assertEqual(response.data['task_stats']['total'], 8)
+
+    def test_dashboard_etag_follows_unsignalled_task_writes(self):
+        etag = self.client.get('/api/dashboard/')['ETag']
+        # Queryset updates bypass the signals that bump the visibility version,
+        # so they show once the snapshot (and the validators cached with it) expires.
+        Task.objects.filter(id=Task.objects.first().id).update(updated_at=timezone.now() + timedelta(minutes=1))
+        response = self.client.get('/api/dashboard/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, http_status.HTTP_304_NOT_MODIFIED)
+        cache.clear()
+        response = self.client.get('/api/dashboard/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, http_status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    @override_settings(ASYNC_SYNC_WORKERS=0)
+    def test_async_dashboard_matches_sync(self):
+        token = issue_tokens(self.user).access_token
+        expected = self.client.get('/api/dashboard/').json()
+        cache.clear()
+        self.client.force_authenticate(user=None)
+
+        response = self.client.get('/api/async/dashboard/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(response.status_code, http_status.HTTP_200_OK)
+        self.assertEqual(response.json(), expected)
+
+        response = self.client.get(
+            '/api/async/dashboard/', HTTP_AUTHORIZATION=f'Bearer {token}', HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, http_status.HTTP_304_NOT_MODIFIED)
+
+    def test_async_dashboard_requires_token(self):
+        self.client.force_authenticate(user=None)
+        response = self.client.get('/api/async/dashboard/')
+        self.assertEqual(response.status_code, http_status.HTTP_401_UNAUTHORIZED)
+        self.assertIn('WWW-Authenticate', response)
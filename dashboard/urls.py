@@ -1,10 +1,12 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from .async_views import DashboardAsyncView
 from .views import DashboardViewSet
 
 router = DefaultRouter()
 router.register(r'dashboard', DashboardViewSet, basename='dashboard')
 
 urlpatterns = [
+    path('async/dashboard/', DashboardAsyncView.as_view(), name='dashboard-async'),
     path('', include(router.urls)),
 ]
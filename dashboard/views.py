@@ -1,42 +1,80 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
 from rest_framework import viewsets, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Count, Q
-from projects.models import Project
+from accounts.authentication import StatelessJWTAuthentication
+from projects.models import ProjectAccess
+from task_management.conditional import conditional_aggregates, conditional_response, request_user_version
+from task_management.replicas import primary_reads, read_replica
+from tasks.access import visible_tasks
 from tasks.models import Task
-from .serializers import DashboardSerializer
+from .serializers import TaskOverviewValuesSerializer
+
+DASHBOARD_CACHE_KEY = 'dashboard:{user_id}:{version}'
 
 class DashboardViewSet(viewsets.ViewSet):
+    authentication_classes = [StatelessJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def list(self, request):
+        snapshot = self.cached_snapshot(request)
+        return conditional_response(
+            request, snapshot['parts'], snapshot['last_modified'], lambda: Response(snapshot['data'])
+        )
+
+    def cached_snapshot(self, request):
+        """
+        The dashboard with its validators, cached together under the user's
+        visibility version so a hit (or a 304) costs only the version lookup.
+        """
         user = request.user
-        projects_count = Project.objects.filter(
-            Q(created_by=user) | Q(members__user=user)
-        ).distinct().count()
-
-        tasks = Task.objects.filter(
-            Q(created_by=user) | Q(assigned_to=user)
-        ).distinct()
-
-        task_stats = {
-            'total': tasks.count(),
-            'todo': tasks.filter(status=Task.STATUS_TODO).count(),
-            'in_progress': tasks.filter(status=Task.STATUS_IN_PROGRESS).count(),
-            'completed': tasks.filter(status=Task.STATUS_COMPLETED).count()
-        }
-
-        recent_tasks = tasks.order_by('-updated_at')[:5]
-        urgent_tasks = tasks.filter(
+        cache_key = DASHBOARD_CACHE_KEY.format(
+            user_id=user.id,
+            version=request_user_version(request)
+        )
+        snapshot = cache.get(cache_key)
+        if snapshot is None:
+            parts, last_modified = dashboard_validators(user)
+            snapshot = {'parts': parts, 'last_modified': last_modified, 'data': self.build_dashboard(user)}
+            if not read_replica():
+                # The key names the primary's version; a replica may be behind it.
+                cache.set(cache_key, snapshot, settings.DASHBOARD_CACHE_TIMEOUT)
+        return snapshot
+
+    def build_dashboard(self, user):
+        return {name: query() for name, query in dashboard_queries(user).items()}
+
+
+def dashboard_validators(user):
+    """
+    Return the ``(parts, last_modified)`` validators of ``user``'s dashboard.
+    Alongside the visibility version they cover the visible tasks themselves,
+    so task writes that skip the version bump (queryset updates) still show
+    once the cached snapshot they are stored with expires.
+    """
+    with primary_reads():
+        state = visible_tasks(user).aggregate(**conditional_aggregates())
+    last_modified = state.pop('last_modified')
+    return sorted(state.items()), last_modified
+
+
+def dashboard_queries(user):
+    """The dashboard's independent queries, as zero-argument callables."""
+    tasks = visible_tasks(user)
+    overview = TaskOverviewValuesSerializer()
+    return {
+        'projects_count': ProjectAccess.objects.filter(user_id=user.id).count,
+        'task_stats': lambda: tasks.aggregate(
+            total=Count('id'),
+            todo=Count('id', filter=Q(status=Task.STATUS_TODO)),
+            in_progress=Count('id', filter=Q(status=Task.STATUS_IN_PROGRESS)),
+            completed=Count('id', filter=Q(status=Task.STATUS_COMPLETED))
+        ),
+        'recent_tasks': lambda: overview.serialize(tasks.order_by('-updated_at')[:5]),
+        'urgent_tasks': lambda: overview.serialize(tasks.order_by('-updated_at').filter(
             priority=Task.PRIORITY_HIGH,
-            status__in=[Task.STATUS_TODO, Task.STATUS_IN_PROGRESS]
-        )[:5]
-
-        data = {
-            'projects_count': projects_count,
-            'task_stats': task_stats,
-            'recent_tasks': recent_tasks,
-            'urgent_tasks': urgent_tasks
-        }
-        serializer = DashboardSerializer(data)
-        return Response(serializer.data)
+            status__in=Task.OPEN_STATUSES
+        )[:5]),
+    }
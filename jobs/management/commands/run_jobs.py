@@ -0,0 +1,70 @@
+import signal
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, close_old_connections
+from jobs.queue import claim_jobs, new_worker_id, release_jobs, run_job
+
+
+class Command(BaseCommand):
+    help = (
+        'Run queued background jobs. Start as many worker processes as needed; '
+        'they coordinate through the jobs table.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Run the jobs that are due now and exit instead of polling.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.JOBS_BATCH_SIZE,
+            help='Jobs leased per claim.'
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=settings.JOBS_POLL_INTERVAL,
+            help='Seconds to sleep when no job is due.'
+        )
+        parser.add_argument(
+            '--max-jobs', type=int, default=None,
+            help='Exit after attempting this many jobs.'
+        )
+
+    def handle(self, *args, **options):
+        worker_id = new_worker_id()
+        max_jobs = options['max_jobs']
+        self.stopping = False
+        if not options['once']:
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                signal.signal(signum, self.stop)
+
+        attempted = completed = 0
+        while not self.stopping:
+            close_old_connections()
+            batch_size = options['batch_size']
+            if max_jobs is not None:
+                batch_size = min(batch_size, max_jobs - attempted)
+            try:
+                jobs = claim_jobs(worker_id, batch_size)
+            except DatabaseError as exc:
+                # e.g. SQLite busy with another writer; try again after a pause.
+                self.stderr.write(f'Claiming jobs failed: {exc}')
+                jobs = []
+            if not jobs:
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+                continue
+            for index, job in enumerate(jobs):
+                if self.stopping:
+                    release_jobs(jobs[index:])
+                    break
+                attempted += 1
+                completed += run_job(job)
+            if max_jobs is not None and attempted >= max_jobs:
+                break
+        self.stdout.write(f'Worker {worker_id}: {completed} of {attempted} job(s) completed.')
+
+    def stop(self, signum, frame):
+        # Finish the job in progress, then exit.
+        self.stopping = True
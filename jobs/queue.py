@@ -0,0 +1,158 @@
+"""
+Database-backed job queue.
+
+``enqueue`` inserts a row in the caller's transaction, so a job becomes
+visible to workers exactly when the change that produced it commits (and
+vanishes with it on rollback). Workers (``manage.py run_jobs``) claim due
+jobs by stamping them with a lease: a conditional UPDATE that only matches
+rows still claimable, so concurrent workers in any number of processes never
+run the same job twice while its lease holds. On PostgreSQL candidates are
+picked with ``SKIP LOCKED``; SQLite serializes the UPDATEs itself.
+
+A job's handler runs in one transaction with the deletion of its row, so
+handlers that only touch the database take effect exactly once: if the lease
+expired and another worker took the job over, the deletion matches nothing
+and the handler's writes are rolled back. Failures are retried with
+exponential backoff until ``max_attempts``, then kept as ``failed`` for
+inspection. Jobs whose worker died are picked up again once their lease runs
+out.
+"""
+import logging
+import os
+import random
+import socket
+import traceback
+from contextlib import nullcontext
+from datetime import timedelta
+from uuid import uuid4
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+_handlers = {}
+
+
+class LeaseLost(Exception):
+    """The job was taken over by another worker while it ran."""
+
+
+def register(name):
+    """Register the decorated function as the handler of jobs called ``name``."""
+    def decorator(func):
+        if name in _handlers and _handlers[name] is not func:
+            raise ValueError(f'Job handler {name!r} is already registered')
+        _handlers[name] = func
+        return func
+    return decorator
+
+
+def enqueue(name, delay=None, max_attempts=None, **payload):
+    """
+    Queue ``name`` to run with ``payload`` as keyword arguments. The payload
+    must be JSON serializable (dates and decimals are stored as strings).
+    """
+    if name not in _handlers:
+        raise ValueError(f'Unknown job {name!r}')
+    return Job.objects.create(
+        name=name,
+        payload=payload,
+        run_at=timezone.now() + (delay or timedelta()),
+        max_attempts=max_attempts or settings.JOBS_MAX_ATTEMPTS
+    )
+
+
+def new_worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}'
+
+
+def claimable(now):
+    return (
+        Q(status=Job.STATUS_QUEUED, run_at__lte=now) |
+        Q(status=Job.STATUS_RUNNING, locked_until__lt=now)
+    )
+
+
+def claim_jobs(worker_id, limit):
+    """Lease up to ``limit`` due jobs to ``worker_id`` and return them."""
+    now = timezone.now()
+    candidates = Job.objects.filter(claimable(now)).order_by('run_at', 'id')
+    skip_locked = connection.features.has_select_for_update_skip_locked
+    token = f'{worker_id}:{uuid4().hex[:8]}'
+    # Without SKIP LOCKED (SQLite) the SELECT stays outside a transaction, so
+    # polling an idle queue never takes the database's single write lock.
+    with transaction.atomic() if skip_locked else nullcontext():
+        if skip_locked:
+            candidates = candidates.select_for_update(skip_locked=True)
+        ids = list(candidates.values_list('id', flat=True)[:limit])
+        if not ids:
+            return []
+        # Re-checking the claimable condition makes the UPDATE a no-op for
+        # rows another worker leased since they were selected.
+        Job.objects.filter(claimable(now), id__in=ids).update(
+            status=Job.STATUS_RUNNING,
+            locked_by=token,
+            locked_until=now + timedelta(seconds=settings.JOBS_LEASE_SECONDS),
+            attempts=F('attempts') + 1
+        )
+    return list(Job.objects.filter(id__in=ids, locked_by=token).order_by('run_at', 'id'))
+
+
+def release_jobs(jobs):
+    """Hand leased jobs that were not started back to the queue."""
+    for job in jobs:
+        Job.objects.filter(pk=job.pk, locked_by=job.locked_by).update(
+            status=Job.STATUS_QUEUED,
+            locked_by='',
+            locked_until=None,
+            attempts=F('attempts') - 1
+        )
+
+
+def retry_delay(attempts):
+    """Exponential backoff with jitter, capped at ``JOBS_RETRY_BACKOFF_MAX``."""
+    delay = min(settings.JOBS_RETRY_BACKOFF * 2 ** (attempts - 1), settings.JOBS_RETRY_BACKOFF_MAX)
+    return timedelta(seconds=delay * random.uniform(0.5, 1.0))
+
+
+def run_job(job):
+    """Run one claimed job; return ``True`` when it completed."""
+    owned = Job.objects.filter(pk=job.pk, locked_by=job.locked_by)
+    try:
+        handler = _handlers[job.name]
+        with transaction.atomic():
+            handler(**job.payload)
+            if not owned.delete()[0]:
+                raise LeaseLost()
+    except LeaseLost:
+        logger.warning('Lease on job %s expired before it finished; discarded its result', job.pk)
+        return False
+    except Exception:
+        error = traceback.format_exc()
+        if job.attempts >= job.max_attempts:
+            logger.error('Job %s (%s) failed permanently:\n%s', job.pk, job.name, error)
+            owned.update(status=Job.STATUS_FAILED, locked_until=None, last_error=error)
+        else:
+            logger.warning('Job %s (%s) failed, will retry:\n%s', job.pk, job.name, error)
+            owned.update(
+                status=Job.STATUS_QUEUED,
+                run_at=timezone.now() + retry_delay(job.attempts),
+                locked_by='',
+                locked_until=None,
+                last_error=error
+            )
+        return False
+    return True
+
+
+def run_pending_jobs(worker_id=None, batch_size=None):
+    """Claim and run jobs until none are due; return how many completed."""
+    worker_id = worker_id or new_worker_id()
+    completed = 0
+    while jobs := claim_jobs(worker_id, batch_size or settings.JOBS_BATCH_SIZE):
+        for job in jobs:
+            completed += run_job(job)
+    return completed
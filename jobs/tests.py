@@ -0,0 +1,101 @@
+from datetime import timedelta
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from .models import Job
+from .queue import claim_jobs, enqueue, register, release_jobs, run_job, run_pending_jobs
+
+User = get_user_model()
+
+
+@register('jobs.tests.create_user')
+def create_user(username):
+    User.objects.create_user(username=username, password='testpass123')
+
+
+@register('jobs.tests.fail')
+def fail(message):
+    raise RuntimeError(message)
+
+
+@override_settings(JOBS_MAX_ATTEMPTS=2, JOBS_RETRY_BACKOFF=60, JOBS_LEASE_SECONDS=300)
+class JobQueueTests(TestCase):
+    def test_job_runs_once_and_is_removed(self):
+        enqueue('jobs.tests.create_user', username='queued')
+        self.assertEqual(run_pending_jobs(), 1)
+        self.assertTrue(User.objects.filter(username='queued').exists())
+        self.assertFalse(Job.objects.exists())
+        self.assertEqual(run_pending_jobs(), 0)
+
+    def test_unknown_job_is_rejected(self):
+        with self.assertRaises(ValueError):
+            enqueue('jobs.tests.missing')
+
+    def test_job_is_dropped_with_its_transaction(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                enqueue('jobs.tests.create_user', username='rolled-back')
+                raise RuntimeError
+        self.assertFalse(Job.objects.exists())
+
+    def test_delayed_job_waits_until_due(self):
+        job = enqueue('jobs.tests.create_user', delay=timedelta(minutes=5), username='later')
+        self.assertEqual(run_pending_jobs(), 0)
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        self.assertEqual(run_pending_jobs(), 1)
+
+    def test_failed_job_is_retried_with_backoff_then_marked_failed(self):
+        job = enqueue('jobs.tests.fail', message='boom')
+        before = timezone.now()
+        with self.assertLogs('jobs.queue', 'WARNING'):
+            self.assertEqual(run_pending_jobs(), 0)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_QUEUED)
+        self.assertEqual(job.attempts, 1)
+        self.assertIn('RuntimeError: boom', job.last_error)
+        self.assertGreaterEqual(job.run_at, before + timedelta(seconds=30))
+
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        with self.assertLogs('jobs.queue', 'ERROR'):
+            run_pending_jobs()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_FAILED)
+        self.assertEqual(job.attempts, 2)
+        self.assertEqual(run_pending_jobs(), 0)
+
+    def test_leased_job_is_not_claimed_twice(self):
+        enqueue('jobs.tests.create_user', username='leased')
+        self.assertEqual(len(claim_jobs('worker-a', 10)), 1)
+        self.assertEqual(claim_jobs('worker-b', 10), [])
+
+    def test_expired_lease_is_taken_over(self):
+        enqueue('jobs.tests.create_user', username='stale')
+        [stale] = claim_jobs('worker-a', 10)
+        Job.objects.update(locked_until=timezone.now() - timedelta(seconds=1))
+        [job] = claim_jobs('worker-b', 10)
+        self.assertEqual(job.attempts, 2)
+
+        # The original worker finishing late must not apply its result.
+        with self.assertLogs('jobs.queue', 'WARNING'):
+            self.assertFalse(run_job(stale))
+        self.assertFalse(User.objects.filter(username='stale').exists())
+        self.assertTrue(run_job(job))
+        self.assertEqual(User.objects.filter(username='stale').count(), 1)
+
+    def test_released_jobs_are_claimable_again(self):
+        enqueue('jobs.tests.create_user', username='released')
+        jobs = claim_jobs('worker-a', 10)
+        release_jobs(jobs)
+        [job] = claim_jobs('worker-b', 10)
+        self.assertEqual(job.attempts, 1)
+
+    def test_run_jobs_command(self):
+        for index in range(3):
+            enqueue('jobs.tests.create_user', username=f'command-{index}')
+        out = StringIO()
+        call_command('run_jobs', '--once', '--batch-size', '2', stdout=out)
+        self.assertIn('3 of 3 job(s) completed', out.getvalue())
+        self.assertEqual(User.objects.filter(username__startswith='command-').count(), 3)
@@ -0,0 +1,121 @@
+"""
+Maintenance of the ``ProjectAccess`` visibility table.
+
+A user can see a project when they created it or are one of its members.
+Rather than evaluating that OR (plus a DISTINCT over memberships) on every
+request, the pairs are materialized and kept in sync from signals.
+
+Every user also has an opaque *visibility version*, stored in
+``AccessVersion`` so that all processes agree on it. It is replaced whenever
+anything the user can see changes, so per-user caches can key on it and never
+need to be deleted explicitly. The version starts with the time it was
+issued, which doubles as the user's Last-Modified validator.
+"""
+import time
+from datetime import datetime, timezone
+from uuid import uuid4
+from django.db import transaction
+from .models import AccessVersion, Project, ProjectAccess, ProjectMember
+
+# Version of a user whose visibility never changed since versions were kept.
+INITIAL_USER_VERSION = '0-initial'
+
+
+def new_user_version():
+    return f'{time.time_ns():x}-{uuid4().hex[:12]}'
+
+
+def user_version_time(version):
+    """Return when ``version`` was issued as an aware datetime."""
+    issued_ns = int(version.split('-', 1)[0], 16)
+    return datetime.fromtimestamp(issued_ns / 1e9, tz=timezone.utc)
+
+
+def get_user_version(user_id):
+    version = AccessVersion.objects.filter(user_id=user_id).values_list('version', flat=True).first()
+    return version or INITIAL_USER_VERSION
+
+
+def touch_users(user_ids):
+    """Replace the visibility version of the given users once the transaction commits."""
+    user_ids = sorted({user_id for user_id in user_ids if user_id is not None})
+    if not user_ids:
+        return
+
+    def bump():
+        version = new_user_version()
+        AccessVersion.objects.bulk_create(
+            [AccessVersion(user_id=user_id, version=version) for user_id in user_ids],
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['user'],
+            update_fields=['version']
+        )
+
+    transaction.on_commit(bump)
+
+
+def project_users(project_id):
+    return set(ProjectAccess.objects.filter(project_id=project_id).values_list('user_id', flat=True))
+
+
+def visible_projects(user):
+    return Project.objects.filter(access__user_id=user.id)
+
+
+def project_audience(project_ids):
+    """Return ``{project_id: {user_id, ...}}`` for the given projects."""
+    audience = {project_id: set() for project_id in project_ids}
+    creators = Project.objects.filter(id__in=audience).values_list('id', 'created_by_id')
+    for project_id, user_id in creators:
+        audience[project_id].add(user_id)
+    members = ProjectMember.objects.filter(project_id__in=audience).values_list('project_id', 'user_id')
+    for project_id, user_id in members:
+        audience[project_id].add(user_id)
+    return audience
+
+
+def sync_project_access(project_ids):
+    """
+    Bring the access rows of the given projects in line with their audience
+    and return the ids of every user whose access was considered.
+    """
+    audience = project_audience(project_ids)
+    existing = set(
+        ProjectAccess.objects.filter(project_id__in=audience).values_list('project_id', 'user_id')
+    )
+    wanted = {
+        (project_id, user_id)
+        for project_id, user_ids in audience.items()
+        for user_id in user_ids
+    }
+    ProjectAccess.objects.bulk_create(
+        [ProjectAccess(project_id=project_id, user_id=user_id) for project_id, user_id in wanted - existing],
+        batch_size=1000,
+        ignore_conflicts=True
+    )
+    stale = {}
+    for project_id, user_id in existing - wanted:
+        stale.setdefault(project_id, set()).add(user_id)
+    for project_id, user_ids in stale.items():
+        ProjectAccess.objects.filter(project_id=project_id, user_id__in=user_ids).delete()
+    return {user_id for _, user_id in existing | wanted}
+
+
+def grant_project_access(project_id, user_id):
+    ProjectAccess.objects.bulk_create(
+        [ProjectAccess(project_id=project_id, user_id=user_id)],
+        ignore_conflicts=True
+    )
+
+
+def revoke_project_access(project_id, user_id):
+    ProjectAccess.objects.filter(
+        project_id=project_id,
+        user_id=user_id
+    ).exclude(project__created_by_id=user_id).delete()
+
+
+def rebuild_project_access():
+    ProjectAccess.objects.all().delete()
+    sync_project_access(list(Project.objects.values_list('id', flat=True)))
@@ -0,0 +1,98 @@
+"""
+Maintenance of the denormalized ``ProjectCounters`` rows.
+
+Counters are adjusted with ``F()`` expressions in the same transaction as the
+task or membership write that changes them, so reads are a single primary-key
+lookup. ``rebuild_project_counters`` recomputes them from scratch, e.g. after
+bulk imports that bypass model signals.
+"""
+from collections import Counter, defaultdict
+from django.db import transaction
+from django.db.models import Count, F, Q
+from tasks.models import Task
+from .models import Project, ProjectCounters, ProjectMember
+
+STATUS_FIELDS = {
+    Task.STATUS_TODO: 'todo_tasks',
+    Task.STATUS_IN_PROGRESS: 'in_progress_tasks',
+    Task.STATUS_COMPLETED: 'completed_tasks',
+}
+COUNTER_FIELDS = tuple(STATUS_FIELDS.values()) + ('team_members',)
+
+
+def adjust_task_counters(deltas):
+    """Apply ``{(project_id, status): delta}`` with one UPDATE per project."""
+    per_project = defaultdict(Counter)
+    for (project_id, task_status), delta in deltas.items():
+        if delta:
+            per_project[project_id][STATUS_FIELDS[task_status]] += delta
+    for project_id, fields in per_project.items():
+        updates = {field: F(field) + delta for field, delta in fields.items() if delta}
+        if updates:
+            ProjectCounters.objects.filter(project_id=project_id).update(**updates)
+
+
+def adjust_member_counter(project_id, delta):
+    ProjectCounters.objects.filter(project_id=project_id).update(
+        team_members=F('team_members') + delta
+    )
+
+
+def count_project_counters(project_ids=None):
+    """Compute the true counters, returning ``{project_id: {field: value}}``."""
+    projects = Project.objects.all()
+    if project_ids is not None:
+        projects = projects.filter(id__in=project_ids)
+    expected = {
+        project_id: dict.fromkeys(COUNTER_FIELDS, 0)
+        for project_id in projects.values_list('id', flat=True)
+    }
+    task_counts = Task.objects.filter(project_id__in=expected).values('project_id').annotate(
+        **{
+            field: Count('id', filter=Q(status=task_status))
+            for task_status, field in STATUS_FIELDS.items()
+        }
+    )
+    for row in task_counts:
+        expected[row.pop('project_id')].update(row)
+    member_counts = ProjectMember.objects.filter(project_id__in=expected).values(
+        'project_id'
+    ).annotate(team_members=Count('id'))
+    for row in member_counts:
+        expected[row['project_id']]['team_members'] = row['team_members']
+    return expected
+
+
+def verify_project_counters(project_ids=None):
+    """Return ``{project_id: (stored, expected)}`` for every drifted project."""
+    expected = count_project_counters(project_ids)
+    stored = {
+        row.pop('project_id'): row
+        for row in ProjectCounters.objects.filter(project_id__in=expected).values(
+            'project_id', *COUNTER_FIELDS
+        )
+    }
+    return {
+        project_id: (stored.get(project_id), values)
+        for project_id, values in expected.items()
+        if stored.get(project_id) != values
+    }
+
+
+@transaction.atomic
+def rebuild_project_counters(project_ids=None):
+    """Recompute and store the counters, returning the number of projects fixed."""
+    drifted = verify_project_counters(project_ids)
+    missing = [
+        ProjectCounters(project_id=project_id, **expected)
+        for project_id, (stored, expected) in drifted.items()
+        if stored is None
+    ]
+    ProjectCounters.objects.bulk_create(missing, batch_size=1000)
+    changed = [
+        ProjectCounters(project_id=project_id, **expected)
+        for project_id, (stored, expected) in drifted.items()
+        if stored is not None
+    ]
+    ProjectCounters.objects.bulk_update(changed, COUNTER_FIELDS, batch_size=1000)
+    return len(drifted)
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+from projects.counters import rebuild_project_counters, verify_project_counters
+
+
+class Command(BaseCommand):
+    help = 'Recompute the denormalized per-project task and member counters.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'project_ids',
+            nargs='*',
+            type=int,
+            help='Only process these projects (default: all).'
+        )
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only verify the counters and fail if any have drifted.'
+        )
+
+    def handle(self, *args, **options):
+        project_ids = options['project_ids'] or None
+        if options['check']:
+            drifted = verify_project_counters(project_ids)
+            for project_id, (stored, expected) in sorted(drifted.items()):
+                self.stdout.write(f'project {project_id}: stored={stored} expected={expected}')
+            if drifted:
+                raise CommandError(f'{len(drifted)} project(s) have drifted counters.')
+            self.stdout.write(self.style.SUCCESS('All project counters are consistent.'))
+            return
+
+        fixed = rebuild_project_counters(project_ids)
+        drifted = verify_project_counters(project_ids)
+        if drifted:
+            raise CommandError(f'{len(drifted)} project(s) still drifted after rebuild.')
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt counters; {fixed} project(s) corrected.'))
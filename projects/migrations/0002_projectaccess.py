@@ -0,0 +1,40 @@
+# Generated by Django 5.1.7 on 2026-10-18 09:56
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_project_access(apps, schema_editor):
+    Project = apps.get_model('projects', 'Project')
+    ProjectMember = apps.get_model('projects', 'ProjectMember')
+    ProjectAccess = apps.get_model('projects', 'ProjectAccess')
+    pairs = set(Project.objects.values_list('id', 'created_by_id'))
+    pairs.update(ProjectMember.objects.values_list('project_id', 'user_id'))
+    ProjectAccess.objects.bulk_create(
+        [ProjectAccess(project_id=project_id, user_id=user_id) for project_id, user_id in pairs],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectAccess',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='access', to='projects.project')),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='project_access', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'project')},
+            },
+        ),
+        migrations.RunPython(backfill_project_access, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.1.7 on 2026-10-18 10:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_project_counters(apps, schema_editor):
+    Project = apps.get_model('projects', 'Project')
+    ProjectCounters = apps.get_model('projects', 'ProjectCounters')
+    ProjectMember = apps.get_model('projects', 'ProjectMember')
+    Task = apps.get_model('tasks', 'Task')
+    counters = {
+        project_id: ProjectCounters(project_id=project_id)
+        for project_id in Project.objects.values_list('id', flat=True)
+    }
+    task_counts = Task.objects.values('project_id', 'status').annotate(count=models.Count('id'))
+    for row in task_counts:
+        setattr(counters[row['project_id']], f"{row['status']}_tasks", row['count'])
+    member_counts = ProjectMember.objects.values('project_id').annotate(count=models.Count('id'))
+    for row in member_counts:
+        counters[row['project_id']].team_members = row['count']
+    ProjectCounters.objects.bulk_create(counters.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0002_projectaccess'),
+        ('tasks', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectCounters',
+            fields=[
+                ('project', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='counters', serialize=False, to='projects.project')),
+                ('todo_tasks', models.IntegerField(default=0)),
+                ('in_progress_tasks', models.IntegerField(default=0)),
+                ('completed_tasks', models.IntegerField(default=0)),
+                ('team_members', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(backfill_project_counters, migrations.RunPython.noop),
+    ]
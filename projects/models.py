@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -32,6 +32,12 @@ class Project(models.Model):
         default=STATUS_ACTIVE
     )
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
     def __str__(self):
         return self.name
 
@@ -51,5 +57,76 @@ class ProjectMember(models.Model):
     class Meta:
         unique_together = ['project', 'user']
 
+    def save(self, *args, **kwargs):
+        # Keep the access and counter maintenance done in signals atomic with the row.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            return super().delete(*args, **kwargs)
+
     def __str__(self):
         return f"{self.user.username} - {self.project.name}"
+
+
+class ProjectAccess(models.Model):
+    """Materialized visibility: one row per user allowed to see a project."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='project_access',
+        db_index=False
+    )
+    project = models.ForeignKey(
+        Project,
+        on_delete=models.CASCADE,
+        related_name='access'
+    )
+
+    class Meta:
+        unique_together = ['user', 'project']
+
+    def __str__(self):
+        return f"{self.user_id} -> project {self.project_id}"
+
+
+class ProjectCounters(models.Model):
+    """Denormalized per-project task and member counts, maintained from signals."""
+    project = models.OneToOneField(
+        Project,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='counters'
+    )
+    todo_tasks = models.IntegerField(default=0)
+    in_progress_tasks = models.IntegerField(default=0)
+    completed_tasks = models.IntegerField(default=0)
+    team_members = models.IntegerField(default=0)
+
+    @property
+    def total_tasks(self):
+        return self.todo_tasks + self.in_progress_tasks + self.completed_tasks
+
+    def __str__(self):
+        return f"Counters for project {self.project_id}"
+
+
+class AccessVersion(models.Model):
+    """
+    A user's visibility version (see ``projects.access``). Kept in the
+    database so that every server and job process sees the same one.
+    """
+    # No foreign key constraint: versions are still bumped for a user whose
+    # deletion is cascading through their memberships in the same transaction.
+    user = models.OneToOneField(
+        User,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_constraint=False,
+        related_name='access_version'
+    )
+    version = models.CharField(max_length=32)
+
+    def __str__(self):
+        return f"Access version of user {self.user_id}"
@@ -1,5 +1,8 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.db.models import F, Prefetch
+from task_management.sparse import FieldQuery, SparseFieldsMixin
+from task_management.values import ValuesSerializer
 from .models import Project, ProjectMember
 
 User = get_user_model()
@@ -12,10 +15,24 @@ class ProjectMemberSerializer(serializers.ModelSerializer):
         fields = ['id', 'user', 'username', 'joined_at']
         read_only_fields = ['joined_at']
 
-class ProjectSerializer(serializers.ModelSerializer):
+class ProjectSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     members = ProjectMemberSerializer(many=True, read_only=True)
     created_by_name = serializers.CharField(source='created_by.username', read_only=True)
-    total_tasks = serializers.IntegerField(read_only=True, required=False)
+    total_tasks = serializers.IntegerField(source='counters.total_tasks', read_only=True)
+
+    # The member list grows with the project; clients ask for it with ?expand=members.
+    expandable_fields = ('members',)
+    field_queries = {
+        'created_by_name': FieldQuery(only=('created_by__username',), select_related=('created_by',)),
+        'total_tasks': FieldQuery(
+            only=('counters__todo_tasks', 'counters__in_progress_tasks', 'counters__completed_tasks'),
+            select_related=('counters',)
+        ),
+        'members': FieldQuery(prefetch_related=(
+            Prefetch('members', queryset=ProjectMember.objects.select_related('user')),
+        )),
+    }
+
     class Meta:
         model = Project
         fields = [
@@ -24,3 +41,22 @@ class ProjectSerializer(serializers.ModelSerializer):
             'status', 'members', 'total_tasks'
         ]
         read_only_fields = ['created_by', 'created_at', 'updated_at']
+
+class ProjectValuesSerializer(ValuesSerializer):
+    """Fast path for ``ProjectSerializer`` output on list pages; ``members`` takes the regular path."""
+    serializer_class = ProjectSerializer
+    fields = {
+        'id': 'id',
+        'name': 'name',
+        'description': 'description',
+        'start_date': 'start_date',
+        'end_date': 'end_date',
+        'created_by': 'created_by',
+        'created_by_name': 'created_by__username',
+        'created_at': 'created_at',
+        'updated_at': 'updated_at',
+        'status': 'status',
+        'total_tasks': (
+            F('counters__todo_tasks') + F('counters__in_progress_tasks') + F('counters__completed_tasks')
+        ),
+    }
@@ -0,0 +1,43 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from .access import (
+    grant_project_access,
+    project_users,
+    revoke_project_access,
+    sync_project_access,
+    touch_users,
+)
+from .counters import adjust_member_counter
+from .models import Project, ProjectCounters, ProjectMember
+
+
+@receiver(post_save, sender=Project)
+def project_saved(sender, instance, created, **kwargs):
+    loaded = getattr(instance, '_loaded_values', {})
+    if created:
+        ProjectCounters.objects.get_or_create(project=instance)
+    if created or loaded.get('created_by_id') != instance.created_by_id:
+        touch_users(sync_project_access([instance.id]))
+    else:
+        touch_users(project_users(instance.id))
+    instance._loaded_values = {**loaded, 'created_by_id': instance.created_by_id}
+
+
+@receiver(pre_delete, sender=Project)
+def project_deleting(sender, instance, **kwargs):
+    touch_users(project_users(instance.id))
+
+
+@receiver(post_save, sender=ProjectMember)
+def project_member_saved(sender, instance, created, **kwargs):
+    if created:
+        grant_project_access(instance.project_id, instance.user_id)
+        adjust_member_counter(instance.project_id, 1)
+        touch_users(project_users(instance.project_id))
+
+
+@receiver(post_delete, sender=ProjectMember)
+def project_member_deleted(sender, instance, **kwargs):
+    revoke_project_access(instance.project_id, instance.user_id)
+    adjust_member_counter(instance.project_id, -1)
+    touch_users(project_users(instance.project_id) | {instance.user_id})
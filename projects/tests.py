@@ -1,9 +1,22 @@
-from django.test import TestCase
+from io import StringIO
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import IntegrityError
+from django.test import TestCase, override_settings
 from django.utils import timezone
 from rest_framework.test import APITestCase
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
 from tests.test_utils import TestCaseWithSetup
-from .models import Project, ProjectMember
+from task_management.renderers import FastJSONRenderer
+from accounts.roles import issue_tokens
+from tasks.models import Task
+from .access import get_user_version, visible_projects
+from .counters import verify_project_counters
+from .models import AccessVersion, Project, ProjectCounters, ProjectMember
+from .serializers import ProjectSerializer
+from .views import project_read_queryset
 
 class ProjectModelTests(TestCase, TestCaseWithSetup):
     def setUp(self):
@@ -70,6 +83,46 @@ class ProjectModelTests(TestCase, TestCaseWithSetup):
             ).exists()
         )
 
+class ProjectAccessTests(TestCase, TestCaseWithSetup):
+    def setUp(self):
+        self.user = self.create_test_user()
+        self.member = self.create_test_user('member')
+        self.project = self.create_test_project(self.user)
+
+    def test_creator_sees_project(self):
+        self.assertEqual(list(visible_projects(self.user)), [self.project])
+        self.assertFalse(visible_projects(self.member).exists())
+
+    def test_membership_grants_and_revokes_access(self):
+        membership = ProjectMember.objects.create(project=self.project, user=self.member)
+        self.assertEqual(list(visible_projects(self.member)), [self.project])
+        membership.delete()
+        self.assertFalse(visible_projects(self.member).exists())
+
+    def test_creator_keeps_access_after_leaving(self):
+        ProjectMember.objects.create(project=self.project, user=self.user).delete()
+        self.assertEqual(list(visible_projects(self.user)), [self.project])
+
+    def test_version_bump_is_seen_by_other_processes(self):
+        version = get_user_version(self.member.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            ProjectMember.objects.create(project=self.project, user=self.member)
+        # Another worker starts from an empty cache of its own.
+        cache.clear()
+        bumped = get_user_version(self.member.id)
+        self.assertNotEqual(bumped, version)
+        self.assertEqual(AccessVersion.objects.get(user=self.member).version, bumped)
+
+        # Bumped by another worker.
+        AccessVersion.objects.filter(user=self.member).update(version='1-elsewhere')
+        self.assertEqual(get_user_version(self.member.id), '1-elsewhere')
+
+    def test_version_bumped_for_user_deleted_in_same_transaction(self):
+        ProjectMember.objects.create(project=self.project, user=self.member)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.member.delete()
+        self.assertTrue(AccessVersion.objects.filter(user_id=self.user.id).exists())
+
 class ProjectAPITests(APITestCase, TestCaseWithSetup):
     def setUp(self):
         self.user = self.create_test_user()
@@ -92,4 +145,134 @@ class ProjectAPITests(APITestCase, TestCaseWithSetup):
         self.create_test_project(self.user)
         response = self.client.get('/api/projects/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_list_values_path_renders_like_the_serializer(self):
+        project = self.create_test_project(self.user)
+        self.project = project
+        self.create_task()
+        self.create_test_project(self.user)
+        expected = JSONRenderer().render(ProjectSerializer(
+            project_read_queryset(self.user).order_by('-updated_at', '-id'), many=True
+        ).data)
+        response = self.client.get('/api/projects/')
+        self.assertEqual(FastJSONRenderer().render(response.data['results']), expected)
+
+    def test_members_are_expanded_on_request(self):
+        project = self.create_test_project(self.user)
+        ProjectMember.objects.create(project=project, user=self.user)
+        response = self.client.get(f'/api/projects/{project.id}/')
+        self.assertNotIn('members', response.data)
+        self.assertEqual(response.data['total_tasks'], 0)
+
+        response = self.client.get(f'/api/projects/{project.id}/?expand=members')
+        self.assertEqual([member['username'] for member in response.data['members']], ['testuser'])
+
+        response = self.client.get('/api/projects/?fields=id,name,members')
+        self.assertEqual(set(response.data['results'][0]), {'id', 'name', 'members'})
+
+        response = self.client.get('/api/projects/?expand=created_by_name')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def create_task(self, task_status=Task.STATUS_TODO):
+        return Task.objects.create(
+            title='Test Task',
+            description='Test Description',
+            project=self.project,
+            created_by=self.user,
+            status=task_status,
+            due_date=timezone.now()
+        )
+
+    def test_project_statistics(self):
+        self.project = self.create_test_project(self.user)
+        ProjectMember.objects.create(project=self.project, user=self.user)
+        self.create_task()
+        self.create_task(Task.STATUS_IN_PROGRESS)
+        done = self.create_task()
+        done.status = Task.STATUS_COMPLETED
+        done.save()
+        self.create_task().delete()
+
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/api/projects/{self.project.id}/statistics/')
+        self.assertEqual(response.data, {
+            'total_tasks': 3,
+            'completed_tasks': 1,
+            'in_progress_tasks': 1,
+            'todo_tasks': 1,
+            'team_members': 1
+        })
+
+        response = self.client.get('/api/projects/')
+        self.assertEqual(response.data['results'][0]['total_tasks'], 3)
+        self.assertEqual(verify_project_counters(), {})
+
+    def test_retrieve_not_modified_until_counters_change(self):
+        self.project = self.create_test_project(self.user)
+        url = f'/api/projects/{self.project.id}/'
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(2):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.create_task()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total_tasks'], 1)
+
+    @override_settings(ASYNC_SYNC_WORKERS=0)
+    def test_async_read_endpoints_match_sync(self):
+        self.project = self.create_test_project(self.user)
+        ProjectMember.objects.create(project=self.project, user=self.user)
+        self.create_task()
+        auth = {'HTTP_AUTHORIZATION': f'Bearer {issue_tokens(self.user).access_token}'}
+        for sync_url, async_url in (
+            ('/api/projects/', '/api/async/projects/'),
+            (f'/api/projects/{self.project.id}/', f'/api/async/projects/{self.project.id}/'),
+        ):
+            expected = self.client.get(sync_url).json()
+            response = self.client.get(async_url, **auth)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.json(), expected)
+
+        other = self.create_test_user('outsider')
+        self.client.force_authenticate(user=None)
+        response = self.client.get(
+            f'/api/async/projects/{self.project.id}/',
+            HTTP_AUTHORIZATION=f'Bearer {issue_tokens(other).access_token}'
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+class ProjectCountersCommandTests(TestCase, TestCaseWithSetup):
+    def setUp(self):
+        self.user = self.create_test_user()
+        self.project = self.create_test_project(self.user)
+        Task.objects.create(
+            title='Test Task',
+            description='Test Description',
+            project=self.project,
+            created_by=self.user,
+            due_date=timezone.now()
+        )
+
+    def test_counters_track_membership(self):
+        member = ProjectMember.objects.create(project=self.project, user=self.user)
+        self.assertEqual(ProjectCounters.objects.get(project=self.project).team_members, 1)
+        member.delete()
+        self.assertEqual(ProjectCounters.objects.get(project=self.project).team_members, 0)
+
+    def test_check_reports_drift_and_rebuild_fixes_it(self):
+        ProjectCounters.objects.filter(project=self.project).update(todo_tasks=7)
+        with self.assertRaises(CommandError):
+            call_command('rebuild_project_counters', '--check', stdout=StringIO())
+
+        call_command('rebuild_project_counters', stdout=StringIO())
+        counters = ProjectCounters.objects.get(project=self.project)
+        self.assertEqual(counters.todo_tasks, 1)
+        call_command('rebuild_project_counters', '--check', stdout=StringIO())
+
+    def test_rebuild_creates_missing_counters(self):
+        ProjectCounters.objects.all().delete()
+        call_command('rebuild_project_counters', stdout=StringIO())
+        self.assertEqual(ProjectCounters.objects.get(project=self.project).total_tasks, 1)
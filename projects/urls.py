@@ -1,10 +1,13 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from .async_views import ProjectDetailAsyncView, ProjectListAsyncView
 from .views import ProjectViewSet
 
 router = DefaultRouter()
 router.register(r'projects', ProjectViewSet, basename='project')
 
 urlpatterns = [
+    path('async/projects/', ProjectListAsyncView.as_view(), name='project-list-async'),
+    path('async/projects/<int:pk>/', ProjectDetailAsyncView.as_view(), name='project-detail-async'),
     path('', include(router.urls)),
 ]
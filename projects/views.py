@@ -1,27 +1,45 @@
-from django.db.models import Q, Count
 from django.contrib.auth import get_user_model
+from django.db.models import Sum
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from tasks.models import Task
+from task_management.conditional import ConditionalGetMixin
+from task_management.sparse import sparse_queryset
+from task_management.values import ValuesListMixin
+from .access import visible_projects
+from .counters import COUNTER_FIELDS
 from .models import Project, ProjectMember
-from .serializers import ProjectSerializer
+from .serializers import ProjectSerializer, ProjectValuesSerializer
 
 User = get_user_model()
 
-class ProjectViewSet(viewsets.ModelViewSet):
+
+def project_read_queryset(user, request=None):
+    """Visible projects with what ``ProjectSerializer`` reads for ``request`` loaded up front."""
+    return sparse_queryset(visible_projects(user), ProjectSerializer, request)
+
+
+class ProjectViewSet(ConditionalGetMixin, ValuesListMixin, viewsets.ModelViewSet):
     queryset = Project.objects.all()
     serializer_class = ProjectSerializer
+    values_serializer_class = ProjectValuesSerializer
+    # Counter updates do not touch Project.updated_at.
+    conditional_aggregates = {
+        field: Sum(f'counters__{field}') for field in COUNTER_FIELDS
+    }
 
     def perform_create(self, serializer):
         project = serializer.save(created_by=self.request.user)
         ProjectMember.objects.create(project=project, user=self.request.user)
 
     def get_queryset(self):
-        return Project.objects.filter(
-            Q(created_by=self.request.user) |
-            Q(members__user=self.request.user)
-        ).distinct()
+        queryset = visible_projects(self.request.user)
+        if self.action == 'statistics':
+            return queryset.select_related('counters')
+        return project_read_queryset(self.request.user, self.request)
+
+    def get_values_queryset(self):
+        return visible_projects(self.request.user)
 
     @action(detail=True, methods=['post'])
     def add_member(self, request, *args, **kwargs):
@@ -39,18 +57,12 @@ class ProjectViewSet(viewsets.ModelViewSet):
 
     @action(detail=True)
     def statistics(self, request, *args, **kwargs):
-        project = self.get_object()
+        counters = self.get_object().counters
         stats = {
-            'total_tasks': project.tasks.count(),
-            'completed_tasks': project.tasks.filter(
-                status=Task.STATUS_COMPLETED
-            ).count(),
-            'in_progress_tasks': project.tasks.filter(
-                status=Task.STATUS_IN_PROGRESS
-            ).count(),
-            'todo_tasks': project.tasks.filter(
-                status=Task.STATUS_TODO
-            ).count(),
-            'team_members': project.members.count()
+            'total_tasks': counters.total_tasks,
+            'completed_tasks': counters.completed_tasks,
+            'in_progress_tasks': counters.in_progress_tasks,
+            'todo_tasks': counters.todo_tasks,
+            'team_members': counters.team_members
         }
         return Response(stats)
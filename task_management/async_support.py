@@ -0,0 +1,113 @@
+"""
+Support for the native async (ASGI) read endpoints.
+
+DRF views are synchronous, so the async variants are plain Django async views
+that reuse the DRF authentication, pagination and serializers. Work that is
+still synchronous -- queries that should overlap, serialization, token
+checks -- runs on a bounded thread pool (``ASYNC_SYNC_WORKERS``) so
+independent queries really execute concurrently, each thread on its own
+connection. Django's async ORM is used for single queries on the critical
+path; it funnels through one shared sync thread, so it cannot overlap queries
+by itself. With ``ASYNC_SYNC_WORKERS = 0`` everything runs on that thread.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import Http404, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.views import View
+from rest_framework import exceptions, status
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from accounts.authentication import StatelessJWTAuthentication
+from .conditional import get_validators, stamp_validators
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.ASYNC_SYNC_WORKERS,
+                thread_name_prefix='async-sync'
+            )
+        return _executor
+
+
+def _in_worker(func, *args, **kwargs):
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+async def run_sync(func, *args, **kwargs):
+    """Await ``func(*args, **kwargs)`` on the bounded pool."""
+    if not settings.ASYNC_SYNC_WORKERS:
+        return await sync_to_async(func)(*args, **kwargs)
+    return await sync_to_async(_in_worker, thread_sensitive=False, executor=get_executor())(
+        func, *args, **kwargs
+    )
+
+
+def json_response(data, status_code=status.HTTP_200_OK):
+    renderer = api_settings.DEFAULT_RENDERER_CLASSES[0]()
+    return HttpResponse(renderer.render(data), status=status_code, content_type='application/json')
+
+
+def authenticate(request):
+    drf_request = Request(request, authenticators=[StatelessJWTAuthentication()])
+    user = drf_request.user
+    if not user.is_authenticated:
+        raise exceptions.NotAuthenticated()
+    return drf_request
+
+
+class AsyncAPIView(View):
+    """
+    Base async view: authenticates with ``StatelessJWTAuthentication`` (so no
+    user query), exposes the DRF request as ``self.drf_request`` and renders
+    DRF exceptions as JSON.
+    """
+    http_method_names = ['get', 'head', 'options']
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            self.drf_request = await run_sync(authenticate, request)
+            request.user = self.drf_request.user
+            return await super().dispatch(request, *args, **kwargs)
+        except Http404:
+            return json_response({'detail': 'Not found.'}, status.HTTP_404_NOT_FOUND)
+        except exceptions.APIException as exc:
+            response = json_response({'detail': exc.detail}, exc.status_code)
+            if isinstance(exc, exceptions.NotAuthenticated | exceptions.AuthenticationFailed):
+                response['WWW-Authenticate'] = StatelessJWTAuthentication().authenticate_header(request)
+            return response
+
+    async def conditional(self, request, parts, last_modified, build):
+        """Async counterpart of ``conditional.conditional_response``."""
+        etag, timestamp = await run_sync(get_validators, request, parts, last_modified, 'json')
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = await build()
+        return stamp_validators(response, etag, timestamp)
+
+    def paginated(self, queryset, serializer_class, pagination_class):
+        """Page and serialize ``queryset`` the way the DRF list views do (sync)."""
+        paginator = pagination_class()
+        page = paginator.paginate_queryset(queryset, self.drf_request)
+        data = serializer_class(page, many=True, context={'request': self.drf_request}).data
+        return paginator.get_paginated_response(data).data
+
+    def paginated_values(self, queryset, serializer, pagination_class):
+        """``paginated`` through a ``ValuesSerializer``, as ``ValuesListMixin`` does (sync)."""
+        paginator = pagination_class()
+        keys = [order.lstrip('-') for order in getattr(paginator, 'ordering', None) or ()]
+        page = paginator.paginate_queryset(serializer.values(queryset, keys), self.drf_request)
+        return paginator.get_paginated_response(serializer.to_representation(page)).data
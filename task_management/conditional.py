@@ -0,0 +1,109 @@
+"""
+Conditional GET support for polled read endpoints.
+
+Validators are derived from the requesting user's visibility version plus a
+single aggregate over the rows behind the response (``Max('updated_at')`` and
+``Count('id')``). They are checked before the queryset is serialized, so an
+unchanged resource costs one cheap query and returns ``304 Not Modified``.
+
+Both are read from the primary. A body built from a lagging replica is sent
+without validators, so a client never holds an ETag for data older than it
+names.
+"""
+import hashlib
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from projects.access import get_user_version, user_version_time
+from .replicas import primary_reads, read_replica
+
+
+def request_user_version(request):
+    """The requesting user's visibility version, read once per request."""
+    version = getattr(request, '_user_version', None)
+    if version is None:
+        with primary_reads():
+            version = request._user_version = get_user_version(request.user.id)
+    return version
+
+
+def get_validators(request, parts, last_modified, renderer_format):
+    """Return the ``(etag, last_modified_timestamp)`` of a response to ``request``."""
+    version = request_user_version(request)
+    fingerprint = ':'.join(str(part) for part in (
+        request.user.id, version, request.get_full_path(), renderer_format, last_modified, *parts
+    ))
+    etag = quote_etag(hashlib.md5(fingerprint.encode(), usedforsecurity=False).hexdigest())
+    last_modified = max(filter(None, (last_modified, user_version_time(version))))
+    return etag, int(last_modified.timestamp())
+
+
+def stamp_validators(response, etag, timestamp):
+    if response.status_code == 200 and not read_replica():
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(timestamp)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def conditional_response(request, parts, last_modified, build):
+    """
+    Return a 304 (or 412) when the request's validators match ``parts`` and
+    ``last_modified``; otherwise call ``build`` and stamp its response.
+    """
+    etag, timestamp = get_validators(
+        request, parts, last_modified, request.accepted_renderer.format
+    )
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is None:
+        response = build()
+    return stamp_validators(response, etag, timestamp)
+
+
+def conditional_aggregates(**aggregates):
+    """The aggregate expressions whose values make up a queryset's validators."""
+    return {'last_modified': Max('updated_at'), 'count': Count('id'), **aggregates}
+
+
+class ConditionalGetMixin:
+    """
+    Answer ``list`` and ``retrieve`` conditionally. ``conditional_aggregates``
+    adds expressions whose values the payload depends on but which do not
+    move ``updated_at``.
+    """
+    conditional_aggregates = {}
+
+    def get_conditional_state(self, queryset):
+        with primary_reads():
+            return queryset.aggregate(**conditional_aggregates(**self.conditional_aggregates))
+
+    def conditional(self, request, queryset, build, detail=False):
+        state = self.get_conditional_state(queryset)
+        if detail and not state['count']:
+            # Missing objects get their 404 regardless of If-None-Match: *.
+            return build()
+        last_modified = state.pop('last_modified')
+        return conditional_response(
+            request, sorted(state.items()), last_modified, build
+        )
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        return self.conditional(
+            request, queryset, lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            queryset = self.filter_queryset(self.get_queryset()).filter(
+                **{self.lookup_field: kwargs[lookup_url_kwarg]}
+            )
+        except (TypeError, ValueError, ValidationError):
+            # Let the regular lookup turn a malformed key into a 404.
+            return super().retrieve(request, *args, **kwargs)
+        return self.conditional(
+            request, queryset, lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs),
+            detail=True
+        )
@@ -0,0 +1,284 @@
+"""
+Per-endpoint request metrics, scraped in the Prometheus text format.
+
+``MetricsMiddleware`` records per resolved view and action (for example
+``TaskViewSet.list``), method and status: the request count, a latency
+histogram (``METRICS_LATENCY_BUCKETS``), database queries and their time
+(counted by an execute wrapper on every connection, including the threads of
+the async views) and response bytes. Streams without a Content-Length (the
+exports) are recorded once their body has been sent. Recording is a few
+additions under a lock.
+
+Totals are kept per process. With ``METRICS_DIR`` set, each process also
+writes its totals to ``<METRICS_DIR>/<pid>.json`` at most every
+``METRICS_FLUSH_INTERVAL`` seconds (written aside and renamed, so readers
+never see a partial file) and the scrape endpoint sums all files. Files of
+exited workers keep counting, so counters never go backwards; clear the
+directory on deploy. Without ``METRICS_DIR`` the scrape reports the process
+that serves it.
+"""
+import bisect
+import json
+import os
+import tempfile
+import threading
+import time
+from contextvars import ContextVar
+from pathlib import Path
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from rest_framework.renderers import BaseRenderer
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from accounts.permissions import IsAdmin
+from .replicas import resolve_view
+
+UNRESOLVED_VIEW = '<unresolved>'
+# Leading values of a series, followed by one count per latency bucket (+Inf last).
+COUNT, LATENCY_SUM, QUERIES, DB_SECONDS, RESPONSE_BYTES = range(5)
+BUCKETS_START = 5
+
+
+class RequestUsage:
+    __slots__ = ('queries', 'db_seconds')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+_usage = ContextVar('request_usage', default=None)
+
+
+def count_queries(execute, sql, params, many, context):
+    usage = _usage.get()
+    if usage is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        usage.queries += 1
+        usage.db_seconds += time.perf_counter() - start
+
+
+def install_query_counter(connection):
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_queries)
+
+
+@receiver(connection_created, dispatch_uid='metrics_query_counter')
+def connection_opened(sender, connection, **kwargs):
+    install_query_counter(connection)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.series = {}
+        self.pid = os.getpid()
+        self.flushed_at = time.monotonic()
+
+    def reset(self):
+        with self.lock:
+            self.series = {}
+
+    def observe(self, key, seconds, queries, db_seconds, size):
+        buckets = settings.METRICS_LATENCY_BUCKETS
+        bucket = BUCKETS_START + bisect.bisect_left(buckets, seconds)
+        with self.lock:
+            if self.pid != os.getpid():
+                # Forked from a process that already served requests.
+                self.series, self.pid = {}, os.getpid()
+            values = self.series.get(key)
+            if values is None:
+                values = self.series[key] = [0, 0.0, 0, 0.0, 0] + [0] * (len(buckets) + 1)
+            values[COUNT] += 1
+            values[LATENCY_SUM] += seconds
+            values[QUERIES] += queries
+            values[DB_SECONDS] += db_seconds
+            values[RESPONSE_BYTES] += size
+            values[bucket] += 1
+        if settings.METRICS_DIR and time.monotonic() - self.flushed_at >= settings.METRICS_FLUSH_INTERVAL:
+            self.flush()
+
+    def snapshot(self):
+        with self.lock:
+            return {key: list(values) for key, values in self.series.items()}
+
+    def flush(self):
+        """Write this process's totals to ``METRICS_DIR``."""
+        self.flushed_at = time.monotonic()
+        directory = Path(settings.METRICS_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        data = {
+            'buckets': list(settings.METRICS_LATENCY_BUCKETS),
+            'series': [[*key, *values] for key, values in self.snapshot().items()],
+        }
+        handle, temp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+        with os.fdopen(handle, 'w') as temp:
+            json.dump(data, temp)
+        os.replace(temp_path, directory / f'{os.getpid()}.json')
+
+    def collect(self):
+        """Totals of every process (or of this one without ``METRICS_DIR``)."""
+        if not settings.METRICS_DIR:
+            return self.snapshot()
+        self.flush()
+        buckets = list(settings.METRICS_LATENCY_BUCKETS)
+        merged = {}
+        for path in Path(settings.METRICS_DIR).glob('*.json'):
+            try:
+                data = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue
+            if data.get('buckets') != buckets:
+                # Written with other buckets; cannot be summed.
+                continue
+            for row in data['series']:
+                key, values = tuple(row[:3]), row[3:]
+                total = merged.setdefault(key, [0] * len(values))
+                for index, value in enumerate(values):
+                    total[index] += value
+        return merged
+
+
+registry = MetricsRegistry()
+
+
+def view_label(view_func, method):
+    view_class, action = resolve_view(view_func, method)
+    if view_class is None:
+        return getattr(view_func, '__qualname__', UNRESOLVED_VIEW)
+    return f'{view_class.__name__}.{action}' if action else view_class.__name__
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        # Connections opened before this module was imported.
+        for connection in connections.all(initialized_only=True):
+            install_query_counter(connection)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        start = time.perf_counter()
+        usage = RequestUsage()
+        token = _usage.set(usage)
+        try:
+            response = self.get_response(request)
+        finally:
+            _usage.reset(token)
+        return self.observe(request, response, start, usage)
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        usage = RequestUsage()
+        # Threads the view hands sync work to run in a copy of this context.
+        token = _usage.set(usage)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _usage.reset(token)
+        return self.observe(request, response, start, usage)
+
+    def observe(self, request, response, start, usage):
+        def record(size):
+            key = (getattr(request, 'metrics_view', UNRESOLVED_VIEW), request.method, str(response.status_code))
+            registry.observe(key, time.perf_counter() - start, usage.queries, usage.db_seconds, size)
+
+        if not response.streaming:
+            record(len(response.content))
+        elif response.has_header('Content-Length') or response.is_async:
+            # Files (left to the server's sendfile) and async streams are
+            # recorded as handed over.
+            record(int(response.get('Content-Length', 0)))
+        else:
+            response.streaming_content = self.stream(response.streaming_content, usage, record)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.metrics_view = view_label(view_func, request.method)
+
+    @staticmethod
+    def stream(content, usage, record):
+        """Pass ``content`` through, counting its bytes and queries, then record."""
+        size = 0
+        iterator = iter(content)
+        try:
+            while True:
+                token = _usage.set(usage)
+                try:
+                    chunk = next(iterator)
+                except StopIteration:
+                    break
+                finally:
+                    _usage.reset(token)
+                size += len(chunk)
+                yield chunk
+        finally:
+            record(size)
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render_metrics(series):
+    """Render ``{(view, method, status): values}`` in the Prometheus text format."""
+    rows = sorted(
+        (f'view="{escape_label(view)}",method="{escape_label(method)}",status="{escape_label(status)}"', values)
+        for (view, method, status), values in series.items()
+    )
+    bounds = [repr(float(bound)) for bound in settings.METRICS_LATENCY_BUCKETS] + ['+Inf']
+    lines = []
+
+    def family(name, kind, help_text, field):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for labels, values in rows:
+            lines.append(f'{name}{{{labels}}} {values[field]}')
+
+    family('http_requests_total', 'counter', 'Requests served.', COUNT)
+    lines.append('# HELP http_request_duration_seconds Time from request to the last response byte.')
+    lines.append('# TYPE http_request_duration_seconds histogram')
+    for labels, values in rows:
+        cumulative = 0
+        for bound, count in zip(bounds, values[BUCKETS_START:]):
+            cumulative += count
+            lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'http_request_duration_seconds_sum{{{labels}}} {values[LATENCY_SUM]}')
+        lines.append(f'http_request_duration_seconds_count{{{labels}}} {values[COUNT]}')
+    family('http_request_db_queries_total', 'counter', 'Database queries run while serving requests.', QUERIES)
+    family('http_request_db_seconds_total', 'counter', 'Time spent in database queries.', DB_SECONDS)
+    family('http_response_size_bytes_total', 'counter', 'Response body bytes sent.', RESPONSE_BYTES)
+    return '\n'.join(lines) + '\n'
+
+
+class PrometheusRenderer(BaseRenderer):
+    media_type = 'text/plain'
+    format = 'prometheus'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, dict):
+            # Error responses, e.g. a failed permission check.
+            data = f'{data.get("detail", data)}\n'
+        return data.encode(self.charset)
+
+
+class MetricsView(APIView):
+    permission_classes = [IsAdmin]
+    renderer_classes = [PrometheusRenderer]
+
+    def get(self, request):
+        return Response(render_metrics(registry.collect()))
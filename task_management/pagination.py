@@ -0,0 +1,140 @@
+import json
+from functools import reduce
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination, PageNumberPagination, _reverse_ordering
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Cursor pagination over a composite, unique ordering such as
+    ``('-updated_at', '-id')``.
+
+    DRF's ``CursorPagination`` only filters on the first ordering field and
+    falls back to an OFFSET for ties. Here the cursor position carries every
+    ordering value, so each page is a pure keyset seek and page N costs the
+    same as page 1.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = ('-updated_at', '-id')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+
+        reverse = self.cursor is not None and self.cursor.reverse
+        position = self.cursor.position if self.cursor is not None else None
+        ordering = _reverse_ordering(self.ordering) if reverse else self.ordering
+
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            try:
+                queryset = queryset.filter(self.get_keyset_filter(ordering, position))
+            except (TypeError, ValueError, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_more = len(results) > self.page_size
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def get_keyset_filter(self, ordering, position):
+        """
+        Build ``(a, b) > (x, y)`` as ``a > x OR (a = x AND b > y)`` honouring
+        the direction of every ordering field.
+        """
+        clauses = []
+        for index, order in enumerate(ordering):
+            field = order.lstrip('-')
+            lookup = '__lt' if order.startswith('-') else '__gt'
+            equal = {
+                previous.lstrip('-'): position[prev_index]
+                for prev_index, previous in enumerate(ordering[:index])
+            }
+            clauses.append(Q(**equal, **{field + lookup: position[index]}))
+        return reduce(lambda left, right: left | right, clauses)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if self.page:
+            position = self._get_position_from_instance(self.page[-1], self.ordering)
+        else:
+            position = self.cursor.position
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=position))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if self.page:
+            position = self._get_position_from_instance(self.page[0], self.ordering)
+        else:
+            position = self.cursor.position
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=position))
+
+    def decode_cursor(self, request):
+        cursor = super().decode_cursor(request)
+        if cursor is None or cursor.position is None:
+            return cursor
+        try:
+            position = json.loads(cursor.position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return Cursor(offset=0, reverse=cursor.reverse, position=position)
+
+    def encode_cursor(self, cursor):
+        if cursor.position is not None:
+            cursor = cursor._replace(position=json.dumps(cursor.position, separators=(',', ':')))
+        return super().encode_cursor(cursor)
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for order in ordering:
+            field_name = order.lstrip('-')
+            if isinstance(instance, dict):
+                value = instance[field_name]
+            else:
+                value = getattr(instance, field_name)
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        return values
+
+
+class TaskHistoryCursorPagination(KeysetCursorPagination):
+    ordering = ('-changed_at', '-id')
+
+
+class TaskCommentCursorPagination(KeysetCursorPagination):
+    ordering = ('-created_at', '-id')
+
+
+class TaskAttachmentCursorPagination(KeysetCursorPagination):
+    ordering = ('-uploaded_at', '-id')
+
+
+class SearchPagination(PageNumberPagination):
+    """Ranked results have no stable keyset, so search pages by number."""
+    page_size_query_param = 'page_size'
+    max_page_size = 100
@@ -0,0 +1,43 @@
+"""
+JSON renderer and parser backed by ``orjson`` (a hard requirement).
+
+Output matches ``JSONRenderer``: compact UTF-8, ``Z`` for UTC datetimes and
+escaped U+2028/U+2029. Because datetimes are encoded natively, with
+microseconds as DRF's ``DateTimeField`` formats them, the values-based fast
+path (``task_management.values``) can hand rows to the renderer without
+formatting them first. There is no stdlib fallback: DRF's encoder truncates
+raw datetimes to milliseconds, so that path would render differently.
+"""
+import orjson
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+LINE_SEPARATORS = ((b'\xe2\x80\xa8', b'\\u2028'), (b'\xe2\x80\xa9', b'\\u2029'))
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        option = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            option |= orjson.OPT_INDENT_2
+        # Anything orjson cannot encode (lazy strings, decimals, querysets...)
+        # goes through DRF's encoder.
+        ret = orjson.dumps(data, default=JSONEncoder().default, option=option)
+        for character, escaped in LINE_SEPARATORS:
+            if character in ret:
+                ret = ret.replace(character, escaped)
+        return ret
+
+
+class FastJSONParser(JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
@@ -0,0 +1,173 @@
+"""
+Read-replica routing.
+
+Reads made while serving the views in ``REPLICA_READ_VIEWS`` go to one of the
+``DATABASE_REPLICAS`` aliases, chosen once per request. Everything else stays
+on ``default``: writes, unsafe requests, management commands and jobs, and
+any read that follows a write in the same request. A client whose request
+wrote is pinned to ``default`` for ``REPLICA_PIN_SECONDS``, so it reads its
+own writes while the replicas catch up.
+
+Pins are kept in ``REPLICA_PIN_CACHE`` under a hash of the client's
+credentials (the Authorization header, else the session cookie); that cache
+must be shared by all server processes for pins to hold across them.
+SQLite file replicas are refreshed with ``manage.py sync_replica``.
+
+A replica may lag, so anything keyed on or compared with primary state (the
+visibility version, conditional GET validators) is read inside
+``primary_reads()``, and a body read from a replica is neither cached nor
+given validators (see ``read_replica``).
+"""
+import hashlib
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.permissions import SAFE_METHODS
+
+PIN_CACHE_KEY = 'replica-pin:{client}'
+
+
+class RequestRouting:
+    """Routing state of the request being served."""
+    __slots__ = ('replica', 'wrote', 'replica_read')
+
+    def __init__(self):
+        self.replica = None
+        self.wrote = False
+        self.replica_read = False
+
+
+_routing = ContextVar('replica_routing', default=None)
+_primary_reads = ContextVar('replica_primary_reads', default=False)
+
+
+@contextmanager
+def primary_reads():
+    """Send the reads made inside the block to ``default``."""
+    token = _primary_reads.set(True)
+    try:
+        yield
+    finally:
+        _primary_reads.reset(token)
+
+
+def read_replica():
+    """Whether the request being served has read from a replica."""
+    routing = _routing.get()
+    return routing is not None and routing.replica_read
+
+
+def resolve_view(view_func, method):
+    """
+    Return ``(view class, action)`` for a class-based view; ``action`` is set
+    for viewset routes only, and the class is ``None`` for function views.
+    """
+    view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+    actions = getattr(view_func, 'actions', None) or {}
+    return view_class, actions.get(method.lower())
+
+
+def view_name(view_func, method):
+    """``module.Class``, or ``module.ViewSet.action`` for viewset routes."""
+    view_class, action = resolve_view(view_func, method)
+    if view_class is None:
+        return None
+    name = f'{view_class.__module__}.{view_class.__qualname__}'
+    if getattr(view_func, 'actions', None):
+        return f'{name}.{action}' if action else None
+    return name
+
+
+def pin_key(request):
+    client = request.META.get('HTTP_AUTHORIZATION') or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if not client:
+        return None
+    return PIN_CACHE_KEY.format(client=hashlib.sha256(client.encode()).hexdigest())
+
+
+class ReplicaRoutingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        routing = RequestRouting()
+        token = _routing.set(routing)
+        try:
+            response = self.get_response(request)
+        finally:
+            _routing.reset(token)
+        key = self.new_pin(request, routing)
+        if key is not None:
+            caches[settings.REPLICA_PIN_CACHE].set(key, True, settings.REPLICA_PIN_SECONDS)
+        return response
+
+    async def __acall__(self, request):
+        routing = RequestRouting()
+        # Set here, in the request's own task, so that process_view and the
+        # view's sync work (run in copies of this context) all see it.
+        token = _routing.set(routing)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _routing.reset(token)
+        key = self.new_pin(request, routing)
+        if key is not None:
+            await caches[settings.REPLICA_PIN_CACHE].aset(key, True, settings.REPLICA_PIN_SECONDS)
+        return response
+
+    @staticmethod
+    def new_pin(request, routing):
+        """The pin key to set for a client whose request wrote, else ``None``."""
+        if settings.DATABASE_REPLICAS and (routing.wrote or request.method not in SAFE_METHODS):
+            return pin_key(request)
+        return None
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        routing = _routing.get()
+        if (routing is None or not settings.DATABASE_REPLICAS or request.method not in SAFE_METHODS or
+                view_name(view_func, request.method) not in settings.REPLICA_READ_VIEWS):
+            return None
+        key = pin_key(request)
+        if key is None or not caches[settings.REPLICA_PIN_CACHE].get(key):
+            routing.replica = random.choice(settings.DATABASE_REPLICAS)
+        return None
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        routing = _routing.get()
+        if routing is None:
+            return None
+        if routing.replica is None or routing.wrote or _primary_reads.get():
+            return DEFAULT_DB_ALIAS
+        routing.replica_read = True
+        return routing.replica
+
+    def db_for_write(self, model, **hints):
+        routing = _routing.get()
+        if routing is not None:
+            routing.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas are copies of the primary, never migrated on their own.
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
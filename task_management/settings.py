@@ -46,15 +46,18 @@ INSTALLED_APPS = [
     'projects',
     'tasks',
     'dashboard',
+    'jobs',
 ]
 
 MIDDLEWARE = [
+    'task_management.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'task_management.replicas.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -62,13 +65,70 @@ MIDDLEWARE = [
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.JWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
-    ]
+    ],
+    # orjson-backed; orjson is required (see task_management.renderers)
+    'DEFAULT_RENDERER_CLASSES': [
+        'task_management.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'task_management.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    'DEFAULT_PAGINATION_CLASS': 'task_management.pagination.KeysetCursorPagination',
+    'PAGE_SIZE': 50,
 }
 
+# Upper bound on the number of tasks accepted by POST /api/tasks/bulk/
+TASK_BULK_MAX_ITEMS = 10000
+
+# Rows fetched per query while streaming task and history exports
+EXPORT_CHUNK_SIZE = 2000
+
+# Bytes of attachments each project may store (counted per attachment)
+TASK_ATTACHMENT_PROJECT_QUOTA = 1024 ** 3
+
+# Internal proxy location mapped to MEDIA_ROOT (e.g. '/protected-media/'); when set,
+# attachment downloads are handed to the proxy with X-Accel-Redirect
+TASK_ATTACHMENT_ACCEL_REDIRECT = None
+
+# Bounding-box edges (px) of the thumbnails rendered for image attachments
+TASK_THUMBNAIL_SIZES = (64, 256, 1024)
+
+# Threads running synchronous work (queries, serialization) for the async views;
+# 0 runs it all on Django's single shared sync thread
+ASYNC_SYNC_WORKERS = 8
+
+# Seconds a user's role name stays cached for permission checks
+ROLE_CACHE_TIMEOUT = 300
+
+# Seconds the set of revoked token ids is cached between deny-list reloads
+REVOKED_TOKENS_CACHE_TIMEOUT = 30
+
+# Background jobs: attempts before a job is marked failed, retry backoff
+# (seconds, doubled per attempt up to the cap), seconds a worker's lease on a
+# claimed job lasts before another worker may take it over, jobs leased per
+# claim and seconds an idle worker sleeps between polls
+JOBS_MAX_ATTEMPTS = 5
+JOBS_RETRY_BACKOFF = 10
+JOBS_RETRY_BACKOFF_MAX = 3600
+JOBS_LEASE_SECONDS = 300
+JOBS_BATCH_SIZE = 10
+JOBS_POLL_INTERVAL = 1.0
+
+# Request metrics (task_management.metrics): latency histogram bucket bounds
+# in seconds, the directory where each worker process writes its totals for
+# the scrape endpoint to sum (None reports only the process serving the
+# scrape) and the minimum seconds between a process's writes
+METRICS_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METRICS_DIR = None
+METRICS_FLUSH_INTERVAL = 5
+
 # JWT settings
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
@@ -110,13 +170,86 @@ WSGI_APPLICATION = 'task_management.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# Pragmas run on every new SQLite connection. WAL lets readers proceed while
+# a write commits; synchronous=NORMAL only fsyncs at checkpoints, which in WAL
+# mode can lose the last commits on power loss but never corrupts the file.
+# A negative cache_size is in KiB; busy_timeout is how long (ms) a connection
+# waits for the write lock before failing with "database is locked".
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -64000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+    'busy_timeout': 20000,
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Reuse a connection for up to this many seconds instead of opening
+        # (and re-running the pragmas) per request.
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'init_command': ';'.join(f'PRAGMA {name}={value}' for name, value in SQLITE_PRAGMAS.items()),
+            # Transactions take the write lock when they begin, so two writers
+            # never deadlock upgrading from a read lock (which skips busy_timeout).
+            'transaction_mode': 'IMMEDIATE',
+        },
     }
 }
 
+# Read replicas: extra DATABASES aliases the views in REPLICA_READ_VIEWS read
+# from (see task_management.replicas). A SQLite copy of the primary refreshed
+# with `manage.py sync_replica` is enough:
+#   DATABASES['replica'] = {
+#       **DATABASES['default'], 'NAME': BASE_DIR / 'db.replica.sqlite3', 'TEST': {'MIRROR': 'default'},
+#   }
+#   DATABASE_REPLICAS = ['replica']
+DATABASE_REPLICAS = []
+
+# Safe-method views, as module.View or module.ViewSet.action, whose reads may
+# be served by a replica.
+REPLICA_READ_VIEWS = [
+    'tasks.views.TaskViewSet.list',
+    'tasks.views.TaskViewSet.retrieve',
+    'dashboard.views.DashboardViewSet.list',
+    'projects.views.ProjectViewSet.statistics',
+]
+
+# Seconds a client keeps reading from the primary after a request that wrote.
+REPLICA_PIN_SECONDS = 5
+
+# Cache holding those pins. It must be shared by every server process, so it
+# is a database cache on the primary (create it with `manage.py createcachetable`).
+REPLICA_PIN_CACHE = 'replica-pins'
+
+DATABASE_ROUTERS = ['task_management.replicas.ReplicaRouter']
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+    'replica-pins': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'replica_pins',
+    },
+}
+
+# Seconds a per-user dashboard snapshot may be served from the cache. Entries
+# are keyed on the user's visibility version, which is kept in the database and
+# shared by all processes, so changes invalidate them early in every process.
+# Writes that skip the version bump (queryset updates) show once it expires.
+DASHBOARD_CACHE_TIMEOUT = 300
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -0,0 +1,104 @@
+"""
+Sparse fieldsets for read endpoints: ``?fields=`` and ``?expand=``.
+
+``?fields=id,title,status`` limits a response to the named top-level fields;
+``?expand=members`` adds fields a serializer leaves out by default
+(``expandable_fields``), typically nested lists. The same selection trims
+the queryset: each serializer's ``field_queries`` says which columns, joins,
+annotations and prefetches a field needs, so unselected fields cost nothing.
+Unknown names are rejected with a 400.
+"""
+from typing import NamedTuple
+from django.utils.functional import cached_property
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+
+
+class FieldQuery(NamedTuple):
+    """What the queryset must provide for one serializer field."""
+    only: tuple = ()
+    select_related: tuple = ()
+    prefetch_related: tuple = ()
+    annotate: dict = {}
+
+
+def parse_field_list(value):
+    return [name.strip() for name in (value or '').split(',') if name.strip()]
+
+
+def query_params(request):
+    return getattr(request, 'query_params', request.GET)
+
+
+def selected_fields(serializer_class, request=None):
+    """Return the names of the fields ``serializer_class`` renders for ``request``."""
+    declared = list(serializer_class.Meta.fields)
+    expandable = set(getattr(serializer_class, 'expandable_fields', ()))
+    if request is None:
+        return frozenset(declared) - expandable
+    params = query_params(request)
+    fields = parse_field_list(params.get('fields'))
+    expand = parse_field_list(params.get('expand'))
+
+    errors = {}
+    unknown = [name for name in fields if name not in declared]
+    if unknown:
+        errors['fields'] = [f'Unknown field(s): {", ".join(unknown)}']
+    unknown = [name for name in expand if name not in expandable]
+    if unknown:
+        errors['expand'] = [f'Cannot expand: {", ".join(unknown)}']
+    if errors:
+        raise ValidationError(errors)
+
+    selected = set(fields) if fields else set(declared) - expandable
+    return frozenset(selected | set(expand))
+
+
+def sparse_queryset(queryset, serializer_class, request=None):
+    """
+    Add the joins, annotations and prefetches of the fields selected for
+    ``request``. Read requests that name ``?fields=`` also load only the
+    columns those fields need.
+    """
+    selected = selected_fields(serializer_class, request)
+    model = queryset.model
+    concrete = {field.name for field in model._meta.concrete_fields}
+    columns = {model._meta.pk.name}
+    for name in selected:
+        query = serializer_class.field_queries.get(name)
+        if query is None:
+            if name in concrete:
+                columns.add(name)
+            continue
+        columns.update(query.only)
+        if query.select_related:
+            queryset = queryset.select_related(*query.select_related)
+        if query.annotate:
+            queryset = queryset.annotate(**query.annotate)
+        if query.prefetch_related:
+            queryset = queryset.prefetch_related(*query.prefetch_related)
+    if request is not None and request.method in SAFE_METHODS and 'fields' in query_params(request):
+        queryset = queryset.only(*columns)
+    return queryset
+
+
+class SparseFieldsMixin:
+    """
+    Serializer mixin rendering only the fields selected by the request in its
+    context. Input fields are unaffected, so writes validate as before.
+    """
+    # Fields rendered only when named in ?expand= or ?fields=.
+    expandable_fields = ()
+    # {field name: FieldQuery} for fields that are not plain local columns.
+    field_queries = {}
+
+    @cached_property
+    def selected_fields(self):
+        return selected_fields(type(self), self.context.get('request'))
+
+    @property
+    def _readable_fields(self):
+        selected = self.selected_fields
+        for field in super()._readable_fields:
+            if field.field_name in selected:
+                yield field
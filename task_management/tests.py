@@ -0,0 +1,259 @@
+import io
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+from contextlib import closing
+from unittest import mock
+from asgiref.sync import async_to_sync, iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.db import DatabaseCache
+from django.core.management import call_command
+from django.db import connections
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from tests.test_utils import TestCaseWithSetup
+from accounts.models import Role, UserProfile
+from dashboard.views import DashboardViewSet
+from projects.models import Project
+from tasks.models import Task, TaskComment, TaskHistory
+from tasks.views import TaskViewSet
+from . import metrics
+from .conditional import stamp_validators
+from .replicas import ReplicaRouter, ReplicaRoutingMiddleware, pin_key, primary_reads
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTests(TestCase):
+    def setUp(self):
+        self.pins = caches[settings.REPLICA_PIN_CACHE]
+        self.pins.clear()
+        self.router = ReplicaRouter()
+
+    def serve(self, method, view, token='first', write=False, handle=None):
+        """Return the databases reads go to while ``view`` handles a request."""
+        reads = []
+
+        def get_response(request):
+            middleware.process_view(request, view, (), {})
+            reads.append(self.router.db_for_read(Task))
+            if write:
+                self.router.db_for_write(Task)
+                reads.append(self.router.db_for_read(Task))
+            return handle(reads) if handle else HttpResponse()
+
+        middleware = ReplicaRoutingMiddleware(get_response)
+        request = RequestFactory().generic(method, '/', headers={'Authorization': f'Bearer {token}'})
+        self.response = middleware(request)
+        return reads
+
+    def test_listed_views_read_from_replica_until_they_write(self):
+        self.assertEqual(self.serve('GET', TaskViewSet.as_view({'get': 'list'})), ['replica'])
+        self.assertEqual(
+            self.serve('GET', DashboardViewSet.as_view({'get': 'list'}), token='second', write=True),
+            ['replica', 'default']
+        )
+
+    def test_other_views_and_unsafe_methods_use_primary(self):
+        self.assertEqual(self.serve('GET', TaskViewSet.as_view({'get': 'history'})), ['default'])
+        self.assertEqual(self.serve('POST', TaskViewSet.as_view({'post': 'list'})), ['default'])
+
+    def test_client_is_pinned_to_primary_after_writing(self):
+        task_list = TaskViewSet.as_view({'get': 'list'})
+        self.serve('PATCH', TaskViewSet.as_view({'patch': 'partial_update'}), write=True)
+        self.assertEqual(self.serve('GET', task_list), ['default'])
+        self.assertEqual(self.serve('GET', task_list, token='second'), ['replica'])
+        self.pins.clear()
+        self.assertEqual(self.serve('GET', task_list), ['replica'])
+
+    def test_pins_are_shared_between_processes(self):
+        self.serve('PATCH', TaskViewSet.as_view({'patch': 'partial_update'}), write=True)
+        request = RequestFactory().get('/', headers={'Authorization': 'Bearer first'})
+        self.assertTrue(DatabaseCache(self.pins._table, {}).get(pin_key(request)))
+
+    def test_validators_come_from_primary_and_replica_bodies_are_unstamped(self):
+        def handle(reads):
+            with primary_reads():
+                reads.append(self.router.db_for_read(Task))
+            return stamp_validators(HttpResponse(), '"etag"', 0)
+
+        self.assertEqual(
+            self.serve('GET', TaskViewSet.as_view({'get': 'list'}), handle=handle), ['replica', 'default']
+        )
+        self.assertFalse(self.response.has_header('ETag'))
+        self.serve('GET', TaskViewSet.as_view({'get': 'history'}), handle=handle)
+        self.assertEqual(self.response['ETag'], '"etag"')
+
+    def test_async_requests_are_routed_and_pin(self):
+        task_list = TaskViewSet.as_view({'get': 'list'})
+        reads = []
+
+        async def get_response(request):
+            await sync_to_async(middleware.process_view)(request, task_list, (), {})
+            reads.append(await sync_to_async(self.router.db_for_read)(Task))
+            if request.method not in ('GET', 'HEAD'):
+                await sync_to_async(self.router.db_for_write)(Task)
+            return HttpResponse()
+
+        middleware = ReplicaRoutingMiddleware(get_response)
+        self.assertTrue(iscoroutinefunction(middleware))
+        for method in ('GET', 'POST', 'GET'):
+            request = RequestFactory().generic(method, '/', headers={'Authorization': 'Bearer first'})
+            async_to_sync(middleware)(request)
+        self.assertEqual(reads, ['replica', 'default', 'default'])
+
+    def test_router_defers_outside_requests(self):
+        self.assertIsNone(self.router.db_for_read(Task))
+        self.assertEqual(self.router.db_for_write(Task), 'default')
+        self.assertFalse(self.router.allow_migrate('replica', 'tasks'))
+
+
+# The backup API waits for the source to be outside a transaction.
+class SyncReplicaCommandTests(TransactionTestCase, TestCaseWithSetup):
+    def test_copies_primary_into_replica_file(self):
+        self.create_test_project(self.create_test_user())
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        path = os.path.join(directory, 'replica.sqlite3')
+        out = io.StringIO()
+        with mock.patch.dict(connections.settings, {'replica': {'NAME': path}}), \
+                override_settings(DATABASE_REPLICAS=['replica']):
+            call_command('sync_replica', stdout=out)
+        self.assertIn('Synced replica', out.getvalue())
+        with closing(sqlite3.connect(path)) as replica:
+            count = replica.execute(f'SELECT COUNT(*) FROM {Project._meta.db_table}').fetchone()[0]
+        self.assertEqual(count, 1)
+
+
+class LoadTestCommandTests(TransactionTestCase, TestCaseWithSetup):
+    def test_seed_leaves_existing_rows_alone(self):
+        user = self.create_test_user()
+        task = Task.objects.create(
+            title='Existing', project=self.create_test_project(user), created_by=user, due_date=timezone.now()
+        )
+        out = io.StringIO()
+        call_command(
+            'seed_dataset', '--users', '5', '--projects', '2', '--members', '2', '--tasks', '10',
+            '--comments', '1', stdout=out
+        )
+        self.assertIn('Seeded 5 user(s), 2 project(s) and 10 task(s)', out.getvalue())
+        self.assertEqual(Task.objects.get(pk=task.pk).updated_at, task.updated_at)
+        self.assertFalse(TaskHistory.objects.filter(task=task).exists())
+        self.assertFalse(TaskComment.objects.filter(task=task).exists())
+
+    def test_seed_and_loadtest_report(self):
+        call_command(
+            'seed_dataset', '--users', '20', '--projects', '3', '--members', '5', '--tasks', '60',
+            '--comments', '1', stdout=io.StringIO()
+        )
+        self.assertEqual(UserProfile.objects.count(), 20)
+        self.assertEqual(TaskComment.objects.count(), 60)
+
+        out = io.StringIO()
+        call_command(
+            'loadtest', '--requests', '4', '--concurrency', '1', '--memory-samples', '1',
+            '--endpoints', 'tasks.list', 'tasks.add_comment', stdout=out, stderr=io.StringIO()
+        )
+        report = json.loads(out.getvalue())
+        self.assertEqual(report['dataset']['tasks'], 60)
+        self.assertEqual(set(report['endpoints']), {'tasks.list', 'tasks.add_comment'})
+        for stats in report['endpoints'].values():
+            self.assertEqual(stats['requests'], 4)
+            self.assertEqual(stats['errors'], 0)
+            self.assertGreater(stats['queries_mean'], 0)
+            self.assertLessEqual(stats['p50_ms'], stats['p99_ms'])
+        self.assertEqual(TaskComment.objects.count(), 60 + 4 + 1)
+
+
+class MetricsTests(APITestCase, TestCaseWithSetup):
+    def setUp(self):
+        metrics.registry.reset()
+        self.addCleanup(metrics.registry.reset)
+        self.user = self.create_test_user()
+        self.project = self.create_test_project(self.user)
+        self.admin = self.create_test_user('admin')
+        UserProfile.objects.create(user=self.admin, role=Role.objects.create(name=Role.ADMIN))
+
+    def scrape(self):
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get('/api/metrics/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        return response.content.decode()
+
+    def series(self, text, name, view, method='GET', status_code='200'):
+        prefix = f'{name}{{view="{view}",method="{method}",status="{status_code}"}} '
+        values = [line[len(prefix):] for line in text.splitlines() if line.startswith(prefix)]
+        self.assertEqual(len(values), 1, prefix)
+        return float(values[0])
+
+    def test_records_requests_per_view_and_action(self):
+        self.client.force_authenticate(user=self.user)
+        for _ in range(2):
+            self.client.get('/api/tasks/')
+        response = self.client.get(f'/api/projects/{self.project.id}/statistics/')
+        text = self.scrape()
+
+        self.assertEqual(self.series(text, 'http_requests_total', 'TaskViewSet.list'), 2)
+        self.assertEqual(self.series(text, 'http_request_duration_seconds_count', 'TaskViewSet.list'), 2)
+        self.assertIn(
+            'http_request_duration_seconds_bucket{view="TaskViewSet.list",method="GET",status="200",le="+Inf"} 2',
+            text
+        )
+        self.assertGreater(self.series(text, 'http_request_db_queries_total', 'ProjectViewSet.statistics'), 0)
+        self.assertGreater(self.series(text, 'http_request_db_seconds_total', 'ProjectViewSet.statistics'), 0)
+        self.assertEqual(
+            self.series(text, 'http_response_size_bytes_total', 'ProjectViewSet.statistics'),
+            len(response.content)
+        )
+
+    def test_streamed_export_is_recorded_after_sending(self):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get('/api/tasks/export/?format=ndjson')
+        self.assertNotIn('TaskViewSet.export', str(metrics.registry.snapshot()))
+        body = b''.join(response.streaming_content)
+        response.close()
+        text = self.scrape()
+        self.assertEqual(self.series(text, 'http_requests_total', 'TaskViewSet.export'), 1)
+        self.assertEqual(self.series(text, 'http_response_size_bytes_total', 'TaskViewSet.export'), len(body))
+
+    def test_requires_admin(self):
+        self.client.force_authenticate(user=self.user)
+        self.assertEqual(self.client.get('/api/metrics/').status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_records_async_requests(self):
+        async def get_response(request):
+            await sync_to_async(Task.objects.count)()
+            return HttpResponse(b'ok')
+
+        middleware = metrics.MetricsMiddleware(get_response)
+        self.assertTrue(iscoroutinefunction(middleware))
+        request = RequestFactory().get('/')
+        request.metrics_view = 'AsyncView'
+        async_to_sync(middleware)(request)
+        values = metrics.registry.snapshot()[('AsyncView', 'GET', '200')]
+        self.assertEqual(values[metrics.COUNT], 1)
+        self.assertEqual(values[metrics.QUERIES], 1)
+        self.assertEqual(values[metrics.RESPONSE_BYTES], 2)
+
+    def test_merges_process_files(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        key = ('TaskViewSet.list', 'GET', '200')
+        with override_settings(METRICS_DIR=directory):
+            other = metrics.MetricsRegistry()
+            other.observe(key, 0.02, 3, 0.001, 100)
+            with mock.patch('os.getpid', return_value=-1):
+                other.flush()
+            metrics.registry.observe(key, 2.0, 1, 0.001, 50)
+            merged = metrics.registry.collect()
+        values = merged[key]
+        self.assertEqual(values[metrics.COUNT], 2)
+        self.assertEqual(values[metrics.QUERIES], 4)
+        self.assertEqual(values[metrics.RESPONSE_BYTES], 150)
+        self.assertEqual(sum(values[metrics.BUCKETS_START:]), 2)
@@ -0,0 +1,31 @@
+"""
+Request-scoped write transactions.
+
+With the SQLite profile in settings (``transaction_mode = 'IMMEDIATE'``) a
+transaction takes the database's write lock when it begins, so running a
+whole write request in one transaction means one lock acquisition and one
+commit instead of one per statement, and no read-to-write upgrade that could
+fail with "database is locked" regardless of ``busy_timeout``.
+"""
+from django.db import transaction
+from rest_framework.permissions import SAFE_METHODS
+
+
+class AtomicWritesMixin:
+    """
+    Run unsafe-method requests to a viewset in one transaction. Responses for
+    handled exceptions roll it back, as DRF does under ``ATOMIC_REQUESTS``.
+    Actions named in ``non_atomic_actions`` (typically uploads, which would
+    hold the write lock while the body streams in) manage their own.
+    """
+    non_atomic_actions = ()
+
+    def dispatch(self, request, *args, **kwargs):
+        action = getattr(self, 'action_map', {}).get(request.method.lower())
+        if request.method in SAFE_METHODS or action in self.non_atomic_actions:
+            return super().dispatch(request, *args, **kwargs)
+        with transaction.atomic():
+            response = super().dispatch(request, *args, **kwargs)
+            if getattr(response, 'exception', False):
+                transaction.set_rollback(True)
+        return response
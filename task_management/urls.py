@@ -16,9 +16,12 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
+from .metrics import MetricsView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('api/auth/', include('accounts.urls')),
+    path('api/metrics/', MetricsView.as_view(), name='metrics'),
     path('api/', include('dashboard.urls')),
     path('api/', include('projects.urls')),
     path('api/', include('tasks.urls')),
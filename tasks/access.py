@@ -0,0 +1,106 @@
+"""
+Maintenance of the ``TaskAccess`` visibility table.
+
+A user can see a task when they created it, are assigned to it, or are a
+member of its project. The pairs are materialized so that visibility is a
+single indexed lookup on ``(user, task)`` instead of a three-way OR joined
+through ``ProjectMember`` and deduplicated with DISTINCT.
+"""
+from django.db import connection
+from django.db.models.constants import OnConflict
+from projects.models import ProjectMember
+from .models import Task, TaskAccess
+
+
+def insert_access_rows(pairs):
+    """
+    Insert ``(task_id, user_id)`` pairs, skipping existing ones.
+
+    Member fan-out makes this the largest write of any task change, so rows go
+    through one ``executemany`` instead of instantiating a model per pair.
+    """
+    pairs = list(pairs)
+    if not pairs:
+        return
+    ops = connection.ops
+    table = ops.quote_name(TaskAccess._meta.db_table)
+    columns = ', '.join(ops.quote_name(column) for column in ('task_id', 'user_id'))
+    suffix = ops.on_conflict_suffix_sql(TaskAccess._meta.fields, OnConflict.IGNORE, None, None)
+    sql = f'{ops.insert_statement(on_conflict=OnConflict.IGNORE)} {table} ({columns}) VALUES (%s, %s) {suffix}'
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, pairs)
+
+
+def visible_tasks(user):
+    return Task.objects.filter(access__user_id=user.id)
+
+
+def task_audience(task_ids):
+    """Return ``{task_id: {user_id, ...}}`` for the given tasks."""
+    audience = {task_id: set() for task_id in task_ids}
+    rows = Task.objects.filter(id__in=audience).values_list(
+        'id', 'project_id', 'created_by_id', 'assigned_to_id'
+    )
+    tasks_by_project = {}
+    for task_id, project_id, created_by_id, assigned_to_id in rows:
+        audience[task_id].add(created_by_id)
+        if assigned_to_id is not None:
+            audience[task_id].add(assigned_to_id)
+        tasks_by_project.setdefault(project_id, []).append(task_id)
+    members = ProjectMember.objects.filter(
+        project_id__in=tasks_by_project
+    ).values_list('project_id', 'user_id')
+    for project_id, user_id in members:
+        for task_id in tasks_by_project[project_id]:
+            audience[task_id].add(user_id)
+    return audience
+
+
+def task_users(task_ids):
+    return set(TaskAccess.objects.filter(task_id__in=task_ids).values_list('user_id', flat=True))
+
+
+def sync_task_access(task_ids):
+    """
+    Bring the access rows of the given tasks in line with their audience and
+    return the ids of every user who could see them before or after.
+    """
+    audience = task_audience(task_ids)
+    existing = set(
+        TaskAccess.objects.filter(task_id__in=audience).values_list('task_id', 'user_id')
+    )
+    wanted = {
+        (task_id, user_id)
+        for task_id, user_ids in audience.items()
+        for user_id in user_ids
+    }
+    insert_access_rows(wanted - existing)
+    stale = {}
+    for task_id, user_id in existing - wanted:
+        stale.setdefault(task_id, set()).add(user_id)
+    for task_id, user_ids in stale.items():
+        TaskAccess.objects.filter(task_id=task_id, user_id__in=user_ids).delete()
+    return {user_id for _, user_id in existing | wanted}
+
+
+def grant_member_access(project_id, user_id):
+    task_ids = Task.objects.filter(project_id=project_id).values_list('id', flat=True)
+    insert_access_rows((task_id, user_id) for task_id in task_ids.iterator())
+
+
+def revoke_member_access(project_id, user_id):
+    TaskAccess.objects.filter(
+        user_id=user_id,
+        task__project_id=project_id
+    ).exclude(
+        task__created_by_id=user_id
+    ).exclude(
+        task__assigned_to_id=user_id
+    ).delete()
+
+
+def rebuild_task_access():
+    TaskAccess.objects.all().delete()
+    task_ids = list(Task.objects.values_list('id', flat=True))
+    for start in range(0, len(task_ids), 1000):
+        sync_task_access(task_ids[start:start + 1000])
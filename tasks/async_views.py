@@ -0,0 +1,45 @@
+from django.http import Http404
+from rest_framework.settings import api_settings
+from task_management.async_support import AsyncAPIView, json_response, run_sync
+from task_management.conditional import conditional_aggregates
+from .access import visible_tasks
+from .serializers import TaskSerializer, TaskValuesSerializer
+from .views import task_read_queryset
+
+
+class TaskListAsyncView(AsyncAPIView):
+    """Async variant of ``GET /api/tasks/``."""
+
+    async def get(self, request):
+        queryset = task_read_queryset(request.user, self.drf_request)
+        state = await queryset.aaggregate(**conditional_aggregates())
+        last_modified = state.pop('last_modified')
+        return await self.conditional(request, sorted(state.items()), last_modified, lambda: self.page(queryset))
+
+    async def page(self, queryset):
+        pagination_class = api_settings.DEFAULT_PAGINATION_CLASS
+        values = TaskValuesSerializer.for_request(self.drf_request)
+        if values is None:
+            data = await run_sync(self.paginated, queryset, TaskSerializer, pagination_class)
+        else:
+            data = await run_sync(
+                self.paginated_values, visible_tasks(self.drf_request.user), values, pagination_class
+            )
+        return json_response(data)
+
+
+class TaskDetailAsyncView(AsyncAPIView):
+    """Async variant of ``GET /api/tasks/<id>/``."""
+
+    async def get(self, request, pk):
+        queryset = task_read_queryset(request.user, self.drf_request).filter(pk=pk)
+        state = await queryset.aaggregate(**conditional_aggregates())
+        if not state['count']:
+            raise Http404
+        last_modified = state.pop('last_modified')
+        return await self.conditional(request, sorted(state.items()), last_modified, lambda: self.detail(queryset))
+
+    async def detail(self, queryset):
+        def serialize():
+            return TaskSerializer(queryset.get(), context={'request': self.drf_request}).data
+        return json_response(await run_sync(serialize))
@@ -0,0 +1,128 @@
+"""
+Content-addressed attachment storage.
+
+Uploads are streamed to a temporary file by ``DigestUploadHandler``, which
+hashes each chunk as it arrives and aborts as soon as the project's quota is
+exceeded. The finished file is stored once per SHA-256 digest as an
+``AttachmentBlob``; every ``TaskAttachment`` referencing it bumps the blob's
+``ref_count``, and the file is removed when the last reference goes away.
+
+The streaming check only aborts early: uploads to the same project may run
+concurrently, so the quota is checked again when the attachment is recorded,
+under a lock on the project's ``ProjectCounters`` row.
+"""
+import hashlib
+import os
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.db import transaction
+from django.db.models import F, Sum
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from projects.models import ProjectCounters
+from .models import AttachmentBlob, TaskAttachment
+from .jobs import defer_thumbnails
+from .thumbnails import delete_thumbnails
+
+
+class QuotaExceeded(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = 'Project attachment quota exceeded.'
+    default_code = 'quota_exceeded'
+
+
+def project_attachment_usage(project_id):
+    return TaskAttachment.objects.filter(task__project_id=project_id).aggregate(
+        used=Sum('size')
+    )['used'] or 0
+
+
+def remaining_quota(project_id):
+    return settings.TASK_ATTACHMENT_PROJECT_QUOTA - project_attachment_usage(project_id)
+
+
+class DigestUploadHandler(TemporaryFileUploadHandler):
+    """
+    Spool an upload to disk while computing its SHA-256 digest and size.
+    Raises ``QuotaExceeded`` mid-stream once more than ``limit`` bytes arrive.
+    """
+
+    def __init__(self, limit, request=None):
+        super().__init__(request)
+        self.limit = limit
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.digest = hashlib.sha256()
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > self.limit:
+            self.file.close()
+            raise QuotaExceeded()
+        self.digest.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        upload = super().file_complete(file_size)
+        upload.sha256 = self.digest.hexdigest()
+        return upload
+
+
+def store_blob(upload):
+    """Return the blob holding ``upload``'s content with one more reference."""
+    blob = AttachmentBlob.objects.select_for_update().filter(digest=upload.sha256).first()
+    if blob is None:
+        stored = AttachmentBlob(digest=upload.sha256, size=upload.size, ref_count=1)
+        # A temporary upload is moved into place rather than copied.
+        stored.file.save(upload.sha256, upload, save=False)
+        # When a concurrent upload of the same content inserts the digest
+        # first, the insert fails on the unique index and get_or_create
+        # returns that blob instead.
+        blob, created = AttachmentBlob.objects.select_for_update().get_or_create(
+            digest=upload.sha256,
+            defaults={'file': stored.file.name, 'size': upload.size, 'ref_count': 1}
+        )
+        if created:
+            return blob
+        stored.file.storage.delete(stored.file.name)
+    AttachmentBlob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') + 1)
+    blob.refresh_from_db(fields=['ref_count'])
+    return blob
+
+
+def attach_upload(task, user, upload):
+    with transaction.atomic():
+        # Serializes the uploads to one project until this one is recorded.
+        ProjectCounters.objects.select_for_update().get_or_create(project_id=task.project_id)
+        if upload.size > remaining_quota(task.project_id):
+            raise QuotaExceeded()
+        blob = store_blob(upload)
+        attachment = TaskAttachment.objects.create(
+            task=task,
+            file=blob.file.name,
+            blob=blob,
+            name=os.path.basename(upload.name or '')[:255],
+            content_type=(upload.content_type or '')[:100],
+            size=upload.size,
+            uploaded_by=user
+        )
+        defer_thumbnails(attachment)
+    return attachment
+
+
+def release_blob(blob_id):
+    """Drop one reference to a blob, deleting it and its file with the last one."""
+    AttachmentBlob.objects.filter(pk=blob_id).update(ref_count=F('ref_count') - 1)
+    blob = AttachmentBlob.objects.filter(pk=blob_id, ref_count__lte=0).first()
+    if blob is None:
+        return
+    name, storage = blob.file.name, blob.file.storage
+    blob.delete()
+
+    def delete_files():
+        storage.delete(name)
+        delete_thumbnails(storage, name)
+
+    transaction.on_commit(delete_files)
@@ -0,0 +1,261 @@
+"""
+Set-based task writes.
+
+Bulk operations use ``bulk_create``/``bulk_update`` and therefore bypass the
+model signals, so they maintain the access table, project counters and
+visibility versions themselves, in the same transaction as the rows. Their
+history rows are queued like the single-task ones, one job per batch.
+"""
+from collections import Counter
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from projects.access import touch_users
+from projects.counters import adjust_task_counters
+from projects.models import Project
+from .access import sync_task_access, task_users, visible_tasks
+from .jobs import defer_history_batch
+from .models import Task
+from .search import SEARCH_FIELDS, index_tasks
+from .serializers import BulkTaskSerializer
+
+User = get_user_model()
+
+ACCESS_FIELDS = {'project', 'assigned_to'}
+BATCH_SIZE = 1000
+
+
+def chunked(values, size=BATCH_SIZE):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def _related_ids(items, field):
+    ids = set()
+    for item in items:
+        try:
+            ids.add(int(item[field]))
+        except (KeyError, TypeError, ValueError):
+            pass
+    return ids
+
+
+def prefetch_related_instances(items):
+    """Load every project and assignee referenced by the batch in two queries."""
+    return {
+        'project': Project.objects.in_bulk(_related_ids(items, 'project')),
+        'assigned_to': User.objects.in_bulk(_related_ids(items, 'assigned_to')),
+    }
+
+
+def history_entry(task_id, user_id, old_status, new_status, notes, old_assigned_to_id=None,
+                  new_assigned_to_id=None):
+    return {
+        'task_id': task_id,
+        'changed_by_id': user_id,
+        'old_status': old_status,
+        'new_status': new_status,
+        'old_assigned_to_id': old_assigned_to_id,
+        'new_assigned_to_id': new_assigned_to_id,
+        'notes': notes,
+    }
+
+
+def defer_history(entries):
+    for chunk in chunked(entries):
+        defer_history_batch(chunk)
+
+
+def finalize_task_writes(task_ids, access_changed_ids, counter_deltas):
+    """Maintain the derived tables for tasks written without model signals."""
+    affected = set()
+    for chunk in chunked(set(task_ids) - set(access_changed_ids)):
+        affected |= task_users(chunk)
+    for chunk in chunked(access_changed_ids):
+        affected |= sync_task_access(chunk)
+    adjust_task_counters(counter_deltas)
+    touch_users(affected)
+
+
+def apply_task_updates(updates, now):
+    """
+    Write ``(task, validated_data)`` pairs. Tasks receiving identical values
+    share one ``UPDATE ... WHERE id IN (...)``; the remaining one-off rows go
+    through a single ``bulk_update``.
+    """
+    groups = {}
+    for task, validated_data in updates:
+        key = tuple(sorted(
+            (field, getattr(value, 'pk', value)) for field, value in validated_data.items()
+        ))
+        groups.setdefault(key, []).append((task, validated_data))
+
+    singles = []
+    single_fields = {'updated_at'}
+    for key, members in groups.items():
+        if len(members) == 1:
+            singles.append(members[0][0])
+            single_fields.update(members[0][1])
+            continue
+        values = dict(members[0][1], updated_at=now)
+        for chunk in chunked([task.id for task, _ in members]):
+            Task.objects.filter(id__in=chunk).update(**values)
+    Task.objects.bulk_update(singles, sorted(single_fields), batch_size=BATCH_SIZE)
+
+
+def bulk_write_tasks(user, items):
+    """
+    Validate and apply a batch of task creates (items without ``id``) and
+    partial updates (items with ``id``).
+
+    Valid items are written together in one transaction, which also loads the
+    tasks to update; invalid ones are reported by index and skipped.
+    """
+    context = {'prefetched': prefetch_related_instances(items)}
+    update_ids = _related_ids(items, 'id')
+    with transaction.atomic():
+        # Locked, so the status the counter deltas start from cannot go stale
+        # before the update lands.
+        existing = visible_tasks(user).select_for_update(of=('self',)).in_bulk(update_ids)
+
+        results = [{'index': index} for index in range(len(items))]
+        create_indexes = []
+        update_indexes = []
+        for index, item in enumerate(items):
+            if isinstance(item, dict) and 'id' in item:
+                try:
+                    found = int(item['id']) in existing
+                except (TypeError, ValueError):
+                    found = False
+                if found:
+                    update_indexes.append(index)
+                else:
+                    results[index]['errors'] = {'id': ['Task not found.']}
+            else:
+                create_indexes.append(index)
+
+        # A ListSerializer's child builds its field set once for the whole batch;
+        # running it per item keeps the valid items when others fail.
+        creates = []
+        updates = []
+        for indexes, partial in ((create_indexes, False), (update_indexes, True)):
+            child = BulkTaskSerializer(many=True, partial=partial, context=context).child
+            for index in indexes:
+                try:
+                    validated_data = child.run_validation(items[index])
+                except ValidationError as exc:
+                    results[index]['errors'] = exc.detail
+                    continue
+                if partial:
+                    updates.append((results[index], existing[int(items[index]['id'])], validated_data))
+                else:
+                    creates.append((results[index], Task(created_by_id=user.id, **validated_data)))
+
+        counter_deltas = Counter()
+        history = []
+        access_changed_ids = []
+
+        created = Task.objects.bulk_create([task for _, task in creates], batch_size=BATCH_SIZE)
+        for (result, _), task in zip(creates, created):
+            result.update({'id': task.id, 'action': 'created'})
+            counter_deltas[(task.project_id, task.status)] += 1
+            access_changed_ids.append(task.id)
+
+        now = timezone.now()
+        updated = []
+        for result, task, validated_data in updates:
+            old_project_id, old_status = task.project_id, task.status
+            old_assigned_to_id = task.assigned_to_id
+            for field, value in validated_data.items():
+                setattr(task, field, value)
+            task.updated_at = now
+            updated.append((task, validated_data))
+            result.update({'id': task.id, 'action': 'updated'})
+
+            if (old_project_id, old_status) != (task.project_id, task.status):
+                counter_deltas[(old_project_id, old_status)] -= 1
+                counter_deltas[(task.project_id, task.status)] += 1
+            if ACCESS_FIELDS & set(validated_data):
+                access_changed_ids.append(task.id)
+            if old_status != task.status or old_assigned_to_id != task.assigned_to_id:
+                history.append(history_entry(
+                    task.id, user.id, old_status, task.status,
+                    f"Status changed from {old_status} to {task.status}",
+                    old_assigned_to_id, task.assigned_to_id
+                ))
+        apply_task_updates(updated, now)
+        defer_history(history)
+
+        finalize_task_writes(
+            [task.id for task in created] + [task.id for task, _ in updated],
+            access_changed_ids,
+            counter_deltas
+        )
+        index_tasks(
+            [task.id for task in created] +
+            [task.id for task, validated_data in updated if set(SEARCH_FIELDS) & set(validated_data)]
+        )
+
+    return {
+        'created': len(created),
+        'updated': len(updated),
+        'failed': sum(1 for result in results if 'errors' in result),
+        'results': results,
+    }
+
+
+def bulk_change_status(user, new_status, ids=None, filters=None):
+    """
+    Move every visible task selected by ``ids`` or ``filters`` to
+    ``new_status`` with set-based UPDATEs, queueing their history rows.
+
+    Requested ids the user cannot see (or that do not exist) are counted as
+    forbidden and left untouched.
+    """
+    visible = visible_tasks(user)
+    if ids is not None:
+        requested = set(ids)
+        candidates = [visible.filter(id__in=chunk) for chunk in chunked(requested)]
+    else:
+        requested = None
+        candidates = [visible.filter(**filters)]
+
+    with transaction.atomic():
+        rows = [
+            row
+            for queryset in candidates
+            for row in queryset.select_for_update().values_list('id', 'project_id', 'status')
+        ]
+        changing = {}
+        counter_deltas = Counter()
+        for task_id, project_id, old_status in rows:
+            if old_status != new_status:
+                changing.setdefault(old_status, []).append(task_id)
+                counter_deltas[(project_id, old_status)] -= 1
+                counter_deltas[(project_id, new_status)] += 1
+
+        now = timezone.now()
+        history = []
+        for old_status, task_ids in changing.items():
+            for chunk in chunked(task_ids):
+                Task.objects.filter(id__in=chunk, status=old_status).update(
+                    status=new_status,
+                    updated_at=now
+                )
+            history.extend(
+                history_entry(
+                    task_id, user.id, old_status, new_status, f"Status manually changed to {new_status}"
+                )
+                for task_id in task_ids
+            )
+        defer_history(history)
+        finalize_task_writes([task_id for task_id, _, _ in rows], [], counter_deltas)
+
+    forbidden = len(requested - {task_id for task_id, _, _ in rows}) if requested is not None else 0
+    return {
+        'changed': len(history),
+        'unchanged': len(rows) - len(history),
+        'forbidden': forbidden,
+    }
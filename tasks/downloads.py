@@ -0,0 +1,175 @@
+"""
+Attachment and thumbnail downloads.
+
+Responses never copy file bytes through Python: with
+``TASK_ATTACHMENT_ACCEL_REDIRECT`` set, the front proxy is told to serve the
+file itself via ``X-Accel-Redirect``; otherwise a ``FileResponse`` hands the
+open file to the WSGI server's ``wsgi.file_wrapper`` (``sendfile`` under
+gunicorn/uWSGI). Single byte ranges, ``If-Range`` and the usual conditional
+headers are honoured before the file is opened. Thumbnails go through the same
+path (and the same task visibility check in the view), served inline.
+"""
+import hashlib
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe, quote_etag
+from .export import ExportRenderer
+from .thumbnails import THUMBNAIL_EXTENSION
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class DownloadRenderer(ExportRenderer):
+    """Accepts any media type; the download view returns its own response."""
+    media_type = '*/*'
+    format = 'download'
+
+
+class FileRange:
+    """
+    Read-only window of ``length`` bytes of an open file starting at
+    ``start``. It keeps ``fileno`` so WSGI file wrappers can still
+    ``sendfile`` it, bounded by the response's Content-Length.
+    """
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        size = self.remaining if size is None or size < 0 else min(size, self.remaining)
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def attachment_etag(attachment, variant=''):
+    if attachment.blob_id is not None:
+        return quote_etag(attachment.blob.digest + variant)
+    fingerprint = f'{attachment.file.name}:{attachment.size}:{attachment.uploaded_at.isoformat()}'
+    return quote_etag(hashlib.md5(fingerprint.encode(), usedforsecurity=False).hexdigest() + variant)
+
+
+def parse_range(header, size):
+    """
+    Return ``(start, end)`` (inclusive) for a single satisfiable byte range,
+    ``None`` when the header should be ignored, or ``False`` when it is
+    unsatisfiable.
+    """
+    match = RANGE_RE.match(header.strip())
+    if match is None:
+        # Malformed and multi-range requests are served in full.
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        suffix = int(last)
+        if suffix == 0 or size == 0:
+            return False
+        return max(0, size - suffix), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        return False
+    return start, end
+
+
+def if_range_matches(request, etag, last_modified):
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith('"') or if_range.startswith('W/'):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def serve_attachment(request, attachment):
+    name = attachment.name or os.path.basename(attachment.file.name)
+    content_type = (
+        attachment.content_type or mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    )
+    return serve_file(
+        request, attachment.file.storage, attachment.file.name, name, content_type,
+        attachment_etag(attachment), int(attachment.uploaded_at.timestamp())
+    )
+
+
+def serve_thumbnail(request, attachment, size):
+    path = attachment.thumbnails.get(str(size))
+    if path is None:
+        raise Http404('No thumbnail of this size.')
+    stem = os.path.splitext(attachment.name or os.path.basename(attachment.file.name))[0]
+    return serve_file(
+        request, attachment.file.storage, path, f'{stem}-{size}.{THUMBNAIL_EXTENSION}',
+        f'image/{THUMBNAIL_EXTENSION}', attachment_etag(attachment, f'-thumb-{size}'),
+        int(attachment.uploaded_at.timestamp()), as_attachment=False
+    )
+
+
+def serve_file(request, storage, path, name, content_type, etag, last_modified, as_attachment=True):
+    """Serve the stored file ``path`` to a client that may see it, as ``name``."""
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = _file_response(
+            request, storage, path, name, content_type, etag, last_modified, as_attachment
+        )
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def _file_response(request, storage, path, name, content_type, etag, last_modified, as_attachment):
+    prefix = settings.TASK_ATTACHMENT_ACCEL_REDIRECT
+    if prefix:
+        # The proxy applies Range and conditional headers to the file itself.
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + quote(path)
+        response['Content-Disposition'] = content_disposition_header(as_attachment, name)
+        return response
+
+    try:
+        size = storage.size(path)
+    except OSError:
+        raise Http404('Attachment file is missing.')
+    byte_range = None
+    if 'HTTP_RANGE' in request.META and if_range_matches(request, etag, last_modified):
+        byte_range = parse_range(request.META['HTTP_RANGE'], size)
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    file = storage.open(path, 'rb')
+    if byte_range is None:
+        response = FileResponse(file, as_attachment=as_attachment, filename=name, content_type=content_type)
+    else:
+        start, end = byte_range
+        response = FileResponse(
+            FileRange(file, start, end - start + 1),
+            as_attachment=as_attachment,
+            filename=name,
+            content_type=content_type,
+            status=206
+        )
+        response['Content-Length'] = end - start + 1
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Accept-Ranges'] = 'bytes'
+    return response
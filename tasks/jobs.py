@@ -0,0 +1,65 @@
+"""Background jobs of the tasks app (see ``jobs.queue``)."""
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from jobs.queue import enqueue, register
+from .models import Task, TaskHistory
+from .thumbnails import generate_thumbnails, is_image
+
+RECORD_HISTORY = 'tasks.record_history'
+RECORD_HISTORY_BATCH = 'tasks.record_history_batch'
+RENDER_THUMBNAILS = 'tasks.render_thumbnails'
+
+
+@register(RECORD_HISTORY)
+def record_history(task_id, changed_at, **fields):
+    # The task may have been deleted before the job ran.
+    if Task.objects.filter(pk=task_id).exists():
+        TaskHistory.objects.create(task_id=task_id, changed_at=parse_datetime(changed_at), **fields)
+
+
+@register(RECORD_HISTORY_BATCH)
+def record_history_batch(changed_at, entries):
+    changed_at = parse_datetime(changed_at)
+    existing = set(Task.objects.filter(pk__in={entry['task_id'] for entry in entries}).values_list('pk', flat=True))
+    TaskHistory.objects.bulk_create([
+        TaskHistory(changed_at=changed_at, **entry) for entry in entries if entry['task_id'] in existing
+    ])
+
+
+def defer_history(task, changed_by, old_status, new_status, notes, old_assigned_to=None,
+                  new_assigned_to=None):
+    """Queue a ``TaskHistory`` row for ``task``, stamped with the current time."""
+    return enqueue(
+        RECORD_HISTORY,
+        task_id=task.pk,
+        changed_at=timezone.now(),
+        changed_by_id=changed_by.pk,
+        old_status=old_status,
+        new_status=new_status,
+        old_assigned_to_id=getattr(old_assigned_to, 'pk', None),
+        new_assigned_to_id=getattr(new_assigned_to, 'pk', None),
+        notes=notes
+    )
+
+
+def defer_history_batch(entries):
+    """
+    Queue one job writing a ``TaskHistory`` row per entry (a dict of the
+    row's ``*_id`` and status fields), all stamped with the current time.
+    """
+    if entries:
+        return enqueue(RECORD_HISTORY_BATCH, changed_at=timezone.now(), entries=entries)
+    return None
+
+
+@register(RENDER_THUMBNAILS)
+def render_thumbnails(attachment_id):
+    # Files already rendered by an earlier, failed attempt are kept.
+    generate_thumbnails(attachment_id)
+
+
+def defer_thumbnails(attachment):
+    """Queue thumbnail rendering for an image ``attachment``; workers see it once it commits."""
+    if is_image(attachment):
+        return enqueue(RENDER_THUMBNAILS, attachment_id=attachment.pk)
+    return None
@@ -0,0 +1,44 @@
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand
+from tasks.models import TaskAttachment
+from tasks.thumbnails import generate_thumbnails, generate_thumbnails_in_worker, is_image
+
+
+class Command(BaseCommand):
+    help = 'Render missing thumbnails for existing image attachments in parallel.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Rendering threads (default: 4; 0 renders in the main thread).'
+        )
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Revisit attachments that already record thumbnails.'
+        )
+
+    def handle(self, *args, **options):
+        attachments = TaskAttachment.objects.exclude(file='').only(
+            'id', 'file', 'name', 'content_type'
+        ).order_by('id')
+        if not options['all']:
+            attachments = attachments.filter(thumbnails={})
+
+        # Attachments sharing a file share thumbnails, so render each file once.
+        pending = {}
+        for attachment in attachments.iterator():
+            if is_image(attachment):
+                pending.setdefault(attachment.file.name, attachment.pk)
+
+        if options['workers'] > 0:
+            with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+                results = list(pool.map(generate_thumbnails_in_worker, pending.values()))
+        else:
+            results = [generate_thumbnails(attachment_id) for attachment_id in pending.values()]
+        rendered = sum(1 for thumbnails in results if thumbnails)
+        self.stdout.write(self.style.SUCCESS(
+            f'Rendered thumbnails for {rendered} of {len(pending)} image file(s).'
+        ))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+from benchmarks.loadtest import add_run_arguments, run_loadtest, write_report
+
+
+class Command(BaseCommand):
+    help = (
+        'Drive every API endpoint with concurrent in-process clients and report latency percentiles, '
+        'queries per request and peak memory as JSON. Writes to the database; run it on a seeded copy.'
+    )
+
+    def add_arguments(self, parser):
+        add_run_arguments(parser)
+        parser.add_argument('--seed', type=int, default=0, help='Random seed of the requests.')
+
+    def handle(self, *args, **options):
+        try:
+            report = run_loadtest(
+                requests=options['requests'],
+                concurrency=options['concurrency'],
+                endpoints=options['endpoints'],
+                memory_samples=options['memory_samples'],
+                seed=options['seed'],
+                progress=lambda name: self.stderr.write(f'.. {name}')
+            )
+        except (RuntimeError, ValueError) as exc:
+            raise CommandError(str(exc))
+        write_report(report, options['output'], self.stdout)
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from tasks.search import fts_enabled, rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index of tasks and their comments.'
+
+    def handle(self, *args, **options):
+        if not fts_enabled():
+            self.stdout.write('Full-text search is not available on this database; nothing to do.')
+            return
+        indexed = rebuild_search_index()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} task(s).'))
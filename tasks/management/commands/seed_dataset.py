@@ -0,0 +1,34 @@
+import time
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from benchmarks.common import seed_dataset
+from benchmarks.loadtest import add_seed_arguments
+
+
+class Command(BaseCommand):
+    help = (
+        'Bulk-insert a synthetic dataset: users with profiles and roles, projects, memberships, '
+        'tasks, comments and history.'
+    )
+
+    def add_arguments(self, parser):
+        add_seed_arguments(parser)
+
+    def handle(self, *args, **options):
+        if get_user_model().objects.filter(username__startswith='bench-user-').exists():
+            raise CommandError('This database is already seeded; use a fresh one.')
+        started = time.perf_counter()
+        fixtures = seed_dataset(
+            users=options['users'],
+            projects=options['projects'],
+            members_per_project=options['members'],
+            tasks=options['tasks'],
+            history_per_task=options['history'],
+            comments_per_task=options['comments'],
+            search_index=True,
+            seed=options['seed']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {len(fixtures["user_ids"])} user(s), {len(fixtures["project_ids"])} project(s) '
+            f'and {len(fixtures["task_ids"])} task(s) in {time.perf_counter() - started:.1f}s.'
+        ))
@@ -0,0 +1,41 @@
+import sqlite3
+import time
+from contextlib import closing
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = 'Copy the default SQLite database into its file replicas (DATABASE_REPLICAS).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('aliases', nargs='*', help='Replicas to refresh; all of them by default.')
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Keep refreshing every this many seconds instead of copying once.'
+        )
+
+    def handle(self, *args, **options):
+        aliases = options['aliases'] or settings.DATABASE_REPLICAS
+        if not aliases:
+            raise CommandError('No replicas are configured in DATABASE_REPLICAS.')
+        unknown = [alias for alias in aliases if alias not in settings.DATABASE_REPLICAS]
+        if unknown:
+            raise CommandError(f'Not in DATABASE_REPLICAS: {", ".join(unknown)}')
+        source = connections[DEFAULT_DB_ALIAS]
+        if source.vendor != 'sqlite':
+            raise CommandError("Only SQLite primaries can be copied; use the database's own replication.")
+
+        while True:
+            source.ensure_connection()
+            for alias in aliases:
+                path = connections.settings[alias]['NAME']
+                # The backup API copies a consistent snapshot; replica readers
+                # wait on their busy timeout while pages are written.
+                with closing(sqlite3.connect(path)) as target:
+                    source.connection.backup(target)
+                self.stdout.write(self.style.SUCCESS(f'Synced {alias} ({path}).'))
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,44 @@
+# Generated by Django 5.1.7 on 2026-10-18 09:56
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_task_access(apps, schema_editor):
+    Task = apps.get_model('tasks', 'Task')
+    TaskAccess = apps.get_model('tasks', 'TaskAccess')
+    pairs = set(Task.objects.values_list('id', 'created_by_id'))
+    pairs.update(
+        Task.objects.filter(assigned_to__isnull=False).values_list('id', 'assigned_to_id')
+    )
+    pairs.update(
+        Task.objects.filter(project__members__isnull=False).values_list('id', 'project__members__user_id')
+    )
+    TaskAccess.objects.bulk_create(
+        [TaskAccess(task_id=task_id, user_id=user_id) for task_id, user_id in pairs],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0002_taskhistory'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskAccess',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='access', to='tasks.task')),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='task_access', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'task')},
+            },
+        ),
+        migrations.RunPython(backfill_task_access, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,55 @@
+import sqlite3
+from contextlib import closing
+from django.db import migrations
+
+# Frozen here rather than imported from tasks.search, which works on the
+# current models and the default connection.
+SEARCH_TABLE = 'tasks_task_search'
+
+
+def fts5_available(connection):
+    if connection.vendor != 'sqlite':
+        return False
+    with closing(sqlite3.connect(':memory:')) as probe:
+        try:
+            probe.execute('CREATE VIRTUAL TABLE probe USING fts5(content)')
+        except sqlite3.OperationalError:
+            return False
+    return True
+
+
+def create_search_index(apps, schema_editor):
+    if not fts5_available(schema_editor.connection):
+        return
+    task_table = apps.get_model('tasks', 'Task')._meta.db_table
+    comment_table = apps.get_model('tasks', 'TaskComment')._meta.db_table
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} "
+        f"USING fts5(title, description, comments, tokenize='unicode61 remove_diacritics 2')"
+    )
+    schema_editor.execute(
+        f'INSERT INTO {SEARCH_TABLE} (rowid, title, description, comments) '
+        f'SELECT t.id, t.title, t.description, '
+        f"(SELECT group_concat(c.content, ' ') FROM {comment_table} c WHERE c.task_id = t.id) "
+        f'FROM {task_table} t'
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if fts5_available(schema_editor.connection):
+        schema_editor.execute(f'DROP TABLE IF EXISTS {SEARCH_TABLE}')
+
+
+class Migration(migrations.Migration):
+    """
+    The FTS5 table is created only on SQLite builds that support it; other
+    databases use the ``icontains`` fallback in ``tasks.search``.
+    """
+
+    dependencies = [
+        ('tasks', '0004_task_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
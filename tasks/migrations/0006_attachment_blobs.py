@@ -0,0 +1,64 @@
+# Generated by Django 5.1.7 on 2026-10-18 10:29
+
+import os
+import django.db.models.deletion
+import tasks.models
+from django.db import migrations, models
+
+
+def backfill_attachment_metadata(apps, schema_editor):
+    TaskAttachment = apps.get_model('tasks', 'TaskAttachment')
+    for attachment in TaskAttachment.objects.exclude(file=''):
+        attachment.name = os.path.basename(attachment.file.name)
+        try:
+            attachment.size = attachment.file.size
+        except OSError:
+            attachment.size = 0
+        attachment.save(update_fields=['name', 'size'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0005_task_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttachmentBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest', models.CharField(max_length=64, unique=True)),
+                ('file', models.FileField(max_length=255, upload_to=tasks.models.blob_upload_to)),
+                ('size', models.BigIntegerField()),
+                ('ref_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='taskattachment',
+            name='content_type',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='taskattachment',
+            name='name',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='taskattachment',
+            name='size',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='taskattachment',
+            name='file',
+            field=models.FileField(max_length=255, upload_to='task_attachments/'),
+        ),
+        migrations.AddField(
+            model_name='taskattachment',
+            name='blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='attachments', to='tasks.attachmentblob'),
+        ),
+        migrations.RunPython(backfill_attachment_metadata, migrations.RunPython.noop),
+    ]
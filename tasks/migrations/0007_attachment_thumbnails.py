@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 10:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0006_attachment_blobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='taskattachment',
+            name='thumbnails',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
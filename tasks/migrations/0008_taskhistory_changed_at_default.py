@@ -0,0 +1,19 @@
+# Generated by Django 5.1.7 on 2026-10-18 10:48
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0007_attachment_thumbnails'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='taskhistory',
+            name='changed_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -1,9 +1,14 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from projects.models import Project
 
 User = get_user_model()
 
+# Task.OPEN_STATUSES, defined out here so Task.Meta's partial indexes use the
+# same list as the queries they serve.
+OPEN_TASK_STATUSES = ['todo', 'in_progress']
+
 class Task(models.Model):
     PRIORITY_HIGH = 'high'
     PRIORITY_MEDIUM = 'medium'
@@ -24,6 +29,7 @@ class Task(models.Model):
         (STATUS_IN_PROGRESS, 'In Progress'),
         (STATUS_COMPLETED, 'Completed'),
     ]
+    OPEN_STATUSES = OPEN_TASK_STATUSES
 
     title = models.CharField(max_length=200)
     description = models.TextField()
@@ -38,15 +44,82 @@ class Task(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # "My tasks" filtered by status.
+            models.Index(fields=['assigned_to', 'status'], name='task_assignee_status_idx'),
+            # Per-project status filters and counter rebuilds.
+            models.Index(fields=['project', 'status'], name='task_project_status_idx'),
+            # Keyset pagination and recent tasks ordering.
+            models.Index(fields=['-updated_at', '-id'], name='task_updated_idx'),
+            # Urgent tasks: open work by priority, most recently touched first.
+            models.Index(
+                fields=['priority', '-updated_at'],
+                name='task_open_priority_idx',
+                condition=models.Q(status__in=OPEN_TASK_STATUSES)
+            ),
+            # Due-date ranges only ever matter for work that is still open.
+            models.Index(
+                fields=['due_date'],
+                name='task_open_due_idx',
+                condition=models.Q(status__in=OPEN_TASK_STATUSES)
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        # Keep the access and counter maintenance done in signals atomic with the row.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            return super().delete(*args, **kwargs)
+
     def __str__(self):
         return self.title
 
+def blob_upload_to(instance, filename):
+    return f'blobs/{instance.digest[:2]}/{instance.digest[2:4]}/{instance.digest}'
+
+class AttachmentBlob(models.Model):
+    """Attachment content stored once per SHA-256 digest and shared by reference."""
+    digest = models.CharField(max_length=64, unique=True)
+    file = models.FileField(upload_to=blob_upload_to, max_length=255)
+    size = models.BigIntegerField()
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.digest
+
 class TaskAttachment(models.Model):
     task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='attachments')
-    file = models.FileField(upload_to='task_attachments/')
+    file = models.FileField(upload_to='task_attachments/', max_length=255)
+    blob = models.ForeignKey(
+        AttachmentBlob,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='attachments'
+    )
+    name = models.CharField(max_length=255, blank=True)
+    content_type = models.CharField(max_length=100, blank=True)
+    size = models.BigIntegerField(default=0)
+    thumbnails = models.JSONField(default=dict, blank=True)
     uploaded_by = models.ForeignKey(User, on_delete=models.CASCADE)
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['task', '-uploaded_at', '-id'], name='taskattach_task_uploaded_idx'),
+        ]
+
     def __str__(self):
         return f"Attachment for {self.task.title}"
 
@@ -57,6 +130,11 @@ class TaskComment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['task', '-created_at', '-id'], name='taskcomment_task_created_idx'),
+        ]
+
     def __str__(self):
         return f"Comment by {self.author.username} on {self.task.title}"
 
@@ -78,5 +156,28 @@ class TaskHistory(models.Model):
         null=True,
         related_name='new_task_assignments'
     )
-    changed_at = models.DateTimeField(auto_now_add=True)
+    # Not auto_now_add: deferred history rows carry the time of the change.
+    changed_at = models.DateTimeField(default=timezone.now)
     notes = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['task', '-changed_at', '-id'], name='taskhistory_task_changed_idx'),
+        ]
+
+
+class TaskAccess(models.Model):
+    """Materialized visibility: one row per user allowed to see a task."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='task_access',
+        db_index=False
+    )
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='access')
+
+    class Meta:
+        unique_together = ['user', 'task']
+
+    def __str__(self):
+        return f"{self.user_id} -> task {self.task_id}"
@@ -0,0 +1,157 @@
+"""
+Full-text search over task titles, descriptions and comments.
+
+On SQLite builds with FTS5 the text of every task lives in the
+``tasks_task_search`` virtual table (``rowid`` = task id), maintained
+incrementally from signals and ranked with ``bm25``. Elsewhere searches fall
+back to ``icontains`` lookups that rank title matches first.
+Both paths only return tasks present in ``TaskAccess`` for the user, the same
+rule ``visible_tasks`` applies.
+"""
+import functools
+from contextlib import closing
+import re
+import sqlite3
+from django.db import connection, transaction
+from django.db.models import Case, Exists, IntegerField, OuterRef, Q, Value, When
+from .access import visible_tasks
+from .models import Task, TaskAccess, TaskComment
+
+SEARCH_TABLE = 'tasks_task_search'
+# bm25 column weights for title, description and comments.
+SEARCH_WEIGHTS = (10.0, 4.0, 1.0)
+SEARCH_FIELDS = ('title', 'description')
+INDEX_BATCH_SIZE = 500
+
+
+@functools.cache
+def _sqlite_has_fts5():
+    with closing(sqlite3.connect(':memory:')) as probe:
+        try:
+            probe.execute('CREATE VIRTUAL TABLE probe USING fts5(content)')
+        except sqlite3.OperationalError:
+            return False
+    return True
+
+
+def fts_enabled(conn=connection):
+    return conn.vendor == 'sqlite' and _sqlite_has_fts5()
+
+
+def _placeholders(values):
+    return ', '.join(['%s'] * len(values))
+
+
+def index_tasks(task_ids):
+    """(Re)index the given tasks from their current rows and comments."""
+    if not fts_enabled():
+        return
+    task_ids = list(task_ids)
+    task_table = Task._meta.db_table
+    comment_table = TaskComment._meta.db_table
+    with connection.cursor() as cursor:
+        for start in range(0, len(task_ids), INDEX_BATCH_SIZE):
+            chunk = task_ids[start:start + INDEX_BATCH_SIZE]
+            cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE rowid IN ({_placeholders(chunk)})', chunk)
+            cursor.execute(
+                f'INSERT INTO {SEARCH_TABLE} (rowid, title, description, comments) '
+                f'SELECT t.id, t.title, t.description, '
+                f"(SELECT group_concat(c.content, ' ') FROM {comment_table} c WHERE c.task_id = t.id) "
+                f'FROM {task_table} t WHERE t.id IN ({_placeholders(chunk)})',
+                chunk
+            )
+
+
+def unindex_tasks(task_ids):
+    if not fts_enabled():
+        return
+    task_ids = list(task_ids)
+    with connection.cursor() as cursor:
+        for start in range(0, len(task_ids), INDEX_BATCH_SIZE):
+            chunk = task_ids[start:start + INDEX_BATCH_SIZE]
+            cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE rowid IN ({_placeholders(chunk)})', chunk)
+
+
+def rebuild_search_index():
+    """Repopulate the whole index and return the number of indexed tasks."""
+    if not fts_enabled():
+        return 0
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+        task_ids = list(Task.objects.values_list('id', flat=True))
+        index_tasks(task_ids)
+    return len(task_ids)
+
+
+def search_terms(query):
+    return re.findall(r'\w+', query)
+
+
+def fts_query(terms):
+    """Turn free text into an FTS5 expression: every term, as a prefix."""
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+class RankedSearch:
+    """
+    Lazily evaluated, sliceable FTS5 result set, so Django's paginator can
+    count and page it. Slices return ``Task`` objects from ``queryset`` in
+    rank order.
+    """
+
+    def __init__(self, user, terms, queryset):
+        self.user = user
+        self.match = fts_query(terms)
+        self.queryset = queryset
+        self.access_table = TaskAccess._meta.db_table
+
+    def _from_clause(self):
+        return (
+            f'FROM {SEARCH_TABLE} s JOIN {self.access_table} a ON a.task_id = s.rowid '
+            f'WHERE {SEARCH_TABLE} MATCH %s AND a.user_id = %s'
+        )
+
+    def count(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) {self._from_clause()}', [self.match, self.user.id])
+            return cursor.fetchone()[0]
+
+    def __getitem__(self, page):
+        weights = ', '.join(str(weight) for weight in SEARCH_WEIGHTS)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT s.rowid {self._from_clause()} '
+                f'ORDER BY bm25({SEARCH_TABLE}, {weights}), s.rowid DESC LIMIT %s OFFSET %s',
+                [self.match, self.user.id, page.stop - page.start, page.start]
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+        tasks = self.queryset.in_bulk(ids)
+        return [tasks[task_id] for task_id in ids if task_id in tasks]
+
+
+def search_tasks(user, query, queryset=None):
+    """
+    Return the user's tasks matching ``query`` best-first, as something the
+    paginator can slice, or ``None`` when the query has no searchable terms.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return None
+    if queryset is None:
+        queryset = visible_tasks(user)
+    if fts_enabled():
+        return RankedSearch(user, terms, queryset)
+
+    matches = Q()
+    in_title = Q()
+    for term in terms:
+        in_title &= Q(title__icontains=term)
+        matches &= (
+            Q(title__icontains=term) |
+            Q(description__icontains=term) |
+            Q(Exists(TaskComment.objects.filter(task=OuterRef('pk'), content__icontains=term)))
+        )
+    return queryset.filter(matches).annotate(
+        rank=Case(When(in_title, then=Value(0)), default=Value(1), output_field=IntegerField())
+    ).order_by('rank', '-updated_at', '-id')
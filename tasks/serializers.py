@@ -1,11 +1,60 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F, OuterRef, Prefetch, Subquery, Window
+from django.db.models.functions import Coalesce, RowNumber
+from django.urls import reverse
 from rest_framework import serializers
+from projects.models import Project
+from task_management.sparse import FieldQuery, SparseFieldsMixin
+from task_management.values import ValuesSerializer
 from .models import Task, TaskAttachment, TaskComment, TaskHistory
 
+User = get_user_model()
+
+class PrefetchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Resolves primary keys from ``context['prefetched'][field_name]``, a dict
+    loaded once for a whole batch, instead of issuing one query per value.
+    """
+    def to_internal_value(self, data):
+        prefetched = self.context.get('prefetched', {}).get(self.field_name)
+        if prefetched is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            instance = prefetched.get(int(data))
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        if instance is None:
+            self.fail('does_not_exist', pk_value=data)
+        return instance
+
 class TaskAttachmentSerializer(serializers.ModelSerializer):
+    # The content is served by the task's attachment routes, which check the
+    # task is visible; the stored files' own media URLs are not exposed.
+    download_url = serializers.SerializerMethodField()
+    thumbnails = serializers.SerializerMethodField()
+
     class Meta:
         model = TaskAttachment
-        fields = ['id', 'file', 'uploaded_by', 'uploaded_at']
-        read_only_fields = ['uploaded_by']
+        fields = [
+            'id', 'download_url', 'name', 'content_type', 'size', 'thumbnails', 'uploaded_by', 'uploaded_at'
+        ]
+        read_only_fields = ['uploaded_by', 'name', 'content_type', 'size']
+
+    def attachment_url(self, route, attachment, **kwargs):
+        url = reverse(route, kwargs={'pk': attachment.task_id, 'attachment_id': attachment.id, **kwargs})
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request is not None else url
+
+    def get_download_url(self, attachment):
+        return self.attachment_url('task-download-attachment', attachment)
+
+    def get_thumbnails(self, attachment):
+        return {
+            size: self.attachment_url('task-attachment-thumbnail', attachment, size=size)
+            for size in attachment.thumbnails
+        }
 
 class TaskCommentSerializer(serializers.ModelSerializer):
     author_name = serializers.CharField(source='author.username', read_only=True)
@@ -15,9 +64,42 @@ class TaskCommentSerializer(serializers.ModelSerializer):
         fields = ['id', 'content', 'author', 'author_name', 'created_at', 'updated_at']
         read_only_fields = ['author']
 
-class TaskSerializer(serializers.ModelSerializer):
-    attachments = TaskAttachmentSerializer(many=True, read_only=True)
-    comments = TaskCommentSerializer(many=True, read_only=True)
+def related_count(model):
+    """Correlated ``COUNT`` of ``model`` rows pointing at the outer task."""
+    return Coalesce(
+        Subquery(
+            model.objects.filter(task=OuterRef('pk')).order_by().values('task').annotate(
+                count=Count('id')
+            ).values('count')
+        ),
+        0
+    )
+
+
+class TaskSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """
+    Comments and attachments are served by their own paginated routes; a task
+    only carries their counts and its latest comment. ``task_read_queryset``
+    annotates the counts and prefetches ``latest_comments`` for a whole page;
+    unannotated instances (e.g. a freshly created task) fall back to queries.
+    """
+    field_queries = {
+        'created_by_name': FieldQuery(only=('created_by__username',), select_related=('created_by',)),
+        'assigned_to_name': FieldQuery(only=('assigned_to__username',), select_related=('assigned_to',)),
+        'comment_count': FieldQuery(annotate={'comment_count': related_count(TaskComment)}),
+        'attachment_count': FieldQuery(annotate={'attachment_count': related_count(TaskAttachment)}),
+        # A sliced prefetch fetches one comment per task in a single window query.
+        'latest_comment': FieldQuery(prefetch_related=(
+            Prefetch(
+                'comments',
+                queryset=TaskComment.objects.select_related('author').order_by('-created_at', '-id')[:1],
+                to_attr='latest_comments'
+            ),
+        )),
+    }
+    comment_count = serializers.SerializerMethodField()
+    attachment_count = serializers.SerializerMethodField()
+    latest_comment = serializers.SerializerMethodField()
     created_by_name = serializers.CharField(source='created_by.username', read_only=True)
     assigned_to_name = serializers.CharField(source='assigned_to.username', read_only=True)
 
@@ -26,10 +108,90 @@ class TaskSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'title', 'description', 'project', 'created_by', 'created_by_name',
             'assigned_to', 'assigned_to_name', 'priority', 'status', 'due_date',
-            'created_at', 'updated_at', 'attachments', 'comments'
+            'created_at', 'updated_at', 'comment_count', 'attachment_count', 'latest_comment'
         ]
         read_only_fields = ['created_by']
 
+    def get_comment_count(self, task):
+        if hasattr(task, 'comment_count'):
+            return task.comment_count
+        return task.comments.count() if task.pk else 0
+
+    def get_attachment_count(self, task):
+        if hasattr(task, 'attachment_count'):
+            return task.attachment_count
+        return task.attachments.count() if task.pk else 0
+
+    def get_latest_comment(self, task):
+        if hasattr(task, 'latest_comments'):
+            latest = task.latest_comments[0] if task.latest_comments else None
+        elif task.pk:
+            latest = task.comments.select_related('author').order_by('-created_at', '-id').first()
+        else:
+            latest = None
+        return TaskCommentSerializer(latest).data if latest is not None else None
+
+class TaskCommentValuesSerializer(ValuesSerializer):
+    serializer_class = TaskCommentSerializer
+    fields = {
+        'id': 'id',
+        'content': 'content',
+        'author': 'author',
+        'author_name': 'author__username',
+        'created_at': 'created_at',
+        'updated_at': 'updated_at',
+    }
+
+class TaskValuesSerializer(ValuesSerializer):
+    """Fast path for ``TaskSerializer`` output on list pages."""
+    serializer_class = TaskSerializer
+    fields = {
+        'id': 'id',
+        'title': 'title',
+        'description': 'description',
+        'project': 'project',
+        'created_by': 'created_by',
+        'created_by_name': 'created_by__username',
+        'assigned_to': 'assigned_to',
+        'assigned_to_name': 'assigned_to__username',
+        'priority': 'priority',
+        'status': 'status',
+        'due_date': 'due_date',
+        'created_at': 'created_at',
+        'updated_at': 'updated_at',
+        'comment_count': related_count(TaskComment),
+        'attachment_count': related_count(TaskAttachment),
+    }
+    attached_fields = ('latest_comment',)
+    skip_null_fields = ('assigned_to_name',)
+
+    def attach_latest_comment(self, rows):
+        comments = TaskCommentValuesSerializer()
+        latest = TaskComment.objects.filter(task_id__in=[row['id'] for row in rows]).annotate(
+            position=Window(
+                RowNumber(), partition_by=F('task_id'), order_by=[F('created_at').desc(), F('id').desc()]
+            )
+        ).filter(position=1)
+        by_task = {comment['task']: comment for comment in comments.values(latest, keys=('task',))}
+        rendered = dict(zip(by_task, comments.to_representation(by_task.values())))
+        for row in rows:
+            row['latest_comment'] = rendered.get(row['id'])
+
+class BulkTaskSerializer(serializers.ModelSerializer):
+    project = PrefetchedPrimaryKeyRelatedField(queryset=Project.objects.all())
+    assigned_to = PrefetchedPrimaryKeyRelatedField(
+        queryset=User.objects.all(),
+        allow_null=True,
+        required=False
+    )
+
+    class Meta:
+        model = Task
+        fields = [
+            'id', 'title', 'description', 'project', 'assigned_to',
+            'priority', 'status', 'due_date'
+        ]
+
 class TaskHistorySerializer(serializers.ModelSerializer):
     changed_by_name = serializers.CharField(source='changed_by.username', read_only=True)
     old_assigned_to_name = serializers.CharField(
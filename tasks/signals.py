@@ -0,0 +1,84 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from projects.access import touch_users
+from projects.counters import adjust_task_counters
+from projects.models import ProjectMember
+from .access import grant_member_access, revoke_member_access, sync_task_access, task_users
+from .attachments import release_blob
+from .models import Task, TaskAttachment, TaskComment
+from .search import SEARCH_FIELDS, index_tasks, unindex_tasks
+
+ACCESS_FIELDS = ('project_id', 'created_by_id', 'assigned_to_id')
+TRACKED_FIELDS = ACCESS_FIELDS + ('status',)
+
+
+@receiver(post_save, sender=Task)
+def task_saved(sender, instance, created, **kwargs):
+    loaded = getattr(instance, '_loaded_values', {})
+    current = {field: getattr(instance, field) for field in TRACKED_FIELDS}
+    changed = {field for field in TRACKED_FIELDS if loaded.get(field) != current[field]}
+
+    if created:
+        adjust_task_counters({(instance.project_id, instance.status): 1})
+    elif changed & {'project_id', 'status'} and 'status' in loaded:
+        adjust_task_counters({
+            (loaded['project_id'], loaded['status']): -1,
+            (instance.project_id, instance.status): 1,
+        })
+
+    if created or changed & set(ACCESS_FIELDS):
+        touch_users(sync_task_access([instance.id]))
+    else:
+        touch_users(task_users([instance.id]))
+
+    if created or any(loaded.get(field) != getattr(instance, field) for field in SEARCH_FIELDS):
+        index_tasks([instance.id])
+    instance._loaded_values = {
+        **loaded, **current, **{field: getattr(instance, field) for field in SEARCH_FIELDS}
+    }
+
+
+@receiver(pre_delete, sender=Task)
+def task_deleting(sender, instance, **kwargs):
+    touch_users(task_users([instance.id]))
+
+
+@receiver(post_delete, sender=Task)
+def task_deleted(sender, instance, **kwargs):
+    loaded = getattr(instance, '_loaded_values', {})
+    adjust_task_counters({
+        (loaded.get('project_id', instance.project_id), loaded.get('status', instance.status)): -1
+    })
+    unindex_tasks([instance.id])
+
+
+@receiver(post_save, sender=ProjectMember)
+def project_member_saved(sender, instance, created, **kwargs):
+    if created:
+        grant_member_access(instance.project_id, instance.user_id)
+
+
+@receiver(post_delete, sender=ProjectMember)
+def project_member_deleted(sender, instance, **kwargs):
+    revoke_member_access(instance.project_id, instance.user_id)
+
+
+@receiver(post_save, sender=TaskComment)
+@receiver(post_delete, sender=TaskComment)
+@receiver(post_save, sender=TaskAttachment)
+@receiver(post_delete, sender=TaskAttachment)
+def task_child_changed(sender, instance, **kwargs):
+    # Comments and attachments are embedded in the task payload.
+    touch_users(task_users([instance.task_id]))
+
+
+@receiver(post_save, sender=TaskComment)
+@receiver(post_delete, sender=TaskComment)
+def task_comment_changed(sender, instance, **kwargs):
+    index_tasks([instance.task_id])
+
+
+@receiver(post_delete, sender=TaskAttachment)
+def task_attachment_deleted(sender, instance, **kwargs):
+    if instance.blob_id is not None:
+        release_blob(instance.blob_id)
@@ -1,9 +1,42 @@
-from django.test import TestCase
+import csv
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import QuerySet
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
+from PIL import Image
 from rest_framework.test import APITestCase
 from rest_framework import status
 from tests.test_utils import TestCaseWithSetup
-from .models import Task, TaskComment, TaskHistory
+from jobs.models import Job
+from jobs.queue import run_pending_jobs
+from accounts.roles import issue_tokens
+from projects.counters import verify_project_counters
+from projects.models import ProjectMember
+from rest_framework.exceptions import ParseError, ValidationError
+from rest_framework.renderers import JSONRenderer
+from task_management.renderers import FastJSONParser, FastJSONRenderer
+from .access import rebuild_task_access, visible_tasks
+from .attachments import QuotaExceeded, attach_upload
+from .models import AttachmentBlob, Task, TaskAccess, TaskAttachment, TaskComment, TaskHistory
+from .search import SEARCH_TABLE, fts_enabled
+from .serializers import TaskSerializer, TaskValuesSerializer
+from .views import task_read_queryset
+
+User = get_user_model()
 
 class TaskModelTests(TestCase, TestCaseWithSetup):
     def setUp(self):
@@ -123,6 +156,94 @@ class TaskModelTests(TestCase, TestCaseWithSetup):
         self.assertEqual(history.old_status, Task.STATUS_TODO)
         self.assertEqual(history.new_status, Task.STATUS_IN_PROGRESS)
 
+class TaskAccessTests(TestCase, TestCaseWithSetup):
+    def setUp(self):
+        self.owner = self.create_test_user('owner')
+        self.assignee = self.create_test_user('assignee')
+        self.member = self.create_test_user('member')
+        self.outsider = self.create_test_user('outsider')
+        self.project = self.create_test_project(self.owner)
+        self.task = Task.objects.create(
+            title='Test Task',
+            description='Test Description',
+            project=self.project,
+            created_by=self.owner,
+            assigned_to=self.assignee,
+            due_date=timezone.now()
+        )
+
+    def visible_users(self, task):
+        return set(task.access.values_list('user__username', flat=True))
+
+    def test_creator_and_assignee_can_see_new_task(self):
+        self.assertEqual(self.visible_users(self.task), {'owner', 'assignee'})
+
+    def test_reassignment_moves_access(self):
+        task = Task.objects.get(id=self.task.id)
+        task.assigned_to = self.outsider
+        task.save()
+        self.assertEqual(self.visible_users(task), {'owner', 'outsider'})
+
+    def test_membership_grants_and_revokes_access(self):
+        membership = ProjectMember.objects.create(project=self.project, user=self.member)
+        self.assertIn('member', self.visible_users(self.task))
+        membership.delete()
+        self.assertNotIn('member', self.visible_users(self.task))
+
+    def test_removing_member_keeps_assignee_access(self):
+        membership = ProjectMember.objects.create(project=self.project, user=self.assignee)
+        membership.delete()
+        self.assertIn('assignee', self.visible_users(self.task))
+
+    def test_moving_task_deletes_stale_access_in_one_query(self):
+        for index in range(5):
+            ProjectMember.objects.create(project=self.project, user=self.create_test_user(f'member{index}'))
+        task = Task.objects.get(id=self.task.id)
+        task.project = self.create_test_project(self.outsider)
+        with CaptureQueriesContext(connection) as queries:
+            task.save()
+        table = TaskAccess._meta.db_table
+        deletes = [query for query in queries if query['sql'].startswith('DELETE') and table in query['sql']]
+        self.assertEqual(len(deletes), 1)
+        self.assertEqual(self.visible_users(task), {'owner', 'assignee'})
+
+    def test_visible_tasks_needs_no_distinct(self):
+        ProjectMember.objects.create(project=self.project, user=self.owner)
+        ProjectMember.objects.create(project=self.project, user=self.assignee)
+        queryset = visible_tasks(self.owner)
+        self.assertNotIn('DISTINCT', str(queryset.query))
+        self.assertEqual(list(queryset), [self.task])
+        self.assertFalse(visible_tasks(self.outsider).exists())
+
+    def test_rebuild_matches_incremental_maintenance(self):
+        ProjectMember.objects.create(project=self.project, user=self.member)
+        expected = set(TaskAccess.objects.values_list('task_id', 'user_id'))
+        rebuild_task_access()
+        self.assertEqual(set(TaskAccess.objects.values_list('task_id', 'user_id')), expected)
+
+@contextmanager
+def write_while_locking(task, **changes):
+    """
+    Apply ``changes`` to ``task`` through another save just as the first task
+    row lock is requested, as a concurrent writer would commit while the lock
+    is awaited. Yields a list that records whether that happened.
+    """
+    select_for_update = QuerySet.select_for_update
+    fired = []
+
+    def locking(queryset, *args, **kwargs):
+        if queryset.model is Task and not fired:
+            fired.append(True)
+            other = Task.objects.get(pk=task.pk)
+            for field, value in changes.items():
+                setattr(other, field, value)
+            other.save()
+        return select_for_update(queryset, *args, **kwargs)
+
+    with mock.patch.object(QuerySet, 'select_for_update', locking):
+        yield fired
+
+
 class TaskAPITests(APITestCase, TestCaseWithSetup):
     def setUp(self):
         self.user = self.create_test_user()
@@ -158,3 +279,1027 @@ class TaskAPITests(APITestCase, TestCaseWithSetup):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         task.refresh_from_db()
         self.assertEqual(task.status, Task.STATUS_IN_PROGRESS)
+
+    def test_counters_follow_status_changed_while_waiting_for_lock(self):
+        task = Task.objects.create(
+            title='Test Task',
+            description='Test Description',
+            project=self.project,
+            created_by=self.user,
+            due_date=timezone.now()
+        )
+        with write_while_locking(task, status=Task.STATUS_COMPLETED) as fired:
+            response = self.client.patch(f'/api/tasks/{task.id}/', {'status': Task.STATUS_COMPLETED})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(fired)
+        self.assertEqual(verify_project_counters(), {})
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.counters.completed_tasks, 1)
+
+    def test_failed_write_request_rolls_back(self):
+        def create_then_fail(view, serializer):
+            serializer.save(created_by=self.user)
+            raise ValidationError({'title': ['Rejected after saving.']})
+
+        with mock.patch('tasks.views.TaskViewSet.perform_create', create_then_fail):
+            response = self.client.post('/api/tasks/', self.task_data)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Task.objects.exists())
+
+    def test_connections_use_sqlite_profile(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 20000)
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+        self.assertEqual(connection.transaction_mode, 'IMMEDIATE')
+
+    def create_task_with_relations(self, index):
+        assignee = User.objects.create_user(
+            username=f'assignee{index}',
+            password='testpass123'
+        )
+        task = Task.objects.create(
+            title=f'Task {index}',
+            description='Test Description',
+            project=self.project,
+            created_by=self.user,
+            assigned_to=assignee,
+            due_date=timezone.now()
+        )
+        TaskAttachment.objects.create(task=task, file='test.txt', uploaded_by=self.user)
+        for _ in range(2):
+            TaskComment.objects.create(task=task, author=assignee, content='Comment')
+        return task
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(context.captured_queries)
+
+    def test_list_query_count_is_constant(self):
+        self.create_task_with_relations(0)
+        baseline = self.count_queries('/api/tasks/')
+        for index in range(1, 10):
+            self.create_task_with_relations(index)
+        self.assertEqual(self.count_queries('/api/tasks/'), baseline)
+
+    def test_retrieve_query_count_is_constant(self):
+        task = self.create_task_with_relations(0)
+        baseline = self.count_queries(f'/api/tasks/{task.id}/')
+        for _ in range(5):
+            TaskComment.objects.create(task=task, author=self.user, content='More')
+            TaskAttachment.objects.create(task=task, file='more.txt', uploaded_by=self.user)
+        self.assertEqual(self.count_queries(f'/api/tasks/{task.id}/'), baseline)
+
+    def test_list_not_modified_skips_serialization(self):
+        self.create_task_with_relations(0)
+        response = self.client.get('/api/tasks/')
+        self.assertIn('ETag', response)
+        self.assertIn('Last-Modified', response)
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/tasks/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_list_etag_changes_with_query_and_data(self):
+        task = self.create_task_with_relations(0)
+        etag = self.client.get('/api/tasks/')['ETag']
+        self.assertNotEqual(self.client.get('/api/tasks/?page_size=1')['ETag'], etag)
+        with self.captureOnCommitCallbacks(execute=True):
+            task.status = Task.STATUS_COMPLETED
+            task.save()
+        response = self.client.get('/api/tasks/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_retrieve_revalidates_after_comment(self):
+        task = self.create_task_with_relations(0)
+        response = self.client.get(f'/api/tasks/{task.id}/')
+        etag, last_modified = response['ETag'], response['Last-Modified']
+        response = self.client.get(f'/api/tasks/{task.id}/', HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        with self.captureOnCommitCallbacks(execute=True):
+            TaskComment.objects.create(task=task, author=self.user, content='New')
+        response = self.client.get(f'/api/tasks/{task.id}/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['comment_count'], 3)
+        self.assertEqual(response.data['latest_comment']['content'], 'New')
+
+    def test_retrieve_missing_task_is_not_conditional(self):
+        response = self.client.get('/api/tasks/999/', HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get('/api/tasks/abc/').status_code, status.HTTP_404_NOT_FOUND)
+
+    def collect_pages(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids.extend(task['id'] for task in response.data['results'])
+            url = response.data['next']
+        return ids
+
+    def test_list_is_keyset_paginated(self):
+        tasks = [
+            Task.objects.create(
+                title=f'Task {index}',
+                description='Test Description',
+                project=self.project,
+                created_by=self.user,
+                due_date=timezone.now()
+            )
+            for index in range(5)
+        ]
+        # Identical updated_at values must still page by id without gaps.
+        Task.objects.update(updated_at=timezone.now())
+        ids = self.collect_pages('/api/tasks/?page_size=2')
+        self.assertEqual(ids, sorted((task.id for task in tasks), reverse=True))
+
+        response = self.client.get('/api/tasks/?page_size=2')
+        second_page = self.client.get(response.data['next'])
+        previous_page = self.client.get(second_page.data['previous'])
+        self.assertEqual(previous_page.data['results'], response.data['results'])
+        self.assertIsNone(previous_page.data['previous'])
+
+    def test_list_rejects_invalid_cursor(self):
+        response = self.client.get('/api/tasks/?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_history_is_paginated(self):
+        task = Task.objects.create(
+            title='Test Task',
+            description='Test Description',
+            project=self.project,
+            created_by=self.user,
+            due_date=timezone.now()
+        )
+        for new_status in [Task.STATUS_IN_PROGRESS, Task.STATUS_COMPLETED, Task.STATUS_TODO]:
+            self.client.post(f'/api/tasks/{task.id}/change_status/', {'status': new_status})
+        self.assertEqual(run_pending_jobs(), 3)
+        ids = self.collect_pages(f'/api/tasks/{task.id}/history/?page_size=2')
+        expected = list(task.history.order_by('-changed_at', '-id').values_list('id', flat=True))
+        self.assertEqual(len(expected), 3)
+        self.assertEqual(ids, expected)
+
+    def test_history_is_written_by_a_background_job(self):
+        task = Task.objects.create(
+            title='Test Task',
+            description='Test Description',
+            project=self.project,
+            created_by=self.user,
+            due_date=timezone.now()
+        )
+        before = timezone.now()
+        response = self.client.patch(
+            f'/api/tasks/{task.id}/', {'status': Task.STATUS_IN_PROGRESS}, format='json'
+        )
+        after = timezone.now()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(task.history.exists())
+        self.assertEqual(Job.objects.get().name, 'tasks.record_history')
+
+        self.assertEqual(run_pending_jobs(), 1)
+        history = task.history.get()
+        self.assertEqual(history.old_status, Task.STATUS_TODO)
+        self.assertEqual(history.new_status, Task.STATUS_IN_PROGRESS)
+        self.assertEqual(history.changed_by, self.user)
+        # Stamped with the time of the change, not of the job run.
+        self.assertTrue(before <= history.changed_at <= after)
+
+    def test_history_job_skips_deleted_tasks(self):
+        task = Task.objects.create(
+            title='Test Task',
+            description='Test Description',
+            project=self.project,
+            created_by=self.user,
+            due_date=timezone.now()
+        )
+        self.client.post(f'/api/tasks/{task.id}/change_status/', {'status': Task.STATUS_COMPLETED})
+        task.delete()
+        self.assertEqual(run_pending_jobs(), 1)
+        self.assertFalse(TaskHistory.objects.exists())
+
+    def test_batched_history_job_skips_deleted_tasks(self):
+        tasks = [
+            Task.objects.create(
+                title=f'Task {index}',
+                description='Test Description',
+                project=self.project,
+                created_by=self.user,
+                due_date=timezone.now()
+            )
+            for index in range(2)
+        ]
+        self.client.post('/api/tasks/bulk_status/', {
+            'status': Task.STATUS_COMPLETED, 'ids': [task.id for task in tasks]
+        }, format='json')
+        tasks[0].delete()
+        self.assertEqual(run_pending_jobs(), 1)
+        self.assertEqual(list(TaskHistory.objects.values_list('task_id', flat=True)), [tasks[1].id])
+
+class TaskAsyncAPITests(APITestCase, TestCaseWithSetup):
+    def setUp(self):
+        self.user = self.create_test_user()
+        self.project = self.create_test_project(self.user)
+        self.task = Task.objects.create(
+            title='Async Task',
+            description='Test Description',
+            project=self.project,
+            created_by=self.user,
+            due_date=timezone.now()
+        )
+        TaskComment.objects.create(task=self.task, author=self.user, content='First')
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {issue_tokens(self.user).access_token}'}
+
+    @override_settings(ASYNC_SYNC_WORKERS=0)
+    def test_async_reads_match_sync(self):
+        for sync_url, async_url in (
+            ('/api/tasks/', '/api/async/tasks/'),
+            (f'/api/tasks/{self.task.id}/', f'/api/async/tasks/{self.task.id}/'),
+        ):
+            expected = self.client.get(sync_url, **self.auth).json()
+            response = self.client.get(async_url, **self.auth)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.json(), expected)
+
+    @override_settings(ASYNC_SYNC_WORKERS=0)
+    def test_async_retrieve_not_modified(self):
+        url = f'/api/async/tasks/{self.task.id}/'
+        etag = self.client.get(url, **self.auth)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag, **self.auth)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.task.title = 'Renamed'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.task.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag, **self.auth)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['title'], 'Renamed')
+
+    @override_settings(ASYNC_SYNC_WORKERS=0)
+    def test_async_retrieve_hidden_task(self):
+        other = self.create_test_user('outsider')
+        response = self.client.get(
+            f'/api/async/tasks/{self.task.id}/',
+            HTTP_AUTHORIZATION=f'Bearer {issue_tokens(other).access_token}'
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_async_requires_valid_token(self):
+        response = self.client.get('/api/async/tasks/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        response = self.client.get('/api/async/tasks/', HTTP_AUTHORIZATION='Bearer nonsense')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class TaskSubResourceAPITests(APITestCase, TestCaseWithSetup):
+    def setUp(self):
+        self.user = self.create_test_user()
+        self.client.force_authenticate(user=self.user)
+        self.project = self.create_test_project(self.user)
+        self.task = Task.objects.create(
+            title='Test Task',
+            description='Test Description',
+            project=self.project,
+            created_by=self.user,
+            due_date=timezone.now()
+        )
+
+    def test_task_carries_counts_and_latest_comment(self):
+        response = self.client.get(f'/api/tasks/{self.task.id}/')
+        self.assertEqual(response.data['comment_count'], 0)
+        self.assertEqual(response.data['attachment_count'], 0)
+        self.assertIsNone(response.data['latest_comment'])
+        self.assertNotIn('comments', response.data)
+        self.assertNotIn('attachments', response.data)
+
+        for index in range(3):
+            TaskComment.objects.create(task=self.task, author=self.user, content=f'Comment {index}')
+        TaskAttachment.objects.create(task=self.task, file='test.txt', uploaded_by=self.user)
+        response = self.client.get('/api/tasks/')
+        [task] = response.data['results']
+        self.assertEqual(task['comment_count'], 3)
+        self.assertEqual(task['attachment_count'], 1)
+        self.assertEqual(task['latest_comment']['content'], 'Comment 2')
+
+    def test_comments_are_paginated(self):
+        comments = [
+            TaskComment.objects.create(task=self.task, author=self.user, content=f'Comment {index}')
+            for index in range(5)
+        ]
+        response = self.client.get(f'/api/tasks/{self.task.id}/comments/?page_size=2')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        ids = [comment['id'] for comment in response.data['results']]
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            ids += [comment['id'] for comment in response.data['results']]
+        self.assertEqual(ids, [comment.id for comment in reversed(comments)])
+
+    def test_add_comment(self):
+        response = self.client.post(
+            f'/api/tasks/{self.task.id}/comments/', {'content': 'Looks good'}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['author'], self.user.id)
+        self.assertEqual(self.task.comments.get().content, 'Looks good')
+
+        response = self.client.post(f'/api/tasks/{self.task.id}/comments/', {}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_sub_resources_follow_task_visibility(self):
+        TaskComment.objects.create(task=self.task, author=self.user, content='Private')
+        self.client.force_authenticate(user=self.create_test_user('outsider'))
+        for url in (f'/api/tasks/{self.task.id}/comments/', f'/api/tasks/{self.task.id}/attachments/'):
+            self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.post(
+            f'/api/tasks/{self.task.id}/comments/', {'content': 'Hi'}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_sparse_fields_trim_payload_and_query(self):
+        TaskComment.objects.create(task=self.task, author=self.user, content='Comment')
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/api/tasks/?fields=id,title,status')
+        self.assertEqual(response.data['results'], [
+            {'id': self.task.id, 'title': 'Test Task', 'status': Task.STATUS_TODO}
+        ])
+        # The visibility version, the validator aggregate and one narrow page
+        # query: no joins or prefetches.
+        self.assertEqual(len(context.captured_queries), 3)
+        page_sql = context.captured_queries[-1]['sql']
+        self.assertNotIn('auth_user', page_sql)
+        self.assertNotIn('description', page_sql)
+
+        response = self.client.get(f'/api/tasks/{self.task.id}/?fields=id,latest_comment')
+        self.assertEqual(response.data['latest_comment']['content'], 'Comment')
+
+        response = self.client.get('/api/tasks/?fields=id,secret')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_attachments_are_paginated(self):
+        for index in range(3):
+            TaskAttachment.objects.create(task=self.task, file=f'test{index}.txt', uploaded_by=self.user)
+        response = self.client.get(f'/api/tasks/{self.task.id}/attachments/?page_size=2')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNotNone(response.data['next'])
+
+
+class TaskValuesSerializerTests(TestCase, TestCaseWithSetup):
+    def setUp(self):
+        self.user = self.create_test_user()
+        self.project = self.create_test_project(self.user)
+        assignee = self.create_test_user('assignee')
+        for index in range(3):
+            task = Task.objects.create(
+                title=f'Task {index}\u2028',
+                description='Test Description',
+                project=self.project,
+                created_by=self.user,
+                assigned_to=assignee if index else None,
+                due_date=timezone.now()
+            )
+            for _ in range(index):
+                TaskComment.objects.create(task=task, author=assignee, content=f'Comment on {index}')
+            TaskAttachment.objects.create(task=task, file='test.txt', uploaded_by=self.user)
+
+    def test_values_path_renders_like_the_serializer(self):
+        queryset = task_read_queryset(self.user).order_by('-updated_at', '-id')
+        expected = JSONRenderer().render(TaskSerializer(queryset, many=True).data)
+        rows = TaskValuesSerializer().serialize(visible_tasks(self.user).order_by('-updated_at', '-id'))
+        self.assertEqual(FastJSONRenderer().render(rows), expected)
+
+    def test_renderer_keeps_datetime_microseconds(self):
+        moment = datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=dt_timezone.utc)
+        self.assertEqual(FastJSONRenderer().render({'at': moment}), b'{"at":"2024-05-01T12:30:15.123456Z"}')
+
+    def test_parser_round_trip(self):
+        payload = {'title': 'Caf\u00e9', 'ids': [1, 2], 'nested': {'ok': True}}
+        parsed = FastJSONParser().parse(io.BytesIO(FastJSONRenderer().render(payload)))
+        self.assertEqual(parsed, payload)
+        with self.assertRaises(ParseError):
+            FastJSONParser().parse(io.BytesIO(b'{"title": '))
+
+
+class TaskBulkAPITests(APITestCase, TestCaseWithSetup):
+    def setUp(self):
+        self.user = self.create_test_user()
+        self.member = self.create_test_user('member')
+        self.client.force_authenticate(user=self.user)
+        self.project = self.create_test_project(self.user)
+        ProjectMember.objects.create(project=self.project, user=self.member)
+
+    def task_payload(self, index, **extra):
+        return {
+            'title': f'Bulk Task {index}',
+            'description': 'Bulk Description',
+            'project': self.project.id,
+            'due_date': timezone.now().isoformat(),
+            **extra
+        }
+
+    def test_bulk_create_uses_batched_queries(self):
+        payload = [self.task_payload(index) for index in range(50)]
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post('/api/tasks/bulk/', payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['created'], 50)
+        self.assertLess(len(context.captured_queries), 20)
+        self.assertEqual(Task.objects.count(), 50)
+        self.assertEqual(TaskAccess.objects.filter(user=self.member).count(), 50)
+        self.assertEqual(verify_project_counters(), {})
+
+    def test_bulk_update_writes_history_in_one_batch(self):
+        tasks = [
+            Task.objects.create(
+                title=f'Task {index}',
+                description='Test Description',
+                project=self.project,
+                created_by=self.user,
+                due_date=timezone.now()
+            )
+            for index in range(3)
+        ]
+        payload = [
+            {'id': tasks[0].id, 'status': Task.STATUS_COMPLETED},
+            {'id': tasks[1].id, 'assigned_to': self.member.id},
+            {'id': tasks[2].id, 'title': 'Renamed'},
+        ]
+        response = self.client.post('/api/tasks/bulk/', payload, format='json')
+        self.assertEqual(response.data['updated'], 3)
+        self.assertFalse(TaskHistory.objects.exists())
+        self.assertEqual(Job.objects.get().name, 'tasks.record_history_batch')
+        self.assertEqual(run_pending_jobs(), 1)
+        self.assertEqual(TaskHistory.objects.count(), 2)
+        self.assertEqual(
+            TaskHistory.objects.get(task=tasks[1]).new_assigned_to_id, self.member.id
+        )
+        tasks[0].refresh_from_db()
+        self.assertEqual(tasks[0].status, Task.STATUS_COMPLETED)
+        self.assertTrue(TaskAccess.objects.filter(task=tasks[1], user=self.member).exists())
+        self.assertEqual(Task.objects.get(id=tasks[2].id).title, 'Renamed')
+        self.assertEqual(verify_project_counters(), {})
+
+    def test_bulk_update_counters_follow_status_changed_while_waiting_for_lock(self):
+        task = Task.objects.create(
+            title='Task',
+            description='Test Description',
+            project=self.project,
+            created_by=self.user,
+            due_date=timezone.now()
+        )
+        with write_while_locking(task, status=Task.STATUS_COMPLETED) as fired:
+            response = self.client.post(
+                '/api/tasks/bulk/', [{'id': task.id, 'status': Task.STATUS_COMPLETED}], format='json'
+            )
+        self.assertEqual(response.data['updated'], 1)
+        self.assertTrue(fired)
+        self.assertEqual(verify_project_counters(), {})
+
+    def test_bulk_reports_per_item_errors(self):
+        outsider = self.create_test_user('outsider')
+        other_project = self.create_test_project(outsider)
+        hidden = Task.objects.create(
+            title='Hidden',
+            description='Test Description',
+            project=other_project,
+            created_by=outsider,
+            due_date=timezone.now()
+        )
+        payload = [
+            self.task_payload(0),
+            self.task_payload(1, project=999999),
+            {'id': hidden.id, 'status': Task.STATUS_COMPLETED},
+            self.task_payload(3, status='bogus'),
+        ]
+        response = self.client.post('/api/tasks/bulk/', payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(response.data['failed'], 3)
+        errors = {result['index']: result['errors'] for result in response.data['results'] if 'errors' in result}
+        self.assertEqual(set(errors), {1, 2, 3})
+        self.assertIn('project', errors[1])
+        self.assertIn('id', errors[2])
+        self.assertIn('status', errors[3])
+        hidden.refresh_from_db()
+        self.assertEqual(hidden.status, Task.STATUS_TODO)
+
+    def test_bulk_requires_a_list(self):
+        response = self.client.post('/api/tasks/bulk/', self.task_payload(0), format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+class TaskBulkStatusAPITests(APITestCase, TestCaseWithSetup):
+    def setUp(self):
+        self.user = self.create_test_user()
+        self.client.force_authenticate(user=self.user)
+        self.project = self.create_test_project(self.user)
+
+    def create_tasks(self, count, task_status=Task.STATUS_TODO, project=None, user=None):
+        return [
+            Task.objects.create(
+                title=f'Task {index}',
+                description='Test Description',
+                project=project or self.project,
+                created_by=user or self.user,
+                status=task_status,
+                due_date=timezone.now()
+            )
+            for index in range(count)
+        ]
+
+    def post_status(self, payload):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post('/api/tasks/bulk_status/', payload, format='json')
+        return response, len(context.captured_queries)
+
+    def test_bulk_status_by_ids(self):
+        todo = self.create_tasks(3)
+        done = self.create_tasks(1, Task.STATUS_COMPLETED)
+        outsider = self.create_test_user('outsider')
+        hidden = self.create_tasks(1, project=self.create_test_project(outsider), user=outsider)
+        ids = [task.id for task in todo + done + hidden]
+        response, _ = self.post_status({'status': Task.STATUS_COMPLETED, 'ids': ids})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'changed': 3, 'unchanged': 1, 'forbidden': 1})
+        self.assertEqual(Task.objects.filter(status=Task.STATUS_COMPLETED).count(), 4)
+        self.assertEqual(run_pending_jobs(), 1)
+        self.assertEqual(TaskHistory.objects.filter(new_status=Task.STATUS_COMPLETED).count(), 3)
+        self.assertEqual(Task.objects.get(id=hidden[0].id).status, Task.STATUS_TODO)
+        self.assertEqual(verify_project_counters(), {})
+
+    def test_bulk_status_by_filter_uses_constant_queries(self):
+        self.create_tasks(2)
+        _, few = self.post_status({
+            'status': Task.STATUS_IN_PROGRESS,
+            'filter': {'project': self.project.id, 'status': Task.STATUS_TODO}
+        })
+        self.create_tasks(20)
+        response, many = self.post_status({
+            'status': Task.STATUS_IN_PROGRESS,
+            'filter': {'project': self.project.id, 'status': Task.STATUS_TODO}
+        })
+        self.assertEqual(response.data['changed'], 20)
+        self.assertEqual(few, many)
+
+    def test_bulk_status_validation(self):
+        for payload in [
+            {'status': 'bogus', 'ids': [1]},
+            {'status': Task.STATUS_COMPLETED},
+            {'status': Task.STATUS_COMPLETED, 'ids': [1], 'filter': {'status': Task.STATUS_TODO}},
+            {'status': Task.STATUS_COMPLETED, 'filter': {'title': 'x'}},
+            {'status': Task.STATUS_COMPLETED, 'filter': {'project': 'abc'}},
+        ]:
+            response, _ = self.post_status(payload)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, payload)
+
+@override_settings(EXPORT_CHUNK_SIZE=2)
+class TaskExportAPITests(APITestCase, TestCaseWithSetup):
+    def setUp(self):
+        self.user = self.create_test_user()
+        self.client.force_authenticate(user=self.user)
+        self.project = self.create_test_project(self.user)
+        self.tasks = [
+            Task.objects.create(
+                title=f'Task {index}',
+                description='Line one, "quoted"\nline two',
+                project=self.project,
+                created_by=self.user,
+                status=Task.STATUS_COMPLETED if index % 2 else Task.STATUS_TODO,
+                due_date=timezone.now()
+            )
+            for index in range(5)
+        ]
+        outsider = self.create_test_user('outsider')
+        Task.objects.create(
+            title='Hidden',
+            description='Test Description',
+            project=self.create_test_project(outsider),
+            created_by=outsider,
+            due_date=timezone.now()
+        )
+
+    def read(self, response):
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_export_ndjson(self):
+        body = self.read(self.client.get('/api/tasks/export/?format=ndjson'))
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([row['id'] for row in rows], [task.id for task in self.tasks])
+        self.assertEqual(rows[0]['project_name'], 'Test Project')
+        self.assertEqual(rows[0]['created_by_name'], 'testuser')
+        self.assertIsNone(rows[0]['assigned_to_name'])
+
+    def test_export_csv_with_filters(self):
+        response = self.client.get(
+            f'/api/tasks/export/?format=csv&status={Task.STATUS_COMPLETED}&project={self.project.id}'
+        )
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        rows = list(csv.DictReader(self.read(response).splitlines(keepends=True)))
+        self.assertEqual([int(row['id']) for row in rows], [self.tasks[1].id, self.tasks[3].id])
+        self.assertEqual(rows[0]['description'], 'Line one, "quoted"\nline two')
+
+    def test_export_date_range(self):
+        Task.objects.filter(id=self.tasks[0].id).update(updated_at=timezone.now() - timedelta(days=10))
+        since = (timezone.now() - timedelta(days=1)).isoformat().replace('+', '%2B')
+        body = self.read(self.client.get(f'/api/tasks/export/?format=ndjson&since={since}'))
+        self.assertEqual(len(body.splitlines()), 4)
+
+    def test_export_rejects_bad_filters(self):
+        response = self.client.get('/api/tasks/export/?format=csv&status=bogus')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_history(self):
+        self.client.post('/api/tasks/bulk_status/', {
+            'status': Task.STATUS_IN_PROGRESS,
+            'ids': [task.id for task in self.tasks]
+        }, format='json')
+        run_pending_jobs()
+        body = self.read(self.client.get('/api/tasks/export/history/?format=ndjson'))
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual(len(rows), 5)
+        self.assertEqual({row['new_status'] for row in rows}, {Task.STATUS_IN_PROGRESS})
+        self.assertEqual(rows[0]['changed_by_name'], 'testuser')
+
+
+class TaskSearchAPITests(APITestCase, TestCaseWithSetup):
+    def setUp(self):
+        self.user = self.create_test_user()
+        self.client.force_authenticate(user=self.user)
+        self.project = self.create_test_project(self.user)
+        self.in_title = self.create_task('Deploy release', 'Ship it')
+        self.in_description = self.create_task('Prepare notes', 'Draft the release notes')
+        self.in_comment = self.create_task('Sync meeting', 'Weekly')
+        TaskComment.objects.create(task=self.in_comment, author=self.user, content='Blocks the release')
+        self.create_task('Unrelated', 'Nothing to see')
+
+        outsider = self.create_test_user('outsider')
+        Task.objects.create(
+            title='Hidden release',
+            description='Test Description',
+            project=self.create_test_project(outsider),
+            created_by=outsider,
+            due_date=timezone.now()
+        )
+
+    def create_task(self, title, description):
+        return Task.objects.create(
+            title=title,
+            description=description,
+            project=self.project,
+            created_by=self.user,
+            due_date=timezone.now()
+        )
+
+    def search(self, query, expected_status=status.HTTP_200_OK):
+        response = self.client.get('/api/tasks/search/', {'q': query})
+        self.assertEqual(response.status_code, expected_status)
+        return response
+
+    def result_ids(self, query):
+        return [task['id'] for task in self.search(query).data['results']]
+
+    def test_search_is_ranked_and_respects_visibility(self):
+        response = self.search('release')
+        self.assertEqual(response.data['count'], 3)
+        ids = [task['id'] for task in response.data['results']]
+        self.assertEqual(ids[0], self.in_title.id)
+        self.assertEqual(set(ids), {self.in_title.id, self.in_description.id, self.in_comment.id})
+
+    def test_search_matches_prefixes_and_all_terms(self):
+        self.assertEqual(self.result_ids('depl'), [self.in_title.id])
+        self.assertEqual(self.result_ids('release notes'), [self.in_description.id])
+
+    def test_search_is_paginated(self):
+        response = self.client.get('/api/tasks/search/', {'q': 'release', 'page_size': 2})
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNotNone(response.data['next'])
+
+    def test_search_index_follows_edits(self):
+        self.in_title.title = 'Deploy build'
+        self.in_title.save()
+        TaskComment.objects.filter(task=self.in_comment).delete()
+        self.in_description.delete()
+        self.assertEqual(self.result_ids('release'), [])
+        self.assertEqual(self.result_ids('build'), [self.in_title.id])
+
+    def test_bulk_writes_are_indexed(self):
+        response = self.client.post('/api/tasks/bulk/', [
+            {'title': 'Bulk release', 'description': 'New', 'project': self.project.id,
+             'due_date': timezone.now().isoformat()},
+            {'id': self.in_title.id, 'title': 'Renamed'},
+        ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        created_id = response.data['results'][0]['id']
+        self.assertEqual(self.result_ids('bulk'), [created_id])
+        self.assertNotIn(self.in_title.id, self.result_ids('release'))
+
+    def test_search_requires_terms(self):
+        self.search('', status.HTTP_400_BAD_REQUEST)
+        self.search('"*', status.HTTP_400_BAD_REQUEST)
+
+    def test_fallback_without_fts(self):
+        with mock.patch('tasks.search.fts_enabled', return_value=False):
+            self.assertEqual(self.result_ids('release')[0], self.in_title.id)
+            self.assertEqual(len(self.result_ids('release')), 3)
+            self.assertEqual(self.result_ids('release notes'), [self.in_description.id])
+
+    def test_rebuild_command_restores_index(self):
+        if not fts_enabled():
+            self.skipTest('FTS5 is not available')
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+        self.assertEqual(self.result_ids('release'), [])
+        call_command('rebuild_search_index', stdout=mock.Mock())
+        self.assertEqual(len(self.result_ids('release')), 3)
+
+
+class AttachmentTestSetup(TestCaseWithSetup):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.user = self.create_test_user()
+        self.client.force_authenticate(user=self.user)
+        self.project = self.create_test_project(self.user)
+        self.tasks = [
+            Task.objects.create(
+                title=f'Task {index}',
+                description='Test Description',
+                project=self.project,
+                created_by=self.user,
+                due_date=timezone.now()
+            )
+            for index in range(2)
+        ]
+
+    def upload(self, task, content, name='spec.pdf'):
+        return self.client.post(
+            f'/api/tasks/{task.id}/attachments/',
+            {'file': SimpleUploadedFile(name, content, content_type='application/pdf')},
+            format='multipart'
+        )
+
+
+class TaskAttachmentUploadTests(AttachmentTestSetup, APITestCase):
+    def test_upload_streams_and_records_metadata(self):
+        response = self.upload(self.tasks[0], b'spec contents')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['name'], 'spec.pdf')
+        self.assertEqual(response.data['size'], 13)
+        attachment = TaskAttachment.objects.get()
+        self.assertEqual(attachment.blob.digest, hashlib.sha256(b'spec contents').hexdigest())
+        with attachment.file.open() as handle:
+            self.assertEqual(handle.read(), b'spec contents')
+
+    def test_attachments_link_the_checked_download_route(self):
+        self.upload(self.tasks[0], b'spec contents')
+        attachment = TaskAttachment.objects.get()
+        result = self.client.get(f'/api/tasks/{self.tasks[0].id}/attachments/').data['results'][0]
+        self.assertNotIn('file', result)
+        self.assertEqual(
+            result['download_url'],
+            f'http://testserver/api/tasks/{self.tasks[0].id}/attachments/{attachment.id}/download/'
+        )
+        response = self.client.get(result['download_url'])
+        self.assertEqual(b''.join(response.streaming_content), b'spec contents')
+
+    def test_raw_body_upload(self):
+        response = self.client.generic(
+            'POST', f'/api/tasks/{self.tasks[0].id}/attachments/', b'raw bytes',
+            content_type='application/octet-stream',
+            HTTP_CONTENT_DISPOSITION='attachment; filename="logo.png"'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['name'], 'logo.png')
+        self.assertEqual(response.data['size'], 9)
+
+    def test_identical_uploads_share_one_blob(self):
+        for task in self.tasks:
+            self.upload(task, b'same logo')
+        self.upload(self.tasks[0], b'same logo', name='copy.pdf')
+        blob = AttachmentBlob.objects.get()
+        self.assertEqual(blob.ref_count, 3)
+        self.assertEqual(TaskAttachment.objects.filter(blob=blob).count(), 3)
+        self.assertEqual(len(default_storage.listdir(os.path.dirname(blob.file.name))[1]), 1)
+
+    def test_blob_removed_with_last_reference(self):
+        for task in self.tasks:
+            self.upload(task, b'shared')
+        blob = AttachmentBlob.objects.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tasks[0].delete()
+        blob.refresh_from_db()
+        self.assertEqual(blob.ref_count, 1)
+        self.assertTrue(default_storage.exists(blob.file.name))
+        with self.captureOnCommitCallbacks(execute=True):
+            TaskAttachment.objects.get().delete()
+        self.assertFalse(AttachmentBlob.objects.exists())
+        self.assertFalse(default_storage.exists(blob.file.name))
+
+    @override_settings(TASK_ATTACHMENT_PROJECT_QUOTA=100)
+    def test_quota_is_enforced_while_streaming(self):
+        self.assertEqual(self.upload(self.tasks[0], b'x' * 60).status_code, status.HTTP_201_CREATED)
+        response = self.upload(self.tasks[1], b'y' * 60)
+        self.assertEqual(response.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        self.assertEqual(TaskAttachment.objects.count(), 1)
+        self.assertEqual(AttachmentBlob.objects.count(), 1)
+
+    def test_concurrent_first_uploads_share_one_blob(self):
+        content = b'raced upload'
+        digest = hashlib.sha256(content).hexdigest()
+        save = default_storage.save
+        saved = []
+
+        def save_after_competitor(name, *args, **kwargs):
+            # Another upload of the same content records its blob first.
+            AttachmentBlob.objects.create(digest=digest, file='blobs/competitor', size=len(content), ref_count=1)
+            saved.append(save(name, *args, **kwargs))
+            return saved[-1]
+
+        with mock.patch.object(default_storage, 'save', side_effect=save_after_competitor):
+            response = self.upload(self.tasks[0], content)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        blob = AttachmentBlob.objects.get()
+        self.assertEqual((blob.file.name, blob.ref_count), ('blobs/competitor', 2))
+        self.assertFalse(default_storage.exists(saved[0]))
+
+    @override_settings(TASK_ATTACHMENT_PROJECT_QUOTA=100)
+    def test_quota_is_checked_again_when_recording(self):
+        self.assertEqual(self.upload(self.tasks[0], b'x' * 60).status_code, status.HTTP_201_CREATED)
+        # A concurrent upload that passed the streaming check before the first was recorded.
+        upload = SimpleUploadedFile('late.pdf', b'y' * 60)
+        upload.sha256 = hashlib.sha256(b'y' * 60).hexdigest()
+        with self.assertRaises(QuotaExceeded):
+            attach_upload(self.tasks[1], self.user, upload)
+        self.assertEqual(TaskAttachment.objects.count(), 1)
+
+    def test_upload_requires_a_file_and_a_visible_task(self):
+        response = self.client.post(f'/api/tasks/{self.tasks[0].id}/attachments/', {}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        outsider = self.create_test_user('outsider')
+        self.client.force_authenticate(user=outsider)
+        self.assertEqual(self.upload(self.tasks[0], b'data').status_code, status.HTTP_404_NOT_FOUND)
+
+
+@override_settings(TASK_THUMBNAIL_SIZES=(16, 64))
+class TaskAttachmentThumbnailTests(AttachmentTestSetup, APITestCase):
+    def image_bytes(self, size=(200, 100), color='red'):
+        buffer = io.BytesIO()
+        Image.new('RGB', size, color).save(buffer, 'PNG')
+        return buffer.getvalue()
+
+    def upload_image(self, task, content):
+        response = self.client.post(
+            f'/api/tasks/{task.id}/attachments/',
+            {'file': SimpleUploadedFile('logo.png', content, content_type='image/png')},
+            format='multipart'
+        )
+        run_pending_jobs()
+        return response
+
+    def test_image_upload_renders_thumbnails(self):
+        response = self.upload_image(self.tasks[0], self.image_bytes())
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertFalse(Job.objects.exists())
+        attachment = TaskAttachment.objects.get()
+        self.assertEqual(set(attachment.thumbnails), {'16', '64'})
+        with default_storage.open(attachment.thumbnails['64']) as handle, Image.open(handle) as image:
+            self.assertEqual(image.size, (64, 32))
+            self.assertEqual(image.format, 'WEBP')
+
+        response = self.client.get(f'/api/tasks/{self.tasks[0].id}/attachments/')
+        thumbnails = response.data['results'][0]['thumbnails']
+        self.assertEqual(
+            thumbnails['16'],
+            f'http://testserver/api/tasks/{self.tasks[0].id}/attachments/{attachment.id}/thumbnail/16/'
+        )
+
+    def test_thumbnails_are_served_to_task_viewers_only(self):
+        self.upload_image(self.tasks[0], self.image_bytes())
+        attachment = TaskAttachment.objects.get()
+        url = f'/api/tasks/{self.tasks[0].id}/attachments/{attachment.id}/thumbnail/64/'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'image/webp')
+        self.assertTrue(response['Content-Disposition'].startswith('inline'))
+        with Image.open(io.BytesIO(b''.join(response.streaming_content))) as image:
+            self.assertEqual(image.size, (64, 32))
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, status.HTTP_304_NOT_MODIFIED
+        )
+
+        with override_settings(TASK_ATTACHMENT_ACCEL_REDIRECT='/protected-media/'):
+            response = self.client.get(url)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{attachment.thumbnails["64"]}')
+
+        self.assertEqual(self.client.get(url.replace('/64/', '/32/')).status_code, status.HTTP_404_NOT_FOUND)
+        self.client.force_authenticate(user=self.create_test_user('outsider'))
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_duplicates_share_thumbnails_and_clean_up(self):
+        content = self.image_bytes()
+        for task in self.tasks:
+            self.upload_image(task, content)
+        first, second = TaskAttachment.objects.order_by('id')
+        self.assertEqual(first.thumbnails, second.thumbnails)
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+            second.delete()
+        self.assertFalse(default_storage.exists(first.thumbnails['16']))
+
+    def test_rendering_is_queued_until_a_worker_runs(self):
+        self.client.post(
+            f'/api/tasks/{self.tasks[0].id}/attachments/',
+            {'file': SimpleUploadedFile('logo.png', self.image_bytes(), content_type='image/png')},
+            format='multipart'
+        )
+        attachment = TaskAttachment.objects.get()
+        self.assertEqual(attachment.thumbnails, {})
+        self.assertEqual(Job.objects.get().payload, {'attachment_id': attachment.id})
+        self.assertEqual(run_pending_jobs(), 1)
+        attachment.refresh_from_db()
+        self.assertEqual(set(attachment.thumbnails), {'16', '64'})
+
+    def test_non_images_get_no_thumbnails(self):
+        self.upload(self.tasks[0], b'not really an image', name='fake.png')
+        self.assertEqual(run_pending_jobs(), 1)
+        self.assertEqual(TaskAttachment.objects.get().thumbnails, {})
+
+    def test_backfill_command(self):
+        name = default_storage.save('task_attachments/legacy.png', SimpleUploadedFile('legacy.png', self.image_bytes()))
+        attachment = TaskAttachment.objects.create(task=self.tasks[0], file=name, uploaded_by=self.user)
+        TaskAttachment.objects.create(task=self.tasks[1], file='task_attachments/notes.txt', uploaded_by=self.user)
+        out = io.StringIO()
+        call_command('generate_thumbnails', '--workers', '0', stdout=out)
+        self.assertIn('Rendered thumbnails for 1 of 1 image file(s).', out.getvalue())
+        attachment.refresh_from_db()
+        self.assertEqual(set(attachment.thumbnails), {'16', '64'})
+
+
+class TaskAttachmentDownloadTests(AttachmentTestSetup, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = bytes(range(256)) * 4
+        self.upload(self.tasks[0], self.content, name='data.bin')
+        self.attachment = TaskAttachment.objects.get()
+        self.url = f'/api/tasks/{self.tasks[0].id}/attachments/{self.attachment.id}/download/'
+
+    def read(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_full_download(self):
+        response = self.client.get(self.url, HTTP_ACCEPT='application/octet-stream')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.read(response), self.content)
+        self.assertEqual(response['Content-Length'], str(len(self.content)))
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['ETag'], f'"{self.attachment.blob.digest}"')
+        self.assertIn('filename="data.bin"', response['Content-Disposition'])
+
+    def test_byte_ranges(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(self.read(response), self.content[10:20])
+        self.assertEqual(response['Content-Range'], f'bytes 10-19/{len(self.content)}')
+        self.assertEqual(response['Content-Length'], '10')
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-5')
+        self.assertEqual(self.read(response), self.content[-5:])
+        response = self.client.get(self.url, HTTP_RANGE='bytes=1000-')
+        self.assertEqual(self.read(response), self.content[1000:])
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=5000-')
+        self.assertEqual(response.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(self.content)}')
+
+    def test_if_range_and_conditional_headers(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=etag)
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.read(response)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        response = self.client.get(self.url, HTTP_IF_MATCH='"other"')
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+
+    @override_settings(TASK_ATTACHMENT_ACCEL_REDIRECT='/protected-media/')
+    def test_accel_redirect_hands_off_to_proxy(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.attachment.file.name}')
+
+    def test_download_requires_visibility(self):
+        other = TaskAttachment.objects.create(task=self.tasks[1], file='x.txt', uploaded_by=self.user)
+        response = self.client.get(f'/api/tasks/{self.tasks[0].id}/attachments/{other.id}/download/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.client.force_authenticate(user=self.create_test_user('outsider'))
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,79 @@
+"""
+Thumbnail derivatives for image attachments.
+
+Each configured size is rendered once per stored file and saved next to it as
+``<file>.thumb-<size>.webp``; attachments sharing a blob share the
+derivatives. Uploads queue a ``tasks.render_thumbnails`` job (see
+``tasks.jobs``), so rendering happens on the job workers once the upload
+commits and survives restarts of the server process.
+"""
+import io
+import mimetypes
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connections
+from PIL import Image, ImageOps, UnidentifiedImageError
+from .models import TaskAttachment
+
+THUMBNAIL_FORMAT = 'WEBP'
+THUMBNAIL_EXTENSION = 'webp'
+
+
+def thumbnail_name(name, size):
+    return f'{name}.thumb-{size}.{THUMBNAIL_EXTENSION}'
+
+
+def is_image(attachment):
+    """Cheap pre-check from the declared or guessed type; Pillow has the final say."""
+    for content_type in (attachment.content_type, mimetypes.guess_type(attachment.name or attachment.file.name)[0]):
+        if content_type and content_type.startswith('image/'):
+            return True
+    return False
+
+
+def render_thumbnails(storage, name, sizes):
+    """Write any missing derivatives of ``name``; return ``{size: name}`` or ``{}`` for non-images."""
+    thumbnails = {str(size): thumbnail_name(name, size) for size in sizes}
+    missing = {size: path for size, path in thumbnails.items() if not storage.exists(path)}
+    if not missing:
+        return thumbnails
+    try:
+        with storage.open(name, 'rb') as handle, Image.open(handle) as image:
+            # Lets the JPEG decoder downscale while reading.
+            image.draft('RGB', (max(sizes), max(sizes)))
+            image = ImageOps.exif_transpose(image)
+            image = image.convert('RGBA' if image.mode in ('RGBA', 'LA', 'P') else 'RGB')
+            for size, path in missing.items():
+                thumbnail = image.copy()
+                thumbnail.thumbnail((int(size), int(size)))
+                buffer = io.BytesIO()
+                thumbnail.save(buffer, THUMBNAIL_FORMAT)
+                storage.save(path, ContentFile(buffer.getvalue()))
+    except (OSError, UnidentifiedImageError, Image.DecompressionBombError):
+        return {}
+    return thumbnails
+
+
+def generate_thumbnails(attachment_id):
+    """Render and record the thumbnails of one attachment and its duplicates."""
+    attachment = TaskAttachment.objects.filter(pk=attachment_id).first()
+    if attachment is None or not attachment.file or not is_image(attachment):
+        return {}
+    thumbnails = render_thumbnails(
+        attachment.file.storage, attachment.file.name, settings.TASK_THUMBNAIL_SIZES
+    )
+    TaskAttachment.objects.filter(file=attachment.file.name).update(thumbnails=thumbnails)
+    return thumbnails
+
+
+def generate_thumbnails_in_worker(attachment_id):
+    """``generate_thumbnails`` for pool threads, which must close their own connections."""
+    try:
+        return generate_thumbnails(attachment_id)
+    finally:
+        connections.close_all()
+
+
+def delete_thumbnails(storage, name):
+    for size in settings.TASK_THUMBNAIL_SIZES:
+        storage.delete(thumbnail_name(name, size))
@@ -1,10 +1,13 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from .async_views import TaskDetailAsyncView, TaskListAsyncView
 from .views import TaskViewSet
 
 router = DefaultRouter()
 router.register(r'tasks', TaskViewSet, basename='task')
 
 urlpatterns = [
+    path('async/tasks/', TaskListAsyncView.as_view(), name='task-list-async'),
+    path('async/tasks/<int:pk>/', TaskDetailAsyncView.as_view(), name='task-detail-async'),
     path('', include(router.urls)),
 ]
@@ -1,53 +1,218 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
 from rest_framework import viewsets, permissions
 from rest_framework.decorators import action
+from rest_framework.parsers import FileUploadParser, MultiPartParser
 from rest_framework.response import Response
 from rest_framework import status as http_status
-from django.db.models import Q
+from django.db import transaction
+from django.shortcuts import get_object_or_404
+from accounts.authentication import StatelessActionsMixin
+from task_management.conditional import ConditionalGetMixin
+from task_management.pagination import (
+    SearchPagination,
+    TaskAttachmentCursorPagination,
+    TaskCommentCursorPagination,
+    TaskHistoryCursorPagination,
+)
+from task_management.sparse import sparse_queryset
+from task_management.transactions import AtomicWritesMixin
+from task_management.values import ValuesListMixin
+from .access import visible_tasks
+from .attachments import DigestUploadHandler, QuotaExceeded, attach_upload, remaining_quota
+from .bulk import bulk_change_status, bulk_write_tasks
+from .downloads import DownloadRenderer, serve_attachment, serve_thumbnail
+from .export import (
+    HISTORY_EXPORT_FIELDS,
+    TASK_EXPORT_FIELDS,
+    CSVRenderer,
+    ExportFilterSerializer,
+    NDJSONRenderer,
+    export_response,
+    filter_export,
+)
+from .jobs import defer_history
 from .models import Task, TaskHistory, TaskAttachment, TaskComment
+from .search import search_tasks
 from .serializers import (
     TaskSerializer,
+    TaskValuesSerializer,
     TaskHistorySerializer,
     TaskAttachmentSerializer,
     TaskCommentSerializer
 )
 
-class TaskViewSet(viewsets.ModelViewSet):
+BULK_STATUS_FILTERS = ('project', 'status', 'priority', 'assigned_to')
+
+
+def task_read_queryset(user, request=None):
+    """Visible tasks with what ``TaskSerializer`` reads for ``request`` loaded up front."""
+    return sparse_queryset(visible_tasks(user), TaskSerializer, request)
+
+
+class TaskViewSet(StatelessActionsMixin, AtomicWritesMixin, ConditionalGetMixin, ValuesListMixin,
+                  viewsets.ModelViewSet):
     serializer_class = TaskSerializer
+    values_serializer_class = TaskValuesSerializer
     permission_classes = [permissions.IsAuthenticated]
+    stateless_actions = (
+        'list', 'retrieve', 'search', 'comments', 'attachments', 'download_attachment', 'attachment_thumbnail'
+    )
+    # attach_upload commits on its own once the file is stored.
+    non_atomic_actions = ('upload_attachment',)
+    # Actions that only need the task itself, not the serializer's relations.
+    plain_task_actions = (
+        'comments', 'add_comment', 'attachments', 'upload_attachment', 'download_attachment'
+    )
+    # Actions whose signals adjust the project counters from the loaded status.
+    locked_actions = ('update', 'partial_update', 'destroy', 'change_status')
 
     def get_queryset(self):
-        return Task.objects.filter(
-            Q(created_by=self.request.user) |
-            Q(assigned_to=self.request.user) |
-            Q(project__members__user=self.request.user)
-        ).distinct()
+        if self.action in self.plain_task_actions:
+            return visible_tasks(self.request.user)
+        queryset = task_read_queryset(self.request.user, self.request)
+        if self.action in self.locked_actions:
+            # Inside the request's transaction (AtomicWritesMixin), so a
+            # concurrent write cannot change the row between load and save.
+            queryset = queryset.select_for_update(of=('self',))
+        return queryset
+
+    def get_values_queryset(self):
+        return visible_tasks(self.request.user)
 
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
 
     def perform_update(self, serializer):
-        task = self.get_object()
+        task = serializer.instance
         old_status = task.status
         old_assigned_to = task.assigned_to
-        updated_task = serializer.save()
-        if (old_status != updated_task.status or
-                old_assigned_to != updated_task.assigned_to):
-            TaskHistory.objects.create(
-                task=updated_task,
-                changed_by=self.request.user,
-                old_status=old_status,
-                new_status=updated_task.status,
-                old_assigned_to=old_assigned_to,
-                new_assigned_to=updated_task.assigned_to,
-                notes=f"Status changed from {old_status} to {updated_task.status}"
+        with transaction.atomic():
+            updated_task = serializer.save()
+            if (old_status != updated_task.status or
+                    old_assigned_to != updated_task.assigned_to):
+                defer_history(
+                    updated_task,
+                    changed_by=self.request.user,
+                    old_status=old_status,
+                    new_status=updated_task.status,
+                    old_assigned_to=old_assigned_to,
+                    new_assigned_to=updated_task.assigned_to,
+                    notes=f"Status changed from {old_status} to {updated_task.status}"
+                )
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request, *args, **kwargs):
+        items = request.data
+        if not isinstance(items, list):
+            return Response(
+                {'error': 'Expected a list of tasks'},
+                status=http_status.HTTP_400_BAD_REQUEST
+            )
+        if len(items) > settings.TASK_BULK_MAX_ITEMS:
+            return Response(
+                {'error': f'At most {settings.TASK_BULK_MAX_ITEMS} tasks per request'},
+                status=http_status.HTTP_400_BAD_REQUEST
             )
+        result = bulk_write_tasks(request.user, items)
+        if result['failed'] and not (result['created'] or result['updated']):
+            return Response(result, status=http_status.HTTP_400_BAD_REQUEST)
+        return Response(result)
+
+    @action(detail=False)
+    def search(self, request, *args, **kwargs):
+        results = search_tasks(request.user, request.query_params.get('q', ''), self.get_queryset())
+        if results is None:
+            return Response(
+                {'error': 'Query parameter "q" must contain a search term'},
+                status=http_status.HTTP_400_BAD_REQUEST
+            )
+        paginator = SearchPagination()
+        page = paginator.paginate_queryset(results, request, view=self)
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(detail=True)
+    def comments(self, request, *args, **kwargs):
+        task = self.get_object()
+        paginator = TaskCommentCursorPagination()
+        page = paginator.paginate_queryset(task.comments.select_related('author'), request, view=self)
+        serializer = TaskCommentSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    @comments.mapping.post
+    def add_comment(self, request, *args, **kwargs):
+        task = self.get_object()
+        serializer = TaskCommentSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save(task=task, author=request.user)
+        return Response(serializer.data, status=http_status.HTTP_201_CREATED)
+
+    @action(detail=True, parser_classes=[MultiPartParser, FileUploadParser])
+    def attachments(self, request, *args, **kwargs):
+        task = self.get_object()
+        paginator = TaskAttachmentCursorPagination()
+        page = paginator.paginate_queryset(task.attachments.all(), request, view=self)
+        serializer = TaskAttachmentSerializer(page, many=True, context=self.get_serializer_context())
+        return paginator.get_paginated_response(serializer.data)
+
+    @attachments.mapping.post
+    def upload_attachment(self, request, *args, **kwargs):
+        task = self.get_object()
+        limit = remaining_quota(task.project_id)
+        if limit <= 0:
+            raise QuotaExceeded()
+        # Must be in place before request.data triggers parsing.
+        request.upload_handlers = [DigestUploadHandler(limit, request._request)]
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response(
+                {'error': 'Expected a file in the "file" field or as the request body'},
+                status=http_status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            attachment = attach_upload(task, request.user, upload)
+        finally:
+            upload.close()
+        return Response(
+            TaskAttachmentSerializer(attachment, context=self.get_serializer_context()).data,
+            status=http_status.HTTP_201_CREATED
+        )
+
+    @action(
+        detail=True,
+        url_path=r'attachments/(?P<attachment_id>\d+)/download',
+        renderer_classes=[DownloadRenderer]
+    )
+    def download_attachment(self, request, attachment_id, *args, **kwargs):
+        task = self.get_object()
+        attachment = get_object_or_404(
+            TaskAttachment.objects.select_related('blob'), task=task, pk=attachment_id
+        )
+        return serve_attachment(request, attachment)
+
+    @action(
+        detail=True,
+        url_path=r'attachments/(?P<attachment_id>\d+)/thumbnail/(?P<size>\d+)',
+        renderer_classes=[DownloadRenderer]
+    )
+    def attachment_thumbnail(self, request, attachment_id, size, *args, **kwargs):
+        task = self.get_object()
+        attachment = get_object_or_404(
+            TaskAttachment.objects.select_related('blob'), task=task, pk=attachment_id
+        )
+        return serve_thumbnail(request, attachment, size)
 
     @action(detail=True)
     def history(self, request, *args, **kwargs):
         task = self.get_object()
-        history = task.history.all().order_by('-changed_at')
-        serializer = TaskHistorySerializer(history, many=True)
-        return Response(serializer.data)
+        history = task.history.select_related(
+            'changed_by', 'old_assigned_to', 'new_assigned_to'
+        )
+        paginator = TaskHistoryCursorPagination()
+        page = paginator.paginate_queryset(history, request, view=self)
+        serializer = TaskHistorySerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
     @action(detail=True, methods=['post'])
     def change_status(self, request, *args, **kwargs):
@@ -60,12 +225,79 @@ class TaskViewSet(viewsets.ModelViewSet):
             )
         old_status = task.status
         task.status = new_status
-        task.save()
-        TaskHistory.objects.create(
-            task=task,
-            changed_by=request.user,
-            old_status=old_status,
-            new_status=new_status,
-            notes=f"Status manually changed to {new_status}"
-        )
+        with transaction.atomic():
+            task.save()
+            defer_history(
+                task,
+                changed_by=request.user,
+                old_status=old_status,
+                new_status=new_status,
+                notes=f"Status manually changed to {new_status}"
+            )
         return Response({'status': 'Status updated successfully'})
+
+    @action(detail=False, methods=['post'])
+    def bulk_status(self, request, *args, **kwargs):
+        new_status = request.data.get('status')
+        if new_status not in dict(Task.STATUS_CHOICES):
+            return Response(
+                {'error': 'Invalid status'},
+                status=http_status.HTTP_400_BAD_REQUEST
+            )
+
+        ids = request.data.get('ids')
+        filters = request.data.get('filter')
+        if (ids is None) == (filters is None):
+            return Response(
+                {'error': 'Provide exactly one of "ids" or "filter"'},
+                status=http_status.HTTP_400_BAD_REQUEST
+            )
+        if ids is not None:
+            if (not isinstance(ids, list) or len(ids) > settings.TASK_BULK_MAX_ITEMS or
+                    not all(isinstance(task_id, int) for task_id in ids)):
+                return Response(
+                    {'error': f'"ids" must be a list of at most {settings.TASK_BULK_MAX_ITEMS} integers'},
+                    status=http_status.HTTP_400_BAD_REQUEST
+                )
+        elif not isinstance(filters, dict) or not filters or set(filters) - set(BULK_STATUS_FILTERS):
+            return Response(
+                {'error': f'"filter" may only use: {", ".join(BULK_STATUS_FILTERS)}'},
+                status=http_status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            result = bulk_change_status(request.user, new_status, ids=ids, filters=filters)
+        except (TypeError, ValueError, DjangoValidationError):
+            return Response(
+                {'error': 'Invalid filter value'},
+                status=http_status.HTTP_400_BAD_REQUEST
+            )
+        return Response(result)
+
+    @action(detail=False, renderer_classes=[NDJSONRenderer, CSVRenderer])
+    def export(self, request, *args, **kwargs):
+        params = ExportFilterSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        tasks = filter_export(
+            visible_tasks(request.user), params.validated_data,
+            project_field='project_id', status_field='status', date_field='updated_at'
+        )
+        return export_response(
+            tasks, TASK_EXPORT_FIELDS, request.accepted_renderer.format, 'tasks'
+        )
+
+    @action(
+        detail=False,
+        url_path='export/history',
+        renderer_classes=[NDJSONRenderer, CSVRenderer]
+    )
+    def export_history(self, request, *args, **kwargs):
+        params = ExportFilterSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        history = filter_export(
+            TaskHistory.objects.filter(task__access__user=request.user), params.validated_data,
+            project_field='task__project_id', status_field='new_status', date_field='changed_at'
+        )
+        return export_response(
+            history, HISTORY_EXPORT_FIELDS, request.accepted_renderer.format, 'task-history'
+        )